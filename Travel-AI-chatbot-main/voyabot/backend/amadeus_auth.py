@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+
+import requests
+
+import upstream
+
+
+class AmadeusTokenManager:
+    """Thread-safe holder for the Amadeus client-credentials token.
+
+    Concurrent callers that find no valid token share one in-flight fetch
+    (double-checked under `_refresh_lock`) instead of all POSTing the token URL.
+    After every successful fetch a timer refreshes the token `refresh_margin`
+    seconds before it expires, so request threads normally never wait on it.
+    """
+
+    def __init__(self, token_url, client_id, client_secret, refresh_margin=120):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expiry = 0  # UNIX timestamp
+        self._refresh_lock = threading.Lock()
+        self._timer = None
+        self.stats = {"fetches": 0, "failures": 0, "background_refreshes": 0, "invalidations": 0}
+
+    def _valid(self):
+        return self._token is not None and time.time() < self._expiry
+
+    def get_token(self):
+        """Return a valid access token, fetching one only if none is cached."""
+        token = self._token
+        if self._valid():
+            return token
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._valid():
+                return self._token
+            return self._fetch()
+
+    def invalidate(self, token):
+        """Drop `token` after the API rejected it (401); a newer token is kept."""
+        if token and self._token == token:
+            self._token = None
+            self._expiry = 0
+            self.stats["invalidations"] += 1
+
+    def start(self):
+        """Fetch the first token in the background so the first search does not wait."""
+        threading.Thread(target=self._background_refresh, name="amadeus-token", daemon=True).start()
+
+    def _fetch(self):
+        # Caller must hold _refresh_lock
+        try:
+            response = upstream.post(self.token_url, data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            })
+            response.raise_for_status()
+            json_response = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.stats["failures"] += 1
+            print(f"❗ Amadeus token error: {e}")
+            return None
+
+        self._token = json_response["access_token"]
+        self._expiry = time.time() + json_response["expires_in"]
+        self.stats["fetches"] += 1
+        self._schedule(json_response["expires_in"])
+        return self._token
+
+    def _schedule(self, expires_in):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(max(expires_in - self.refresh_margin, 1), self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        with self._refresh_lock:
+            self.stats["background_refreshes"] += 1
+            if self._fetch() is None:
+                self._schedule(self._retry_delay())
+
+    def _retry_delay(self):
+        """Delay before retrying a failed background refresh.
+
+        The current token (if any) stays usable until it expires, so retry well inside
+        its remaining lifetime; once it is gone, request threads fetch on demand anyway.
+        """
+        remaining = self._expiry - time.time() - 5
+        return min(15, remaining) if remaining >= 1 else 15
+
+    def get_stats(self):
+        return dict(self.stats, expires_in=max(int(self._expiry - time.time()), 0))
+
+
+class AsyncAmadeusTokenManager(AmadeusTokenManager):
+    """AmadeusTokenManager for the asyncio backend; `client` is an AsyncUpstreamClient.
+
+    Concurrent callers share one in-flight fetch behind an asyncio.Lock, and a task on
+    the event loop refreshes the token `refresh_margin` seconds before it expires.
+    """
+
+    def __init__(self, client, token_url, client_id, client_secret, refresh_margin=120):
+        super().__init__(token_url, client_id, client_secret, refresh_margin)
+        self.client = client
+        self._refresh_lock = asyncio.Lock()
+        self._task = None
+
+    async def get_token(self):
+        token = self._token
+        if self._valid():
+            return token
+        async with self._refresh_lock:
+            if self._valid():
+                return self._token
+            return await self._fetch()
+
+    def start(self):
+        """Start the refresh task; call from the running event loop."""
+        self._task = asyncio.ensure_future(self._refresh_loop())
+
+    async def _fetch(self):
+        # Caller must hold _refresh_lock
+        try:
+            response = await self.client.post(self.token_url, data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            })
+            response.raise_for_status()
+            json_response = response.json()
+        except (self.client.Error, ValueError) as e:
+            self.stats["failures"] += 1
+            print(f"❗ Amadeus token error: {e}")
+            return None
+
+        self._token = json_response["access_token"]
+        self._expiry = time.time() + json_response["expires_in"]
+        self.stats["fetches"] += 1
+        return self._token
+
+    async def _refresh_loop(self):
+        while True:
+            async with self._refresh_lock:
+                self.stats["background_refreshes"] += 1
+                fetched = await self._fetch() is not None
+            delay = max(self._expiry - time.time() - self.refresh_margin, 1) if fetched else self._retry_delay()
+            await asyncio.sleep(delay)
@@ -0,0 +1,55 @@
+"""flask_jwt_extended for the Quart backend.
+
+The extension only runs inside a Flask app context, which Quart does not provide. AsyncJWT
+keeps a private Flask app carrying the JWTManager and the JWT_* settings and runs the
+extension's own create_access_token / verify_jwt_in_request there, so tokens, claims and
+error replies are exactly the ones voyabot.py produces, and sessions work on either backend.
+"""
+import functools
+
+import flask_jwt_extended
+from flask import Flask
+from quart import g, jsonify, request
+
+
+class AsyncJWT:
+    """`jwt_required()` and `create_access_token()` for async views; `config` adds JWT_* settings."""
+
+    def __init__(self, secret_key, **config):
+        self._app = Flask(__name__)
+        self._app.config["JWT_SECRET_KEY"] = secret_key
+        self._app.config.update(config)
+        flask_jwt_extended.JWTManager(self._app)
+
+    def create_access_token(self, identity):
+        with self._app.app_context():
+            return flask_jwt_extended.create_access_token(identity=identity)
+
+    def verify(self, headers):
+        """(identity, None) for a valid access token in `headers`, else (None, (payload, status))."""
+        with self._app.test_request_context(headers=headers):
+            try:
+                flask_jwt_extended.verify_jwt_in_request()
+                return flask_jwt_extended.get_jwt_identity(), None
+            except Exception as e:
+                # The extension's error handlers, as registered on a Flask app (re-raises anything else)
+                response = self._app.make_response(self._app.handle_user_exception(e))
+                return None, (response.get_json(), response.status_code)
+
+    def jwt_required(self):
+        def decorator(view):
+            @functools.wraps(view)
+            async def wrapper(*args, **kwargs):
+                authorization = request.headers.get("Authorization")
+                identity, error = self.verify({"Authorization": authorization} if authorization else {})
+                if error:
+                    return jsonify(error[0]), error[1]
+                g.jwt_identity = identity
+                return await view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def get_jwt_identity():
+    """Identity of the request's token, inside a view decorated with jwt_required()."""
+    return g.jwt_identity
@@ -0,0 +1,82 @@
+import asyncio
+import random
+from urllib.parse import urlsplit
+
+import httpx
+
+from upstream import (RETRY_STATUSES, UPSTREAM_BACKOFF_BASE, UPSTREAM_BACKOFF_CAP, UPSTREAM_CONNECT_TIMEOUT,
+                      UPSTREAM_MAX_RETRIES, UPSTREAM_POOL_SIZE, UPSTREAM_READ_TIMEOUT)
+
+
+class AsyncUpstreamClient:
+    """UpstreamClient for the asyncio backend, on httpx.
+
+    Same policy as upstream.UpstreamClient: one connection pool per upstream host (its
+    own httpx.AsyncClient, capped at `pool_size` connections), connect/read timeouts and
+    bounded full-jitter retries on connection errors, timeouts and 429/5xx. Waiting for
+    a pooled connection does not hold a thread, so the cap only protects the upstream.
+    """
+
+    Error = httpx.HTTPError
+
+    def __init__(self, pool_size=UPSTREAM_POOL_SIZE, connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+                 read_timeout=UPSTREAM_READ_TIMEOUT, max_retries=UPSTREAM_MAX_RETRIES,
+                 backoff_base=UPSTREAM_BACKOFF_BASE, backoff_cap=UPSTREAM_BACKOFF_CAP):
+        self.pool_size = pool_size
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._clients = {}  # "scheme://host/" -> httpx.AsyncClient
+        self._counters = {}  # host -> request/retry/error counters and in-flight requests
+
+    def _client_for(self, url):
+        parts = urlsplit(url)
+        prefix = f"{parts.scheme}://{parts.netloc}/"
+        client = self._clients.get(prefix)
+        if client is None:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            # Retries are handled in request() so they can be counted and jittered
+            client = self._clients[prefix] = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+            self._counters[prefix] = {"requests": 0, "retries": 0, "errors": 0, "in_flight": 0}
+        return client, self._counters[prefix]
+
+    async def request(self, method, url, retries=None, **kwargs):
+        """Send a request through the host's pool; raises httpx exceptions like `httpx.request`."""
+        client, counters = self._client_for(url)
+        retries = self.max_retries if retries is None else retries
+
+        attempt = 0
+        while True:
+            counters["requests"] += 1
+            counters["in_flight"] += 1
+            try:
+                response = await client.request(method, url, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException):
+                if attempt >= retries:
+                    counters["errors"] += 1
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    if response.status_code >= 400:
+                        counters["errors"] += 1
+                    return response
+            finally:
+                counters["in_flight"] -= 1
+            counters["retries"] += 1
+            await asyncio.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt))))
+            attempt += 1
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        for client in list(self._clients.values()):
+            await client.aclose()
+        self._clients.clear()
+
+    def stats(self):
+        return {prefix: dict(counters, max_connections=self.pool_size) for prefix, counters in self._counters.items()}
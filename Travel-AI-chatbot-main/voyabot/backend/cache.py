@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry TTL and stale-while-revalidate.
+
+    Entries younger than `ttl` are fresh. Entries older than `ttl` but younger
+    than `ttl + stale_ttl` are still served by `get_or_load`, which refreshes
+    them in a background thread (one refresh per key at a time). Once `maxsize`
+    entries are stored, the least recently used one is evicted.
+    """
+
+    def __init__(self, maxsize=256, ttl=300, stale_ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._tasks = set()  # refresh tasks started by get_or_load_async
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "refreshes": 0}
+
+    def lookup(self, key):
+        """Return (value, state) where state is "fresh", "stale" or None (miss/expired)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None, None
+            value, stored_at = item
+            age = time.time() - stored_at
+            if age > self.ttl + self.stale_ttl:
+                del self._data[key]
+                return None, None
+            self._data.move_to_end(key)
+            return value, ("fresh" if age <= self.ttl else "stale")
+
+    def get(self, key):
+        """Return the value if it is still fresh, else None."""
+        value, state = self.lookup(key)
+        if state == "fresh":
+            self.stats["hits"] += 1
+            return value
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(self, key, loader):
+        """Return the cached value, calling `loader()` on a miss.
+
+        Stale values are returned immediately while `loader()` runs in the
+        background. `None` results are not cached.
+        """
+        value, state = self.lookup(key)
+        if state == "fresh":
+            self.stats["hits"] += 1
+            return value
+        if state == "stale":
+            self.stats["stale_hits"] += 1
+            self._refresh_in_background(key, loader)
+            return value
+
+        self.stats["misses"] += 1
+        value = loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = loader()
+                if value is not None:
+                    self.set(key, value)
+                    self.stats["refreshes"] += 1
+            except Exception as e:
+                print(f"❗ Background cache refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    async def get_or_load_async(self, key, loader):
+        """get_or_load for a coroutine `loader`; stale values are refreshed in a task on the running loop."""
+        value, state = self.lookup(key)
+        if state == "fresh":
+            self.stats["hits"] += 1
+            return value
+        if state == "stale":
+            self.stats["stale_hits"] += 1
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                task = asyncio.ensure_future(self._refresh_async(key, loader))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+
+        self.stats["misses"] += 1
+        value = await loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    async def _refresh_async(self, key, loader):
+        try:
+            value = await loader()
+            if value is not None:
+                self.set(key, value)
+                self.stats["refreshes"] += 1
+        except Exception as e:
+            print(f"❗ Background cache refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_stats(self):
+        return dict(self.stats, size=len(self._data), maxsize=self.maxsize)
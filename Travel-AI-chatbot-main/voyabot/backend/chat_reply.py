@@ -0,0 +1,254 @@
+"""The flight/hotel part of a chat turn, shared by voyabot.py and voyabot_async.py.
+
+Each flight or hotel intent of a message (intent.py) becomes a part: the details read off
+the message, an upstream search, the structured results for the response and a compact
+summary prompt. The backends only supply the I/O: searches, city lookup and generation.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import prompt_projection
+from intent import IntentEngine
+from model_router import AllModelsFailed
+from travel_queries import extract_flight_details, extract_hotel_details
+
+AI_SUMMARY_ERRORS = ("AI error: Unable to generate a summary.", "AI processing failed.", "Error in AI processing.")
+
+
+class ChatReplies:
+    """Flight/hotel searches and their summaries for chat messages.
+
+    `search_flights(origin, destination, date)` returns a flight cache entry
+    ({"offers", "summary"}) or None, `search_hotels(city_code, check_in, check_out, adults)`
+    a list of offers or None, `find_cities(message)` the cities matched in message order,
+    and `generate(prompt)` a summary (raising AllModelsFailed when no model answers).
+
+    The parts of a message with several intents (e.g. flight + hotel) are searched
+    concurrently and summarized concurrently, one summary per part, so a flight summary
+    stored on its cache entry is reused whether or not the message also asks for a hotel.
+    """
+
+    SEPARATOR = "\n\n"
+
+    def __init__(self, search_flights, search_hotels, find_cities, generate,
+                 intent_engine=None, prompt_budget=800, max_workers=8):
+        self.search_flights = search_flights
+        self.search_hotels = search_hotels
+        self.find_cities = find_cities
+        self.generate = generate
+        self.intent_engine = intent_engine or IntentEngine()
+        self.prompt_budget = prompt_budget
+        self._start_workers(max_workers)
+
+    def _start_workers(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat")
+
+    def prepare(self, message):
+        """Search the parts of a chat turn.
+
+        Returns None for general queries, otherwise {"payload": structured results,
+        "parts": [{"prompt", "entry"}]} where `entry` is the flight cache entry (or None)
+        the part's summary is stored on. Raises if every part failed.
+        """
+        intents, slots = self._intents(message)
+        if not intents:
+            return None
+        steps = self._steps(intents, self.find_cities(message))
+        if len(steps) == 1:
+            return self._prepared([self._outcome(self._part, steps[0], message, slots)])
+        futures = [self._executor.submit(self._outcome, self._part, step, message, slots) for step in steps]
+        return self._prepared([future.result() for future in futures])
+
+    def summarize(self, prepared):
+        """The reply for a prepared turn: its part summaries, generated concurrently."""
+        parts = prepared["parts"]
+        if len(parts) == 1:
+            return self._summary(parts[0])
+        return self._joined(self._executor.map(self._summary, parts))
+
+    def stream(self, prepared, stream_generation):
+        """Reply chunks for a streamed turn, with `stream_generation(prompt)` yielding text.
+
+        Parts are streamed one after the other, since the first chunk is what the client
+        waits for, and separated like summarize's summaries. Stored summaries come in one piece.
+        """
+        for i, part in enumerate(prepared["parts"]):
+            if i:
+                yield self.SEPARATOR
+            summary = self._stored_summary(part)
+            if summary:
+                yield summary
+                continue
+            chunks = []
+            for chunk in stream_generation(part["prompt"]):
+                chunks.append(chunk)
+                yield chunk
+            if chunks:
+                self._keep_summary(part, "".join(chunks))
+
+    @staticmethod
+    def general(message):
+        """A prepared turn without flight/hotel parts: the message itself is the prompt."""
+        return {"payload": {}, "parts": [{"prompt": message, "entry": None}]}
+
+    def _part(self, step, message, slots):
+        intent, cities = step
+        if intent == "flight":
+            details = self._flight_details(message, cities)
+            return self._flight_part(details, self.search_flights(details["origin"], details["destination"], details["date"]))
+        details = self._hotel_details(message, cities, slots)
+        return self._hotel_part(details, self.search_hotels(
+            details["city_code"], details["check_in"], details["check_out"], details["adults"]))
+
+    def _summary(self, part):
+        summary = self._stored_summary(part)
+        if summary:
+            return summary
+        try:
+            return self._keep_summary(part, self.generate(part["prompt"]))
+        except AllModelsFailed:
+            return AI_SUMMARY_ERRORS[1]
+        except Exception:
+            return AI_SUMMARY_ERRORS[2]
+
+    def _intents(self, message):
+        intents, slots = self.intent_engine.classify(message)
+        if intents:
+            print(f"Detected intents: {[intent.name for intent in intents]}")
+        return [intent.name for intent in intents], slots
+
+    @staticmethod
+    def _steps(intents, cities):
+        if len(intents) == 1 or not cities:
+            return [(intent, cities) for intent in intents]
+        # "flight from A to B ... hotel": the hotel is at the destination, not the origin
+        hotel_cities = [city for city in cities if city.code != cities[0].code] or cities
+        return [(intent, hotel_cities if intent == "hotel" else cities) for intent in intents]
+
+    @staticmethod
+    def _outcome(fn, *args):
+        try:
+            return fn(*args)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def _flight_details(message, cities):
+        details = extract_flight_details(message, cities)
+        print(f"Extracted flight details: {details}")
+        if not details:
+            raise Exception("Failed to extract flight details")
+        return details
+
+    @staticmethod
+    def _hotel_details(message, cities, slots):
+        details = extract_hotel_details(message, cities, slots.get("adults"))
+        print(f"Extracted hotel details: {details}")
+        if not details:
+            raise Exception("Failed to extract hotel details")
+        return details
+
+    def _flight_part(self, details, entry):
+        if not entry:
+            raise Exception("No flights found")
+        offers = entry["offers"]
+        return {
+            "payload": {"flights": offers["data"]},
+            "prompt": self._prompt(f"Flight options from {details['origin']} to {details['destination']}", offers),
+            "entry": entry
+        }
+
+    def _hotel_part(self, details, hotels):
+        if not hotels:
+            raise Exception("No hotels found")
+        return {
+            "payload": {"hotels": hotels},
+            "prompt": self._prompt(f"Hotel options in {details['city_code']}", {"hotels": hotels}),
+            "entry": None
+        }
+
+    def _prompt(self, title, data):
+        # Compact tabular prompt for flight/hotel offers instead of the raw Amadeus JSON
+        return prompt_projection.build_prompt(title, data, self.prompt_budget)
+
+    @staticmethod
+    def _prepared(outcomes):
+        parts = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+        if not parts:
+            raise outcomes[0]
+        payload = {}
+        for part in parts:
+            payload.update(part["payload"])
+        return {"payload": payload, "parts": [{"prompt": part["prompt"], "entry": part["entry"]} for part in parts]}
+
+    @staticmethod
+    def _stored_summary(part):
+        return part["entry"]["summary"] if part["entry"] else None
+
+    @staticmethod
+    def _keep_summary(part, summary):
+        # Stored on the flight cache entry, so the next hit skips the AI call too
+        if part["entry"] is not None:
+            part["entry"]["summary"] = summary
+        return summary
+
+    @classmethod
+    def _joined(cls, summaries):
+        return cls.SEPARATOR.join(summaries)
+
+
+class AsyncChatReplies(ChatReplies):
+    """ChatReplies for coroutine `search_flights`/`search_hotels`/`find_cities`/`generate`.
+
+    The parts and their summaries run as tasks on the event loop.
+    """
+
+    def _start_workers(self, max_workers):
+        pass
+
+    async def prepare(self, message):
+        intents, slots = self._intents(message)
+        if not intents:
+            return None
+        steps = self._steps(intents, await self.find_cities(message))
+        return self._prepared(await asyncio.gather(
+            *(self._part(step, message, slots) for step in steps), return_exceptions=True
+        ))
+
+    async def summarize(self, prepared):
+        return self._joined(await asyncio.gather(*(self._summary(part) for part in prepared["parts"])))
+
+    async def stream(self, prepared, stream_generation):
+        for i, part in enumerate(prepared["parts"]):
+            if i:
+                yield self.SEPARATOR
+            summary = self._stored_summary(part)
+            if summary:
+                yield summary
+                continue
+            chunks = []
+            async for chunk in stream_generation(part["prompt"]):
+                chunks.append(chunk)
+                yield chunk
+            if chunks:
+                self._keep_summary(part, "".join(chunks))
+
+    async def _part(self, step, message, slots):
+        intent, cities = step
+        if intent == "flight":
+            details = self._flight_details(message, cities)
+            return self._flight_part(details, await self.search_flights(details["origin"], details["destination"], details["date"]))
+        details = self._hotel_details(message, cities, slots)
+        return self._hotel_part(details, await self.search_hotels(
+            details["city_code"], details["check_in"], details["check_out"], details["adults"]))
+
+    async def _summary(self, part):
+        summary = self._stored_summary(part)
+        if summary:
+            return summary
+        try:
+            return self._keep_summary(part, await self.generate(part["prompt"]))
+        except AllModelsFailed:
+            return AI_SUMMARY_ERRORS[1]
+        except Exception:
+            return AI_SUMMARY_ERRORS[2]
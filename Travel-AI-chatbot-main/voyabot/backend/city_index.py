@@ -0,0 +1,153 @@
+import threading
+import time
+
+from city_matcher import CityMatcher
+
+
+class CityIndex:
+    """Process-wide in-memory index of the city_codes collection.
+
+    Loaded once at startup and refreshed incrementally: after `ttl` seconds the
+    next read checks the collection size and pulls only documents newer than the
+    last seen _id. A full reload happens when documents were removed or every
+    `full_reload_interval` seconds (to pick up in-place edits). If the deployment
+    supports change streams, `start_change_feed()` keeps the index current
+    between TTL checks.
+    """
+
+    def __init__(self, collection, ttl=300, full_reload_interval=3600):
+        self.collection = collection
+        self.ttl = ttl
+        self.full_reload_interval = full_reload_interval
+        self._lock = threading.Lock()
+        self._codes = {}  # lowercase city name -> IATA code
+        self._ids = {}  # _id -> lowercase city name (needed for change-feed deletes)
+        self._last_id = None
+        self._loaded = False
+        self._checked_at = 0
+        self._loaded_at = 0
+        self._matcher = None
+        self._matcher_source = None
+        self.stats = {
+            "hits": 0,
+            "full_loads": 0,
+            "incremental_refreshes": 0,
+            "documents_added": 0,
+            "change_events": 0,
+            "matcher_builds": 0,
+        }
+
+    def _publish(self, codes, ids):
+        # Swap in new dicts instead of mutating, so readers never need the lock
+        self._codes = codes
+        self._ids = ids
+
+    def load(self):
+        """Full (re)load of the collection."""
+        with self._lock:
+            codes, ids, last_id = {}, {}, None
+            for doc in self.collection.find({}, {"city": 1, "iata_code": 1}).sort("_id", 1):
+                city = doc["city"].lower()
+                codes[city] = doc["iata_code"]
+                ids[doc["_id"]] = city
+                last_id = doc["_id"]
+            self._last_id = last_id
+            self._loaded = True
+            self._checked_at = self._loaded_at = time.time()
+            self.stats["full_loads"] += 1
+            self._publish(codes, ids)
+
+    def refresh(self):
+        """Incremental refresh: fetch only documents added since the last load."""
+        if time.time() - self._loaded_at > self.full_reload_interval:
+            return self.load()
+
+        with self._lock:
+            self._checked_at = time.time()
+            count = self.collection.estimated_document_count()
+            if count == len(self._ids):
+                return
+            if count < len(self._ids):
+                needs_full_load = True
+            else:
+                query = {"_id": {"$gt": self._last_id}} if self._last_id is not None else {}
+                new_docs = list(self.collection.find(query, {"city": 1, "iata_code": 1}).sort("_id", 1))
+                needs_full_load = len(self._ids) + len(new_docs) != count
+                if new_docs and not needs_full_load:
+                    codes, ids = dict(self._codes), dict(self._ids)
+                    for doc in new_docs:
+                        city = doc["city"].lower()
+                        codes[city] = doc["iata_code"]
+                        ids[doc["_id"]] = city
+                    self._last_id = new_docs[-1]["_id"]
+                    self.stats["incremental_refreshes"] += 1
+                    self.stats["documents_added"] += len(new_docs)
+                    self._publish(codes, ids)
+
+        if needs_full_load:
+            self.load()
+
+    def codes(self):
+        """Return the current {city: iata_code} mapping, refreshing if the TTL elapsed."""
+        if not self._loaded:
+            self.load()
+        elif time.time() - self._checked_at > self.ttl:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Serve the last good snapshot rather than failing the chat request
+                print(f"❗ City index refresh failed: {e}")
+                self._checked_at = time.time()
+        self.stats["hits"] += 1
+        return self._codes
+
+    def matcher(self):
+        """Return a CityMatcher compiled from the current snapshot.
+
+        The automaton is rebuilt lazily, only when a refresh swapped in new codes.
+        """
+        codes = self.codes()
+        matcher = self._matcher
+        if matcher is None or self._matcher_source is not codes:
+            matcher = CityMatcher(codes)
+            self._matcher, self._matcher_source = matcher, codes
+            self.stats["matcher_builds"] += 1
+        return matcher
+
+    def start_change_feed(self):
+        """Apply inserts/updates/deletes from a change stream in a daemon thread.
+
+        Change streams need a replica set; on a standalone mongod the watcher
+        exits and the TTL refresh keeps working on its own.
+        """
+        thread = threading.Thread(target=self._watch, name="city-index-feed", daemon=True)
+        thread.start()
+        return thread
+
+    def _watch(self):
+        try:
+            with self.collection.watch(full_document="updateLookup") as stream:
+                for change in stream:
+                    self._apply_change(change)
+        except Exception as e:
+            print(f"❗ City index change feed unavailable, relying on TTL refresh: {e}")
+
+    def _apply_change(self, change):
+        with self._lock:
+            codes, ids = dict(self._codes), dict(self._ids)
+            doc_id = change["documentKey"]["_id"]
+            old_city = ids.pop(doc_id, None)
+            if old_city is not None:
+                codes.pop(old_city, None)
+            doc = change.get("fullDocument")
+            if change["operationType"] != "delete" and doc:
+                city = doc["city"].lower()
+                codes[city] = doc["iata_code"]
+                ids[doc_id] = city
+                if self._last_id is None or doc_id > self._last_id:
+                    self._last_id = doc_id
+            self.stats["change_events"] += 1
+            self._publish(codes, ids)
+
+    def get_stats(self):
+        return dict(self.stats, size=len(self._codes), loaded_at=self._loaded_at)
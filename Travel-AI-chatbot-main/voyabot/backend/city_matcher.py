@@ -0,0 +1,83 @@
+import re
+from collections import namedtuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['.][a-z0-9]+)*")
+
+CityMatch = namedtuple("CityMatch", ["city", "code", "start", "end"])
+
+
+def tokenize(text):
+    """Lowercase word tokens with their character spans."""
+    return [(m.group(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text.lower())]
+
+
+class CityMatcher:
+    """Aho-Corasick automaton over word tokens, built from {city: iata_code}.
+
+    Working on whole tokens instead of characters keeps matches on word
+    boundaries ("goa" does not match inside "goal") while still handling
+    multi-word names such as "new delhi" or "port blair". One pass over the
+    message finds every mention, regardless of how many cities are indexed.
+    """
+
+    def __init__(self, city_codes):
+        self.size = len(city_codes)
+        self._goto = [{}]  # state -> {token: next_state}
+        self._fail = [0]
+        self._out = [[]]  # state -> [(city, code, token_length)]
+
+        for city, code in city_codes.items():
+            tokens = [t for t, _, _ in tokenize(city)]
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((city, code, len(tokens)))
+
+        # Breadth-first construction of failure links
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(token, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text):
+        """Return non-overlapping city mentions in positional order.
+
+        Overlaps are resolved leftmost-longest, so "new delhi" wins over "delhi".
+        """
+        tokens = tokenize(text)
+        candidates = []
+        state = 0
+        for i, (token, _, _) in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for city, code, length in self._out[state]:
+                candidates.append((i - length + 1, -length, city, code))
+
+        matches = []
+        next_free = 0
+        for first, neg_length, city, code in sorted(candidates):
+            if first < next_free:
+                continue
+            last = first - neg_length - 1
+            matches.append(CityMatch(city, code, tokens[first][1], tokens[last][2]))
+            next_free = last + 1
+        return matches
+
+    def first(self, text):
+        matches = self.find_all(text)
+        return matches[0] if matches else None
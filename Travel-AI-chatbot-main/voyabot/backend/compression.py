@@ -0,0 +1,72 @@
+import gzip
+import threading
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+from flask import request
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+
+_lock = threading.Lock()
+stats = {"compressed": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def _encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def compress_response(response, min_size=1024, gzip_level=6, brotli_quality=4):
+    """Compress `response` in place with the best encoding the client accepts.
+
+    Streamed/passthrough responses (SSE, files), small bodies, non-text types and
+    responses that are already encoded are left alone. A strong ETag becomes weak,
+    since the bytes differ from the identity representation; If-None-Match still
+    matches it (weak comparison).
+    """
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    encoding = request.accept_encodings.best_match(_encodings())
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    if encoding == "br":
+        compressed = brotli.compress(data, quality=brotli_quality)
+    else:
+        compressed = gzip.compress(data, compresslevel=gzip_level)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    with _lock:
+        stats["compressed"] += 1
+        stats["bytes_in"] += len(data)
+        stats["bytes_out"] += len(compressed)
+    return response
+
+
+def init_app(app, min_size=1024, gzip_level=6, brotli_quality=4):
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, min_size, gzip_level, brotli_quality)
+
+
+def get_stats():
+    ratio = stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else None
+    return dict(stats, ratio=round(ratio, 3) if ratio else None, encodings=_encodings())
@@ -0,0 +1,147 @@
+import atexit
+import threading
+from collections import defaultdict
+
+from pymongo import UpdateOne
+
+from cache import TTLCache
+
+
+class CounterBuffer:
+    """Coalesces `$inc` counter updates in memory and writes them with one bulk_write.
+
+    `increment(doc_id, field)` only touches memory and returns optimistic counts: the last
+    persisted value (read once per doc and cached for `base_ttl` seconds) plus every
+    increment not yet written. A daemon thread flushes every `flush_interval` seconds, or
+    sooner once `flush_size` increments are pending; whatever is left is flushed at exit.
+    A failed flush puts its deltas back so they are retried with the next one.
+    """
+
+    def __init__(self, collection, fields, flush_interval=2.0, flush_size=500, base_ttl=60, maxsize=10000):
+        self.collection = collection
+        self.fields = tuple(fields)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._base = TTLCache(maxsize=maxsize, ttl=base_ttl)
+        self._pending = defaultdict(lambda: defaultdict(int))  # doc_id -> field -> delta
+        self._pending_count = 0
+        self._inflight = {}  # deltas of the flush in progress, still counted in reads
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._started = False
+        self.stats = {"increments": 0, "flushes": 0, "documents_written": 0, "flush_errors": 0}
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._run, name="counter-flush", daemon=True).start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _load(self, doc_ids):
+        """Cached persisted counts of `doc_ids`, reading the missing ones in one query.
+
+        The read holds `_flush_lock`, so it never sees a flush that is half done (written
+        to Mongo but still in `_inflight`), which would count those deltas twice.
+        """
+        found = {}
+        missing = []
+        for doc_id in doc_ids:
+            counts = self._base.get(doc_id)
+            if counts is None:
+                missing.append(doc_id)
+            else:
+                found[doc_id] = counts
+        if missing:
+            projection = {field: 1 for field in self.fields}
+            with self._flush_lock:
+                for doc in self.collection.find({"_id": {"$in": missing}}, projection):
+                    counts = {field: doc.get(field, 0) for field in self.fields}
+                    self._base.set(doc["_id"], counts)
+                    found[doc["_id"]] = counts
+        return found
+
+    def counts_many(self, doc_ids):
+        """{doc_id: approximate current counts} (persisted plus unwritten deltas); missing docs are left out."""
+        loaded = self._load(doc_ids)
+        with self._lock:
+            # Persisted counts are re-read under the lock: a flush folds its deltas into
+            # them and clears `_inflight` in one step, so each delta is counted once
+            return {
+                doc_id: {
+                    field: (self._base.get(doc_id) or base).get(field, 0)
+                    + self._inflight.get(doc_id, {}).get(field, 0)
+                    + self._pending.get(doc_id, {}).get(field, 0)
+                    for field in self.fields
+                }
+                for doc_id, base in loaded.items()
+            }
+
+    def counts(self, doc_id):
+        """Approximate current counts of one document, or None if it does not exist."""
+        return self.counts_many([doc_id]).get(doc_id)
+
+    def increment(self, doc_id, field, amount=1):
+        """Buffer an increment; returns the optimistic counts, or None if the document does not exist."""
+        if not self._load([doc_id]):
+            return None
+        with self._lock:
+            self._pending[doc_id][field] += amount
+            self._pending_count += 1
+            self.stats["increments"] += 1
+            full = self._pending_count >= self.flush_size
+        if full:
+            self._wakeup.set()
+        return self.counts(doc_id)
+
+    def flush(self):
+        """Write all pending deltas with one unordered bulk_write."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = {doc_id: dict(deltas) for doc_id, deltas in self._pending.items()}
+                operations = self._pending_count
+                self._pending.clear()
+                self._pending_count = 0
+                self._inflight = batch
+            try:
+                self.collection.bulk_write(
+                    [UpdateOne({"_id": doc_id}, {"$inc": deltas}) for doc_id, deltas in batch.items()],
+                    ordered=False
+                )
+            except Exception as e:
+                print(f"❗ Counter flush failed, will retry: {e}")
+                with self._lock:
+                    for doc_id, deltas in batch.items():
+                        for field, delta in deltas.items():
+                            self._pending[doc_id][field] += delta
+                    self._pending_count += operations  # counted per increment, not per unit
+                    self._inflight = {}
+                    self.stats["flush_errors"] += 1
+                return 0
+
+            with self._lock:
+                # Fold the written deltas into the cached persisted counts
+                for doc_id, deltas in batch.items():
+                    base = self._base.get(doc_id)
+                    if base is not None:
+                        self._base.set(doc_id, {f: base.get(f, 0) + deltas.get(f, 0) for f in self.fields})
+                self._inflight = {}
+                self.stats["flushes"] += 1
+                self.stats["documents_written"] += len(batch)
+            return len(batch)
+
+    def get_stats(self):
+        with self._lock:
+            pending = self._pending_count
+        written = self.stats["documents_written"]
+        coalescing = (self.stats["increments"] - pending) / written if written else None
+        return dict(self.stats, pending=pending, increments_per_write=round(coalescing, 2) if coalescing else None)
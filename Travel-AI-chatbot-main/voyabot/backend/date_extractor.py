@@ -0,0 +1,132 @@
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3, "april": 4, "apr": 4,
+    "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7, "august": 8, "aug": 8,
+    "september": 9, "sept": 9, "sep": 9, "october": 10, "oct": 10, "november": 11, "nov": 11,
+    "december": 12, "dec": 12,
+}
+WEEKDAYS = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tue": 1, "tues": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thurs": 3, "friday": 4, "fri": 4, "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}
+
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_WEEKDAY = "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+# Abbreviations are ordinary words too ("I sat down", "sun and sand"), so they only
+# count as weekdays after a modifier; bare, only the full names do
+_FULL_WEEKDAY = "|".join(day for day in WEEKDAYS if day.endswith("day"))
+_DAY = r"(?:[12]\d|3[01]|0?[1-9])(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s*(?:(?P<{0}>\d{{4}})\b))?"
+_TO = r"\s*(?:-|–|to|till|until)\s*"
+
+# One alternation, tried left to right at each position: ranges before single dates
+DATE_PATTERN = re.compile("|".join([
+    r"\b(?P<iso>(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2}))\b",
+    # Day-first with one separator throughout; the iso branch above wins on yyyy-mm-dd
+    r"\b(?P<num>(?P<num_d>\d{1,2})(?P<num_sep>[-/.])(?P<num_m>\d{1,2})(?P=num_sep)(?P<num_y>\d{4}|\d{2}))\b",
+    rf"\b(?P<dm_range>(?P<dmr_d1>{_DAY}){_TO}(?P<dmr_d2>{_DAY})\s*(?:of\s+)?(?P<dmr_m>{_MONTH})\b\.?{_YEAR.format('dmr_y')})",
+    rf"\b(?P<md_range>(?P<mdr_m>{_MONTH})\.?\s+(?P<mdr_d1>{_DAY}){_TO}(?P<mdr_d2>{_DAY})\b{_YEAR.format('mdr_y')})",
+    rf"\b(?P<dm>(?P<dm_d>{_DAY})\s*(?:of\s+)?(?P<dm_m>{_MONTH})\b\.?{_YEAR.format('dm_y')})",
+    rf"\b(?P<md>(?P<md_m>{_MONTH})\.?\s+(?P<md_d>{_DAY})\b{_YEAR.format('md_y')})",
+    r"\b(?P<rel>day after tomorrow|tomorrow|today|tonight)\b",
+    r"\b(?P<in_n>in\s+(?P<in_n_count>\d{1,3})\s+(?P<in_n_unit>days?|weeks?))\b",
+    r"\b(?P<next_week>next week)\b",
+    rf"\b(?P<wd>(?P<wd_mod>next|this|coming|on)\s+(?P<wd_day>{_WEEKDAY})|(?P<wd_full>{_FULL_WEEKDAY}))\b",
+]))
+
+_ORDINAL = re.compile(r"(st|nd|rd|th)$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _day(text):
+    return int(_ORDINAL.sub("", text))
+
+
+def _with_year(day, month, year, today):
+    """Build a date; without an explicit year, use the next occurrence on or after today."""
+    if year:
+        year = int(year)
+        return date(year + 2000 if year < 100 else year, month, day)
+    candidate = date(today.year, month, day)
+    return candidate if candidate >= today else date(today.year + 1, month, day)
+
+
+def _dates_for(match, today):
+    kind = match.lastgroup
+    g = match.group
+    if kind == "iso":
+        return [date(int(g("iso_y")), int(g("iso_m")), int(g("iso_d")))]
+    if kind == "num":
+        # Day-first, as written in India
+        return [_with_year(int(g("num_d")), int(g("num_m")), g("num_y"), today)]
+    if kind in ("dm_range", "md_range"):
+        p = "dmr" if kind == "dm_range" else "mdr"
+        month, year = MONTHS[g(f"{p}_m")], g(f"{p}_y")
+        first, last = _day(g(f"{p}_d1")), _day(g(f"{p}_d2"))
+        if last >= first:
+            start = _with_year(first, month, year, today)
+            end = date(start.year, month, last)
+        elif kind == "dm_range":
+            # "28-2 March" crosses a month end: the month named is the end's, so start a month earlier
+            start_month = month - 1 or 12
+            if year and start_month == 12:
+                year = str(int(year) - 1)
+            start = _with_year(first, start_month, year, today)
+            end = date(start.year + (start_month == 12), month, last)
+        else:
+            # "Dec 28 - 2": the month named is the start's, so the end is in the next month
+            start = _with_year(first, month, year, today)
+            end = date(start.year + (month == 12), month % 12 + 1, last)
+        return [start, end] if end > start else [start]
+    if kind == "dm":
+        return [_with_year(_day(g("dm_d")), MONTHS[g("dm_m")], g("dm_y"), today)]
+    if kind == "md":
+        return [_with_year(_day(g("md_d")), MONTHS[g("md_m")], g("md_y"), today)]
+    if kind == "rel":
+        offset = {"today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2}[g("rel")]
+        return [today + timedelta(days=offset)]
+    if kind == "in_n":
+        count = int(g("in_n_count"))
+        return [today + timedelta(days=count * (7 if g("in_n_unit").startswith("week") else 1))]
+    if kind == "next_week":
+        return [today + timedelta(days=7)]
+    if kind == "wd":
+        # "friday"/"this friday"/"on friday": the coming one (today counts);
+        # "next friday": the first one strictly after today
+        ahead = (WEEKDAYS[g("wd_day") or g("wd_full")] - today.weekday()) % 7
+        if ahead == 0 and g("wd_mod") == "next":
+            ahead = 7
+        return [today + timedelta(days=ahead)]
+    return []
+
+
+@lru_cache(maxsize=4096)
+def _extract(normalized, today_ordinal):
+    today = date.fromordinal(today_ordinal)
+    found = []
+    for match in DATE_PATTERN.finditer(normalized):
+        try:
+            found.extend(_dates_for(match, today))
+        except ValueError:
+            continue  # e.g. 31 February
+    return tuple(d.isoformat() for d in found)
+
+
+def extract_dates(text, today=None):
+    """All dates mentioned in `text`, in order of appearance, as YYYY-MM-DD strings.
+
+    Handles "12 March", "12th of Mar 2026", "March 12", "12-15 March", "2026-03-12",
+    "12/03/2026", "12-03-2026", "today"/"tomorrow", "next friday" and "in 3 days".
+    Ranges yield their start and end. Results are memoized per (normalized text, reference day).
+    """
+    today = today or date.today()
+    normalized = _WHITESPACE.sub(" ", text.lower()).strip()
+    return list(_extract(normalized, today.toordinal()))
+
+
+def cache_info():
+    return _extract.cache_info()
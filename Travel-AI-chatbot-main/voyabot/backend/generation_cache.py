@@ -0,0 +1,135 @@
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+from cache import TTLCache
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    # Whitespace only: case carries meaning in names, codes and quoted text
+    return _WHITESPACE.sub(" ", str(prompt)).strip()
+
+
+def cache_key(model, prompt):
+    """Content address of a generation: sha256 of (model, normalized prompt)."""
+    return hashlib.sha256(f"{model}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """Per-process LRU backend."""
+
+    name = "memory"
+
+    def __init__(self, maxsize=1024, ttl=86400):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        value, state = self._cache.lookup(key)
+        return value if state == "fresh" else None
+
+    def set(self, key, entry):
+        self._cache.set(key, entry)
+
+
+class MongoBackend:
+    """Backend shared by all worker processes; Mongo's TTL monitor removes expired entries."""
+
+    name = "mongo"
+
+    def __init__(self, collection, ttl=86400):
+        self.collection = collection
+        self.ttl = ttl
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def get(self, key):
+        # The TTL monitor only runs once a minute, so filter on expiry as well
+        doc = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        if doc is None:
+            return None
+        return {"text": doc["text"], "latency": doc.get("latency", 0), "model": doc.get("model")}
+
+    def set(self, key, entry):
+        now = datetime.now(timezone.utc)
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": dict(entry, created_at=now, expires_at=now + timedelta(seconds=self.ttl))},
+            upsert=True
+        )
+
+
+def generation_cache_backends_from_env(mongo_collection):
+    """Backends named in GENERATION_CACHE_BACKENDS ("memory", "mongo" or "memory,mongo"); one
+    that cannot be set up is left out. `mongo_collection` is a pymongo collection."""
+    ttl = int(os.getenv("GENERATION_CACHE_TTL", 86400))
+    backends = []
+    for backend_name in os.getenv("GENERATION_CACHE_BACKENDS", "memory").split(","):
+        backend_name = backend_name.strip()
+        try:
+            if backend_name == "memory":
+                backends.append(MemoryBackend(maxsize=int(os.getenv("GENERATION_CACHE_SIZE", 1024)), ttl=ttl))
+            elif backend_name == "mongo":
+                backends.append(MongoBackend(mongo_collection, ttl=ttl))
+        except Exception as e:
+            print(f"❗ Generation cache backend '{backend_name}' disabled: {e}")
+    return backends
+
+
+class GenerationCache:
+    """Read-through cache for Gemini generations.
+
+    Backends are consulted in order (e.g. memory, then Mongo); a hit in a later
+    backend is copied into the earlier ones. Each entry remembers how long the
+    original generation took, which is reported as saved latency on hits.
+    """
+
+    def __init__(self, backends):
+        self.backends = backends
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "backend_errors": 0, "saved_latency_seconds": 0.0}
+
+    def _record(self, field, amount=1):
+        with self._lock:
+            self.stats[field] += amount
+
+    def lookup(self, models, prompt):
+        """Return the cached entry {"text", "latency", "model"} for the first of `models`
+        that has one for `prompt`, or None. Counts one hit or one miss."""
+        for model in ([models] if isinstance(models, str) else models):
+            key = cache_key(model, prompt)
+            for i, backend in enumerate(self.backends):
+                try:
+                    entry = backend.get(key)
+                except Exception as e:
+                    print(f"❗ Generation cache read failed ({backend.name}): {e}")
+                    self._record("backend_errors")
+                    continue
+                if entry:
+                    for earlier in self.backends[:i]:
+                        earlier.set(key, entry)
+                    self._record("hits")
+                    self._record("saved_latency_seconds", entry.get("latency", 0))
+                    return dict(entry, model=model)
+        self._record("misses")
+        return None
+
+    def store(self, model, prompt, text, latency):
+        key = cache_key(model, prompt)
+        entry = {"text": text, "latency": latency, "model": model}
+        for backend in self.backends:
+            try:
+                backend.set(key, entry)
+            except Exception as e:
+                print(f"❗ Generation cache write failed ({backend.name}): {e}")
+                self._record("backend_errors")
+
+    def get_stats(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(
+            self.stats,
+            hit_ratio=round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            backends=[backend.name for backend in self.backends]
+        )
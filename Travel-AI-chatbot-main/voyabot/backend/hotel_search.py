@@ -0,0 +1,131 @@
+import asyncio
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from cache import TTLCache
+
+
+def best_price(hotel_offer):
+    """Lowest total price among a hotel's offers, or inf when none is parseable."""
+    prices = []
+    for offer in hotel_offer.get("offers") or []:
+        try:
+            prices.append(float(offer["price"]["total"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return min(prices) if prices else float("inf")
+
+
+class HotelSearchPipeline:
+    """City hotel list -> batched, concurrent availability checks -> top-k cheapest offers.
+
+    `list_hotels(city_code)` and `check_availability(hotel_ids, check_in, check_out, adults)`
+    are the Amadeus calls; both return a list or None on failure. The per-city hotel
+    list rarely changes, so it is cached for `hotel_list_ttl` seconds. Each search keeps
+    at most `max_concurrency` availability batches in flight, so concurrent searches
+    interleave instead of queueing behind each other's batches; `max_workers` caps the
+    batches in flight across all searches in the process.
+    """
+
+    def __init__(self, list_hotels, check_availability, batch_size=20, max_concurrency=4, max_workers=32,
+                 max_candidates=200, top_k=5, hotel_list_ttl=6 * 3600):
+        self.list_hotels = list_hotels
+        self.check_availability = check_availability
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_candidates = max_candidates
+        self.top_k = top_k
+        self.hotel_ids_cache = TTLCache(maxsize=256, ttl=hotel_list_ttl)
+        self._start_workers(max_workers)
+
+    def _start_workers(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hotel-batch")
+
+    def hotel_ids(self, city_code):
+        def load():
+            hotels = self.list_hotels(city_code)
+            if not hotels:
+                return None
+            return [hotel["hotelId"] for hotel in hotels if hotel.get("hotelId")]
+
+        return self.hotel_ids_cache.get_or_load(city_code.upper(), load)
+
+    def search(self, city_code, check_in, check_out, adults=2, top_k=None):
+        """Return up to `top_k` available hotel offers sorted by price, or None if nothing was found."""
+        hotel_ids = self.hotel_ids(city_code)
+        if not hotel_ids:
+            return None
+
+        batches = iter(self._batches(hotel_ids))
+        pending = set()
+        offers = []
+        while True:
+            # Top up this search's window as its batches finish
+            for batch in batches:
+                pending.add(self._executor.submit(self.check_availability, batch, check_in, check_out, adults))
+                if len(pending) >= self.max_concurrency:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❗ Hotel availability batch failed: {e}")
+                    continue
+                offers.extend(hotel for hotel in result or [] if hotel.get("available", True))
+        return self._cheapest(offers, top_k)
+
+    def _batches(self, hotel_ids):
+        candidates = hotel_ids[:self.max_candidates]
+        return [candidates[i:i + self.batch_size] for i in range(0, len(candidates), self.batch_size)]
+
+    def _cheapest(self, offers, top_k=None):
+        if not offers:
+            return None
+        # Bounded heap: O(n log k) instead of sorting every offer
+        return heapq.nsmallest(top_k or self.top_k, offers, key=best_price)
+
+
+class AsyncHotelSearchPipeline(HotelSearchPipeline):
+    """HotelSearchPipeline for coroutine `list_hotels`/`check_availability` callables.
+
+    Batches run as tasks on the event loop: a per-search semaphore keeps at most
+    `max_concurrency` of a search's calls in flight, and a shared one `max_workers`
+    across the process, like the thread pool does.
+    """
+
+    def _start_workers(self, max_workers):
+        self._slots = asyncio.Semaphore(max_workers)
+
+    async def hotel_ids(self, city_code):
+        async def load():
+            hotels = await self.list_hotels(city_code)
+            if not hotels:
+                return None
+            return [hotel["hotelId"] for hotel in hotels if hotel.get("hotelId")]
+
+        return await self.hotel_ids_cache.get_or_load_async(city_code.upper(), load)
+
+    async def _check(self, search_slots, batch, check_in, check_out, adults):
+        async with search_slots, self._slots:
+            return await self.check_availability(batch, check_in, check_out, adults)
+
+    async def search(self, city_code, check_in, check_out, adults=2, top_k=None):
+        hotel_ids = await self.hotel_ids(city_code)
+        if not hotel_ids:
+            return None
+
+        search_slots = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self._check(search_slots, batch, check_in, check_out, adults) for batch in self._batches(hotel_ids)),
+            return_exceptions=True
+        )
+        offers = []
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"❗ Hotel availability batch failed: {result}")
+                continue
+            offers.extend(hotel for hotel in result or [] if hotel.get("available", True))
+        return self._cheapest(offers, top_k)
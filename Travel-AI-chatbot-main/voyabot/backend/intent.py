@@ -0,0 +1,92 @@
+import re
+from collections import namedtuple
+
+# Same keywords /chat has always routed on; matched as substrings ("flights", "hotels" count)
+CHAT_INTENTS = {
+    "flight": ["flight", "book ticket", "airfare"],
+    "hotel": ["hotel", "stay", "accommodation"],
+}
+
+# Slots read off the message when their intent matched: intent -> {slot: pattern}. Each
+# pattern has exactly one capture group, and the first match wins
+SLOT_PATTERNS = {
+    "hotel": {"adults": r"([0-9]+)\s*(?:guests?|adults?|people|persons)"},
+}
+
+Intent = namedtuple("Intent", ["name", "score", "keywords"])
+_new_intent = tuple.__new__
+
+
+def _by_score(intent):
+    return -intent.score
+
+
+def keyword_pattern(keywords):
+    """One regex matching any of `keywords`, factored by shared prefix (a trie), e.g.
+    "a(?:ccommodation|irfare)|book\\ ticket|flight". The top-level alternation is left
+    ungrouped so the regex engine can skip to positions starting with a first letter."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # a keyword ends here
+
+    def branch(node):
+        alternatives = [re.escape(char) + branch(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return "|".join(re.escape(char) + branch(child) for char, child in sorted(trie.items()))
+
+
+class IntentEngine:
+    """Keyword intent classifier with precompiled slot patterns.
+
+    All keywords are compiled into one prefix-factored alternation, so the lowercased
+    message is scanned once by `findall` and each hit is credited to its intent through
+    a keyword -> intent table (cheaper than a named group per intent, which defeats the
+    regex engine's first-letter skip). Keywords are substrings, as before ("flights",
+    "hotels" count). Slots parameterize an intent, so a slot pattern is only searched
+    when its intent matched. `classify` returns every intent that matched, ranked by
+    number of keyword hits (ties keep declaration order), plus the extracted slots.
+    """
+
+    def __init__(self, intents=CHAT_INTENTS, slots=SLOT_PATTERNS):
+        self._order = list(intents)
+        self._intent_of = {keyword.lower(): name for name, keywords in intents.items() for keyword in keywords}
+        self._pattern = re.compile(keyword_pattern(self._intent_of))
+        self._slots = {
+            intent: [(name, re.compile(pattern)) for name, pattern in patterns.items()]
+            for intent, patterns in slots.items()
+        }
+
+    def classify(self, text):
+        """Return (ranked [Intent], {slot: value}) for `text`."""
+        text = text.lower()
+        found = self._pattern.findall(text)
+        if not found:
+            return [], {}
+        hits = {}
+        for keyword in found:
+            name = self._intent_of[keyword]
+            if name in hits:
+                hits[name].append(keyword)
+            else:
+                hits[name] = [keyword]
+        ranked = []
+        for name in self._order:
+            if name in hits:
+                # tuple.__new__ skips the namedtuple's Python-level __new__, a large share of a call
+                ranked.append(_new_intent(Intent, (name, len(hits[name]), hits[name])))
+        if len(ranked) > 1:
+            ranked.sort(key=_by_score)  # stable: ties keep declaration order
+        slots = {}
+        for intent in ranked:
+            for name, pattern in self._slots.get(intent.name, ()):
+                match = pattern.search(text)
+                if match:
+                    slots.setdefault(name, int(match.group(1)))
+        return ranked, slots
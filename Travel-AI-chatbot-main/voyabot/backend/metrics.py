@@ -0,0 +1,10 @@
+"""Latency summaries for the /metrics endpoint of voyabot.py and voyabot_async.py."""
+
+
+def percentiles(samples):
+    """{"count", "p50", "p95", "max"} of `samples` (milliseconds), or {"count": 0}."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    pick = lambda q: round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 1)
+    return {"count": len(ordered), "p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1], 1)}
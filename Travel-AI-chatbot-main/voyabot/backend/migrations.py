@@ -0,0 +1,212 @@
+"""Indexes and data migrations for the travel_bot database.
+
+Everything here is idempotent: indexes that already exist are left alone and data
+migrations are recorded in `schema_migrations` once they complete. The backend runs
+`bootstrap(db)` at startup (unless DB_BOOTSTRAP_ON_START=false), which only creates
+indexes and lists pending data migrations. Data migrations take no lock, so run them
+from this CLI once per deploy, from a single process: with several workers migrating
+at once, review reply buckets can be copied twice.
+
+Usage (from the backend directory):
+    python migrations.py                     # apply indexes and pending migrations
+    python migrations.py --explain           # plus explain the hot queries
+    python migrations.py --slow-ms 100       # plus list profiled queries slower than 100ms
+    python migrations.py --mongomock         # dry run against an in-memory mongomock db
+"""
+import argparse
+import os
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING, DESCENDING
+
+from review_replies import ReviewReplies
+
+DB_NAME = "travel_bot"
+
+# collection -> index specs; names are fixed so re-runs recognise them
+INDEXES = {
+    "users": [
+        {"name": "username_unique", "keys": [("username", ASCENDING)], "unique": True},
+    ],
+    "responses": [
+        # One questionnaire response document per user (it is upserted by username)
+        {"name": "username_unique", "keys": [("username", ASCENDING)], "unique": True},
+    ],
+    "reviews": [
+        {"name": "timestamp_id_desc", "keys": [("timestamp", DESCENDING), ("_id", DESCENDING)]},
+    ],
+    "review_replies": [
+        {"name": "review_id_count", "keys": [("review_id", ASCENDING), ("count", ASCENDING)]},
+        {"name": "review_id_reply_id", "keys": [("review_id", ASCENDING), ("replies.reply_id", ASCENDING)]},
+    ],
+    "city_codes": [
+        {"name": "city", "keys": [("city", ASCENDING)]},
+    ],
+    "generation_cache": [
+        {"name": "expires_at_ttl", "keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+    ],
+    "questionnaire_jobs": [
+        {"name": "status_created_at", "keys": [("status", ASCENDING), ("created_at", ASCENDING)]},
+        {"name": "expires_at_ttl", "keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+    ],
+}
+
+# Queries the routes run most, explained by --explain: (label, collection, filter, sort)
+HOT_QUERIES = [
+    ("login/signup user lookup", "users", {"username": "example"}, None),
+    ("questionnaire response upsert", "responses", {"username": "example"}, None),
+    ("reviews first page", "reviews", {}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("review replies", "review_replies", {"review_id": None}, None),
+    ("city lookup", "city_codes", {"city": "mumbai"}, None),
+]
+
+
+def _same_keys(info, keys):
+    return [(field, int(direction)) for field, direction in info.get("key", [])] == [(f, int(d)) for f, d in keys]
+
+
+def apply_indexes(db, indexes=INDEXES):
+    """Create any missing index. Returns [(collection, index name, status)]."""
+    report = []
+    for collection_name, specs in indexes.items():
+        collection = db[collection_name]
+        try:
+            existing = collection.index_information()
+        except Exception:
+            existing = {}
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            # An equivalent index under another name (e.g. created by a component) counts too
+            if spec["name"] in existing or any(_same_keys(info, spec["keys"]) for info in existing.values()):
+                report.append((collection_name, spec["name"], "exists"))
+                continue
+            try:
+                collection.create_index(spec["keys"], **options)
+                report.append((collection_name, spec["name"], "created"))
+            except Exception as e:
+                # e.g. duplicate usernames block the unique index; the rest still get created
+                report.append((collection_name, spec["name"], f"error: {e}"))
+    return report
+
+
+def migrate_review_replies(db):
+    """Move replies embedded in review documents into review_replies buckets."""
+    ReviewReplies(db.review_replies).migrate(db.reviews)
+    return db.reviews.count_documents({"replies": {"$exists": True}}) == 0
+
+
+# Applied in order, each at most once: (name, fn(db) -> True when complete)
+DATA_MIGRATIONS = [
+    ("0001_review_replies_buckets", migrate_review_replies),
+]
+
+
+def apply_data_migrations(db, migrations=DATA_MIGRATIONS):
+    """Run migrations not yet recorded in schema_migrations. Returns [(name, status)]."""
+    applied = {doc["_id"] for doc in db.schema_migrations.find({}, {"_id": 1})}
+    report = []
+    for name, migrate in migrations:
+        if name in applied:
+            report.append((name, "applied earlier"))
+            continue
+        try:
+            complete = migrate(db)
+        except Exception as e:
+            report.append((name, f"error: {e}"))
+            continue
+        if complete:
+            db.schema_migrations.update_one(
+                {"_id": name}, {"$set": {"applied_at": datetime.now(timezone.utc)}}, upsert=True
+            )
+            report.append((name, "applied"))
+        else:
+            report.append((name, "incomplete, will run again"))
+    return report
+
+
+def pending_data_migrations(db, migrations=DATA_MIGRATIONS):
+    """Names of migrations not yet recorded in schema_migrations."""
+    applied = {doc["_id"] for doc in db.schema_migrations.find({}, {"_id": 1})}
+    return [name for name, _ in migrations if name not in applied]
+
+
+def bootstrap(db):
+    """Apply indexes and warn about pending data migrations, printing only what changed or failed.
+
+    Safe to run from every worker at once; data migrations are left to the CLI.
+    """
+    for collection_name, name, status in apply_indexes(db):
+        if status != "exists":
+            print(f"{'✅' if status == 'created' else '❗'} Index {collection_name}.{name}: {status}")
+    for name in pending_data_migrations(db):
+        print(f"❗ Migration {name} pending, run `python migrations.py` once from the backend directory")
+
+
+def explain_report(db, queries=HOT_QUERIES):
+    """Winning plan and work done for each hot query. Returns [(label, summary)]."""
+    report = []
+    for label, collection_name, query, sort in queries:
+        try:
+            cursor = db[collection_name].find(query).limit(20)
+            if sort:
+                cursor = cursor.sort(sort)
+            plan = cursor.explain()
+        except Exception as e:
+            report.append((label, f"explain unavailable: {e}"))
+            continue
+        stats = plan.get("executionStats", {})
+        stage = plan.get("queryPlanner", {}).get("winningPlan", {})
+        stages = []
+        while stage:
+            stages.append(stage.get("stage", "?") + (f"({stage['indexName']})" if "indexName" in stage else ""))
+            stage = stage.get("inputStage")
+        report.append((label, (
+            f"{' <- '.join(stages) or '?'}; "
+            f"keys examined {stats.get('totalKeysExamined', '?')}, "
+            f"docs examined {stats.get('totalDocsExamined', '?')}, "
+            f"{stats.get('executionTimeMillis', '?')} ms"
+        )))
+    return report
+
+
+def slow_queries(db, slow_ms=100, limit=20):
+    """Slowest entries in system.profile above `slow_ms` (needs profiling enabled on the db)."""
+    return list(
+        db.system.profile.find({"millis": {"$gt": slow_ms}}, {"op": 1, "ns": 1, "millis": 1, "planSummary": 1, "command": 1})
+        .sort("millis", DESCENDING).limit(limit)
+    )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Apply indexes and migrations to the travel_bot database.")
+    arg_parser.add_argument("--mongo-uri", default=None, help="defaults to MONGO_URI from the environment/.env")
+    arg_parser.add_argument("--mongomock", action="store_true", help="run against an in-memory mongomock database")
+    arg_parser.add_argument("--explain", action="store_true", help="explain the hot queries after applying indexes")
+    arg_parser.add_argument("--slow-ms", type=int, default=None,
+                            help="list profiled queries slower than this (enable with db.setProfilingLevel)")
+    args = arg_parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from dotenv import load_dotenv
+        from pymongo import MongoClient
+        load_dotenv()
+        client = MongoClient(args.mongo_uri or os.getenv("MONGO_URI"))
+    db = client[DB_NAME]
+
+    for collection_name, name, status in apply_indexes(db):
+        print(f"index     {collection_name}.{name}: {status}")
+    for name, status in apply_data_migrations(db):
+        print(f"migration {name}: {status}")
+    if args.explain:
+        for label, summary in explain_report(db):
+            print(f"explain   {label}: {summary}")
+    if args.slow_ms is not None:
+        entries = slow_queries(db, args.slow_ms)
+        if not entries:
+            print(f"slow      no profiled queries above {args.slow_ms} ms")
+        for entry in entries:
+            print(f"slow      {entry.get('millis')} ms {entry.get('op')} {entry.get('ns')} "
+                  f"{entry.get('planSummary', '')} {entry.get('command', '')}")
@@ -0,0 +1,265 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class AllModelsFailed(Exception):
+    pass
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a model whose circuit is open or whose half-open trial is taken."""
+
+
+class ModelHealth:
+    """Rolling latency/outcome window and circuit-breaker state for one model."""
+
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.outcomes = deque(maxlen=window)  # True = success
+        self.consecutive_failures = 0
+        self.open_until = 0  # 0 = closed; in the past = half-open
+        self.probe_until = 0  # half-open: the trial call in flight blocks others until then
+
+    def p50(self):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2]
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+def model_routes_from_env(best_model, backup_model):
+    """Routes per endpoint: fast `backup_model` first for chat/summaries, `best_model` first for long-form answers."""
+    hedge_delay = float(os.getenv("MODEL_HEDGE_DELAY", 0))  # seconds, 0 disables hedging
+    return {
+        "chat": {"models": [backup_model, best_model],
+                 "latency_budget": float(os.getenv("CHAT_LATENCY_BUDGET", 8)), "hedge_delay": hedge_delay},
+        "summary": {"models": [backup_model, best_model],
+                    "latency_budget": float(os.getenv("SUMMARY_LATENCY_BUDGET", 6)), "hedge_delay": hedge_delay},
+        "description": {"models": [best_model, backup_model],
+                        "latency_budget": float(os.getenv("DESCRIPTION_LATENCY_BUDGET", 30))},
+        "questionnaire": {"models": [best_model, backup_model],
+                          "latency_budget": float(os.getenv("QUESTIONNAIRE_LATENCY_BUDGET", 25)),
+                          "hedge_delay": hedge_delay},
+    }
+
+
+class ModelRouter:
+    """Picks which Gemini model serves a request and reuses one client object per model.
+
+    `routes` maps an endpoint name to {"models": [...preferred order], "latency_budget": seconds,
+    "hedge_delay": seconds or 0}. A model whose rolling median latency exceeds the route's
+    budget is tried after the ones within budget; the budget only orders candidates and
+    never cuts a call short (the client's own timeout does, and a hedge delay bounds how
+    long before a backup starts). After `failure_threshold` consecutive failures a model's
+    circuit opens for `cooldown` seconds; once it elapses one trial call is let through
+    (half-open) and the circuit stays open for everyone else until it succeeds. A trial
+    that fails reopens it, and one that never reports back is replaced after `cooldown`.
+    `candidates` only reads circuit state; the trial is claimed by `claim`, right before
+    a model is actually called, so listing models (e.g. for a cache lookup) costs nothing.
+    With a hedge delay, the next candidate is started if the first has not answered in
+    time and whichever finishes first wins.
+    """
+
+    def __init__(self, model_factory, routes, failure_threshold=3, cooldown=30, window=50, max_workers=16):
+        self.model_factory = model_factory
+        self.routes = routes
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.window = window
+        self._instances = {}
+        self._health = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-hedge")
+
+    def model(self, name):
+        """Cached model client for `name`."""
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.setdefault(name, self.model_factory(name))
+        return instance
+
+    def _health_for(self, name):
+        health = self._health.get(name)
+        if health is None:
+            with self._lock:
+                health = self._health.setdefault(name, ModelHealth(self.window))
+        return health
+
+    def record(self, name, latency, ok):
+        health = self._health_for(name)
+        with self._lock:
+            health.outcomes.append(ok)
+            if ok:
+                health.latencies.append(latency)
+                health.consecutive_failures = 0
+                health.open_until = 0
+            else:
+                health.consecutive_failures += 1
+                if health.consecutive_failures >= self.failure_threshold:
+                    health.open_until = time.time() + self.cooldown
+            health.probe_until = 0
+
+    def _admits(self, health, now):
+        """Whether a circuit lets a call through now: closed, or half-open with its trial free."""
+        if not health.open_until:
+            return True
+        return health.open_until <= now and health.probe_until <= now
+
+    def claim(self, name, endpoint):
+        """Reserve a call to `name` for `endpoint`; False if its circuit does not admit one.
+
+        Claims the trial call of a half-open circuit. When no model on the route is
+        admitted, every claim succeeds: trying something beats failing outright.
+        """
+        healths = {m: self._health_for(m) for m in self.routes[endpoint]["models"]}
+        health = healths.get(name) or self._health_for(name)
+        now = time.time()
+        with self._lock:
+            if self._admits(health, now):
+                if health.open_until:
+                    health.probe_until = now + self.cooldown
+                return True
+            return not any(self._admits(h, now) for h in healths.values())
+
+    def candidates(self, endpoint):
+        """Models to try for `endpoint`, best first. Does not claim anything."""
+        route = self.routes[endpoint]
+        budget = route.get("latency_budget")
+        now = time.time()
+        closed = [m for m in route["models"] if self._admits(self._health_for(m), now)]
+        if not closed:
+            # Every circuit is open: trying something beats failing outright
+            closed = list(route["models"])
+        if budget is None:
+            return closed
+        within = [m for m in closed if (self._health_for(m).p50() or 0) <= budget]
+        return within + [m for m in closed if m not in within]
+
+    def _call(self, name, prompt, endpoint, **kwargs):
+        if not self.claim(name, endpoint):
+            raise CircuitOpen(f"circuit open for {name}")
+        start = time.perf_counter()
+        try:
+            text = self.model(name).generate_content(prompt, **kwargs).text
+            if not text:
+                raise ValueError("empty response")
+        except Exception:
+            self.record(name, time.perf_counter() - start, False)
+            raise
+        self.record(name, time.perf_counter() - start, True)
+        return text
+
+    def generate(self, prompt, endpoint):
+        """Return (text, model_name) from the first model that answers; raises AllModelsFailed."""
+        models = self.candidates(endpoint)
+        hedge_delay = self.routes[endpoint].get("hedge_delay") or 0
+        last_error = None
+
+        i = 0
+        while i < len(models):
+            primary = models[i]
+            if not hedge_delay or i + 1 >= len(models):
+                try:
+                    return self._call(primary, prompt, endpoint), primary
+                except Exception as e:
+                    print(f"Error from Gemini model {primary}: {e}")
+                    last_error = e
+                    i += 1
+                    continue
+
+            # Hedged call: start the next candidate if the primary is slow
+            backup = models[i + 1]
+            futures = {self._executor.submit(self._call, primary, prompt, endpoint): primary}
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done:
+                futures[self._executor.submit(self._call, backup, prompt, endpoint)] = backup
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        return future.result(), futures[future]
+                    except Exception as e:
+                        print(f"Error from Gemini model {futures[future]}: {e}")
+                        last_error = e
+            i += len(futures)
+
+        raise AllModelsFailed(f"All AI models failed. Last error: {last_error}")
+
+    async def _call_async(self, name, prompt, endpoint, **kwargs):
+        if not self.claim(name, endpoint):
+            raise CircuitOpen(f"circuit open for {name}")
+        start = time.perf_counter()
+        try:
+            response = await self.model(name).generate_content_async(prompt, **kwargs)
+            text = response.text
+            if not text:
+                raise ValueError("empty response")
+        except Exception:
+            self.record(name, time.perf_counter() - start, False)
+            raise
+        self.record(name, time.perf_counter() - start, True)
+        return text
+
+    async def generate_async(self, prompt, endpoint):
+        """`generate` for asyncio callers. The hedge is a second task, and the slower call is cancelled."""
+        models = self.candidates(endpoint)
+        hedge_delay = self.routes[endpoint].get("hedge_delay") or 0
+        last_error = None
+
+        i = 0
+        while i < len(models):
+            primary = models[i]
+            if not hedge_delay or i + 1 >= len(models):
+                try:
+                    return await self._call_async(primary, prompt, endpoint), primary
+                except Exception as e:
+                    print(f"Error from Gemini model {primary}: {e}")
+                    last_error = e
+                    i += 1
+                    continue
+
+            backup = models[i + 1]
+            tasks = {asyncio.ensure_future(self._call_async(primary, prompt, endpoint)): primary}
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done:
+                tasks[asyncio.ensure_future(self._call_async(backup, prompt, endpoint))] = backup
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        try:
+                            return task.result(), tasks[task]
+                        except Exception as e:
+                            print(f"Error from Gemini model {tasks[task]}: {e}")
+                            last_error = e
+            finally:
+                for task in pending:
+                    task.cancel()
+            i += len(tasks)
+
+        raise AllModelsFailed(f"All AI models failed. Last error: {last_error}")
+
+    def get_stats(self):
+        now = time.time()
+        report = {}
+        for name, health in list(self._health.items()):
+            p50 = health.p50()
+            report[name] = {
+                "calls": len(health.outcomes),
+                "p50_latency_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "error_rate": round(health.error_rate(), 3),
+                "circuit_open": health.open_until > now,
+            }
+        return report
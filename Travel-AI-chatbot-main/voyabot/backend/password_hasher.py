@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+# Unsalted SHA-256 hex digests written by the old backend/auth.py
+LEGACY_SHA256 = re.compile(r"[0-9a-f]{64}")
+BCRYPT_COST = re.compile(r"\$2[abxy]?\$(\d{2})\$")
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool already has `max_pending` operations queued or running,
+    or when an operation did not finish within the timeout."""
+
+
+def _secret(password):
+    # bcrypt only uses the first 72 bytes; bcrypt>=5 raises instead of truncating like before
+    return password.encode("utf-8")[:72]
+
+
+def _bcrypt_hash(password, rounds):
+    return bcrypt.hashpw(_secret(password), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _bcrypt_check(password, hashed):
+    return bcrypt.checkpw(_secret(password), hashed.encode("utf-8"))
+
+
+def _process_context(start_method):
+    if start_method == "forkserver" and "forkserver" not in multiprocessing.get_all_start_methods():
+        start_method = "spawn"
+    context = multiprocessing.get_context(start_method)
+    if start_method == "forkserver":
+        # The server only needs the bcrypt helpers, not __main__
+        context.set_forkserver_preload([__name__])
+    return context
+
+
+class PasswordHasher:
+    """bcrypt hashing/verification in a process pool, off the request threads.
+
+    At most `max_pending` operations may be queued or running; beyond that calls fail
+    fast with HasherBusy instead of stalling the worker. A slot is released when its
+    operation finishes, not when the caller stops waiting: one that exceeds `timeout`
+    raises HasherBusy but keeps its slot until the pool is done with it. `verify` also
+    reports whether the stored hash should be replaced: legacy SHA-256 digests and
+    bcrypt hashes made with a different cost than `rounds`.
+
+    Pool workers are started with `start_method`. The default, forkserver (spawn where it
+    is unavailable), starts them from a clean process: forking the app, which already runs
+    threads (timers, executors, server workers), can leave a child holding a copied lock.
+    Both re-import the __main__ module in every worker, which is harmless under a server
+    launcher but re-runs the whole app when it was started as a script.
+    """
+
+    def __init__(self, rounds=12, workers=2, max_pending=32, timeout=10, start_method="forkserver"):
+        self.rounds = rounds
+        self.workers = workers
+        self.timeout = timeout
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+        self.stats = {"hashes": 0, "verifications": 0, "rejected": 0, "timeouts": 0, "legacy_verifications": 0}
+
+    def _executor(self):
+        # Created on first use, so importing the app does not fork
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_process_context(self.start_method))
+        return self._pool
+
+    def _reset_pool(self):
+        with self._lock:
+            self._pool = None
+
+    def _submit(self, fn, *args):
+        """Submit to the pool holding one of the `max_pending` slots until the call is done."""
+        if not self._slots.acquire(blocking=False):
+            self.stats["rejected"] += 1
+            raise HasherBusy("password hashing is saturated")
+        try:
+            try:
+                future = self._executor().submit(fn, *args)
+            except BrokenProcessPool:
+                self._reset_pool()
+                future = self._executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _timed_out(self, future):
+        future.cancel()  # frees the slot now if it is still queued
+        self.stats["timeouts"] += 1
+        return HasherBusy(f"password hashing took longer than {self.timeout}s")
+
+    def _run(self, fn, *args):
+        for attempt in range(2):
+            future = self._submit(fn, *args)
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError:
+                raise self._timed_out(future) from None
+            except BrokenProcessPool:
+                # A worker died mid-call: retry once on a fresh pool
+                if attempt:
+                    raise
+                self._reset_pool()
+
+    async def _run_async(self, fn, *args):
+        # Same pool and slots as _run, awaited instead of blocking the calling thread
+        for attempt in range(2):
+            future = self._submit(fn, *args)
+            try:
+                # shield: on timeout only _timed_out cancels, and only a call still queued
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+            except asyncio.TimeoutError:
+                raise self._timed_out(future) from None
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                self._reset_pool()
+
+    def hash(self, password):
+        if not password:
+            raise ValueError("Password must be non-empty.")
+        hashed = self._run(_bcrypt_hash, password, self.rounds)
+        self.stats["hashes"] += 1
+        return hashed
+
+    async def hash_async(self, password):
+        if not password:
+            raise ValueError("Password must be non-empty.")
+        hashed = await self._run_async(_bcrypt_hash, password, self.rounds)
+        self.stats["hashes"] += 1
+        return hashed
+
+    def verify(self, password, stored):
+        """Return (matches, needs_rehash) for `password` against the stored hash."""
+        if not password or not stored:
+            return False, False
+        if LEGACY_SHA256.fullmatch(stored):
+            return self._verify_legacy(password, stored)
+        return self._verified(stored, self._run(_bcrypt_check, password, stored))
+
+    async def verify_async(self, password, stored):
+        if not password or not stored:
+            return False, False
+        if LEGACY_SHA256.fullmatch(stored):
+            return self._verify_legacy(password, stored)
+        return self._verified(stored, await self._run_async(_bcrypt_check, password, stored))
+
+    def _verify_legacy(self, password, stored):
+        self.stats["legacy_verifications"] += 1
+        digest = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(digest, stored), True
+
+    def _verified(self, stored, matches):
+        self.stats["verifications"] += 1
+        if not matches:
+            return False, False
+        cost = BCRYPT_COST.match(stored)
+        return True, cost is None or int(cost.group(1)) != self.rounds
+
+    def get_stats(self):
+        return dict(self.stats, rounds=self.rounds, workers=self.workers)
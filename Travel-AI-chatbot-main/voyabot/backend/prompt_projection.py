@@ -0,0 +1,113 @@
+import re
+import threading
+
+_DURATION = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?")
+
+_lock = threading.Lock()
+stats = {"prompts": 0, "raw_tokens": 0, "compact_tokens": 0, "rows_dropped": 0}
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English/JSON)."""
+    return (len(text) + 3) // 4
+
+
+def estimate_raw_tokens(title, items):
+    """Tokens the unprojected prompt would have used, for the stats: the first offer's
+    size times the number of offers, so the full payload is never formatted."""
+    sample = len(str(items[0])) if items else 0
+    return estimate_tokens(title) + (sample * len(items) + 3) // 4
+
+
+def _duration(iso):
+    match = _DURATION.fullmatch(iso or "")
+    if not match:
+        return iso or "?"
+    hours, minutes = match.groups()
+    return f"{int(hours or 0)}h{int(minutes or 0):02d}m"
+
+
+def _time(iso):
+    # "2025-05-12T06:15:00" -> "05-12 06:15"
+    return f"{iso[5:10]} {iso[11:16]}" if iso and len(iso) >= 16 else (iso or "?")
+
+
+def flight_rows(flight_data):
+    """One row per offer: carrier, departure, arrival, stops, duration, total price."""
+    carriers = (flight_data.get("dictionaries") or {}).get("carriers", {})
+    rows = []
+    for offer in flight_data.get("data", []):
+        price = offer.get("price", {})
+        for itinerary in offer.get("itineraries", [])[:1]:
+            segments = itinerary.get("segments") or [{}]
+            code = segments[0].get("carrierCode") or (offer.get("validatingAirlineCodes") or ["?"])[0]
+            rows.append([
+                (carriers.get(code) or code).title(),
+                _time(segments[0].get("departure", {}).get("at")),
+                _time(segments[-1].get("arrival", {}).get("at")),
+                str(len(segments) - 1),
+                _duration(itinerary.get("duration")),
+                f"{price.get('grandTotal') or price.get('total', '?')} {price.get('currency', '')}".strip()
+            ])
+    return ["carrier", "departs", "arrives", "stops", "duration", "total"], rows
+
+
+def hotel_rows(hotels):
+    """One row per hotel: name, rating, best rate."""
+    rows = []
+    for item in hotels:
+        hotel = item.get("hotel") or {}
+        rates = []
+        for offer in item.get("offers") or []:
+            try:
+                rates.append((float(offer["price"]["total"]), offer["price"].get("currency", "")))
+            except (KeyError, TypeError, ValueError):
+                continue
+        best = min(rates) if rates else None
+        rows.append([
+            (hotel.get("name") or "?").title(),
+            str(hotel.get("rating") or "-"),
+            f"{best[0]:g} {best[1]}".strip() if best else "n/a"
+        ])
+    return ["hotel", "rating", "best rate"], rows
+
+
+def _table(header, rows):
+    return "\n".join(" | ".join(row) for row in [header] + rows)
+
+
+def build_prompt(title, data, token_budget=800):
+    """Prompt for an AI summary of flight data ({"data": [...]}) or {"hotels": [...]}.
+
+    Offers are projected onto a compact table; rows are dropped from the end until the
+    prompt fits in `token_budget`. Anything else is interpolated as before.
+    """
+    if isinstance(data, dict) and "hotels" in data:
+        items = data["hotels"]
+        header, rows = hotel_rows(items)
+    elif isinstance(data, dict) and isinstance(data.get("data"), list):
+        items = data["data"]
+        header, rows = flight_rows(data)
+    else:
+        return f"{title}:\n{data}"
+
+    prompt = f"{title}:\n{_table(header, rows)}"
+    dropped = 0
+    while rows and estimate_tokens(prompt) > token_budget:
+        rows = rows[:-1]
+        dropped += 1
+        prompt = f"{title} (first {len(rows)} options):\n{_table(header, rows)}"
+
+    raw_tokens = estimate_raw_tokens(title, items)
+    compact_tokens = estimate_tokens(prompt)
+    with _lock:
+        stats["prompts"] += 1
+        stats["raw_tokens"] += raw_tokens
+        stats["compact_tokens"] += compact_tokens
+        stats["rows_dropped"] += dropped
+    return prompt
+
+
+def get_stats():
+    saved = 1 - stats["compact_tokens"] / stats["raw_tokens"] if stats["raw_tokens"] else 0.0
+    return dict(stats, reduction=round(saved, 3))
@@ -0,0 +1,152 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+
+class QuestionnaireJobQueue:
+    """Mongo-backed queue of questionnaire generations, processed by a local worker pool.
+
+    Jobs move queued -> running -> done/failed. A worker claims a job atomically with
+    find_one_and_update and holds a lease on it; a job whose lease expired (its worker
+    died) is claimed again, and a worker whose lease was taken over drops its result.
+    Finished jobs are removed by a TTL index after `retention` seconds. `process(data)`
+    returns (payload, status_code), like the synchronous route. The backends call
+    `ensure_started` at startup, so jobs left by a crashed process are picked up without
+    waiting for a new submission.
+    """
+
+    def __init__(self, collection, process, workers=4, lease_seconds=180, retention=24 * 3600, idle_poll=5.0):
+        self.collection = collection
+        self.process = process
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.retention = retention
+        self.idle_poll = idle_poll
+        self._wakeup = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Create indexes and start the worker threads, once per process."""
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self.collection.create_index([("status", 1), ("created_at", 1)])
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f"questionnaire-job-{i}", daemon=True).start()
+            self._started = True
+
+    def submit(self, username, data):
+        """Queue a questionnaire and return its job id."""
+        self.ensure_started()
+        now = datetime.now(timezone.utc)
+        result = self.collection.insert_one({
+            "username": username,
+            "data": data,
+            "status": "queued",
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now
+        })
+        self._wakeup.set()
+        return str(result.inserted_id)
+
+    def get(self, job_id, username):
+        """Return the job document if it exists and belongs to `username`, else None."""
+        try:
+            job_obj_id = ObjectId(job_id)
+        except Exception:
+            return None
+        return self.collection.find_one({"_id": job_obj_id, "username": username}, {"data": 0})
+
+    @staticmethod
+    def queued(job_id):
+        """The 202 payload for a newly queued job."""
+        return {
+            "message": "Questionnaire queued.",
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/questionnaire_jobs/{job_id}",
+            "result_url": f"/questionnaire_jobs/{job_id}/result"
+        }
+
+    @staticmethod
+    def status_response(job_id, job):
+        """(payload, status_code) for GET /questionnaire_jobs/<job_id>."""
+        if not job:
+            return {"error": "Job not found"}, 404
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "attempts": job.get("attempts", 0),
+            "created_at": job["created_at"],
+            "finished_at": job.get("finished_at")
+        }, 200
+
+    @staticmethod
+    def result_response(job_id, job):
+        """(payload, status_code) for GET /questionnaire_jobs/<job_id>/result: 202 until it finished."""
+        if not job:
+            return {"error": "Job not found"}, 404
+        if job["status"] in ("queued", "running"):
+            return {"job_id": job_id, "status": job["status"]}, 202
+        return job["result"], (200 if job["status"] == "done" else job.get("status_code", 500))
+
+    def _claim(self):
+        now = datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_until": {"$lt": now}}
+            ]},
+            {
+                "$set": {
+                    "status": "running",
+                    "started_at": now,
+                    "updated_at": now,
+                    "lease_until": now + timedelta(seconds=self.lease_seconds)
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"❗ Questionnaire job claim failed: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.idle_poll)
+                self._wakeup.clear()
+                continue
+
+            try:
+                payload, status_code = self.process(job["data"])
+            except Exception as e:
+                payload, status_code = {"error": str(e)}, 500
+
+            now = datetime.now(timezone.utc)
+            # Only while this claim holds the job: after the lease expired another worker
+            # may have claimed it again (bumping attempts), and its result wins
+            result = self.collection.update_one(
+                {"_id": job["_id"], "status": "running", "attempts": job["attempts"]},
+                {"$set": {
+                    "status": "done" if status_code < 400 else "failed",
+                    "result": payload,
+                    "status_code": status_code,
+                    "finished_at": now,
+                    "updated_at": now,
+                    "expires_at": now + timedelta(seconds=self.retention)
+                }}
+            )
+            if result.matched_count == 0:
+                print(f"❗ Questionnaire job {job['_id']} was claimed again after its lease expired, result dropped")
@@ -0,0 +1,150 @@
+"""Version-stamped response caching and conditional GET for read-mostly routes.
+
+Each cached collection has a version number in `collection_versions`, bumped by the code
+that writes to it. A cached response is keyed by the request path and the versions of the
+collections it reads, so a bump invalidates it in every worker within `check_interval`.
+
+After editing a collection outside the backend (e.g. re-importing questions), bump it:
+    python response_cache.py --bump questions underrated
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import os
+import threading
+import time
+
+from flask import Response, make_response, request
+from pymongo import ReturnDocument
+
+from cache import TTLCache
+
+
+class CollectionVersions:
+    """Per-collection version counters stored in Mongo, read at most every `check_interval` seconds."""
+
+    def __init__(self, collection, check_interval=2.0):
+        self.collection = collection
+        self.check_interval = check_interval
+        self._local = {}  # name -> (version, checked_at)
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        version, checked_at = self._local.get(name, (None, 0))
+        if time.time() - checked_at > self.check_interval:
+            doc = self.collection.find_one({"_id": name})
+            self._set(name, doc["version"] if doc else 0)
+            version = self._local[name][0]
+        return version
+
+    def bump(self, name):
+        doc = self.collection.find_one_and_update(
+            {"_id": name}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self._set(name, doc["version"])
+        return doc["version"]
+
+    def on_change(self, name, callback):
+        """Call `callback()` whenever `name`'s version is seen to change (bumped here or elsewhere)."""
+        self._listeners.setdefault(name, []).append(callback)
+        self.get(name)  # baseline, so the first change seen afterwards fires
+
+    def _set(self, name, version):
+        with self._lock:
+            previous = self._local.get(name, (None, 0))[0]
+            self._local[name] = (version, time.time())
+        if previous is not None and previous != version:
+            for callback in self._listeners.get(name, []):
+                callback()
+
+    def stamp(self, names):
+        return ",".join(f"{name}:{self.get(name)}" for name in names) or "static"
+
+
+class ResponseCache:
+    """In-process cache of successful GET responses with ETag / If-None-Match support.
+
+    Entries also expire after `ttl` seconds, which bounds staleness after writes that did
+    not bump a version. ETags are "<version stamp>-<body hash>".
+    """
+
+    def __init__(self, versions, maxsize=256, ttl=300):
+        self.versions = versions
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.not_modified = 0
+
+    def cached(self, *collections):
+        """Decorator for a view whose response depends only on its URL and `collections`."""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                stamp = self.versions.stamp(collections)
+                key = (request.full_path, stamp)
+                entry = self._cache.get(key)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    entry = self._store(key, stamp, response.get_data(), response.mimetype)
+                return self._conditional(self._response(Response, entry).make_conditional(request))
+            return wrapper
+        return decorator
+
+    def _store(self, key, stamp, body, mimetype):
+        entry = (body, mimetype, f"{stamp}-{hashlib.sha1(body).hexdigest()[:12]}")
+        self._cache.set(key, entry)
+        return entry
+
+    @staticmethod
+    def _response(response_class, entry):
+        body, mimetype, etag = entry
+        response = response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"  # clients revalidate every time
+        return response
+
+    def _conditional(self, response):
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
+
+    def get_stats(self):
+        return dict(self._cache.get_stats(), not_modified=self.not_modified)
+
+
+class AsyncResponseCache(ResponseCache):
+    """ResponseCache for Quart views; the version stamp, which may read Mongo, is taken off the loop."""
+
+    def cached(self, *collections):
+        from quart import Response, make_response, request  # only the asyncio backend needs Quart
+
+        def decorator(view):
+            @functools.wraps(view)
+            async def wrapper(*args, **kwargs):
+                stamp = await asyncio.to_thread(self.versions.stamp, collections)
+                key = (request.full_path, stamp)
+                entry = self._cache.get(key)
+                if entry is None:
+                    response = await make_response(await view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    entry = self._store(key, stamp, await response.get_data(), response.mimetype)
+                return self._conditional(await self._response(Response, entry).make_conditional(request))
+            return wrapper
+        return decorator
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Bump collection versions so cached responses are rebuilt.")
+    arg_parser.add_argument("--bump", nargs="+", required=True, metavar="COLLECTION")
+    arg_parser.add_argument("--mongo-uri", default=None, help="defaults to MONGO_URI from the environment/.env")
+    args = arg_parser.parse_args()
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    load_dotenv()
+    versions = CollectionVersions(MongoClient(args.mongo_uri or os.getenv("MONGO_URI")).travel_bot.collection_versions)
+    for name in args.bump:
+        print(f"{name}: version {versions.bump(name)}")
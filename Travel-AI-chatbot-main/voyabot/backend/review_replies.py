@@ -0,0 +1,213 @@
+"""Review replies stored outside the review document, in per-review buckets.
+
+Each bucket document holds up to `bucket_size` replies of one review:
+    {review_id, count, replies: [{reply_id, username, reply_text, timestamp}]}
+so a busy review never grows its own document and /get_reviews never reads reply bodies.
+
+Replies still embedded in reviews are moved by the 0001_review_replies_buckets migration
+(see migrations.py), or on demand from the backend directory:
+    python review_replies.py --migrate
+Run the migration from one process only: it takes no lock, and two runs interleaving
+on the same review leave its replies in two sets of buckets.
+"""
+import argparse
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+LEGACY_TIMESTAMP_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+
+class ReviewReplies:
+    def __init__(self, collection, bucket_size=50):
+        self.collection = collection
+        self.bucket_size = bucket_size
+
+    def ensure_indexes(self):
+        self.collection.create_index([("review_id", ASCENDING), ("count", ASCENDING)])
+        self.collection.create_index([("review_id", ASCENDING), ("replies.reply_id", ASCENDING)])
+
+    def add(self, review_id, username, reply_text):
+        """Append a reply to the review's open bucket (a new bucket is upserted when all are full).
+
+        Known limit: the upsert filter has no unique key, so concurrent adds that all find
+        the buckets full each upsert a new one, and those part-filled buckets are never
+        merged. Later adds fill them up and reads sort by reply_id across buckets, so this
+        only costs a few extra documents on a busy review, not lost or misordered replies.
+        """
+        reply = self._new_reply(username, reply_text)
+        self.collection.update_one(*self._add_update(review_id, reply), upsert=True)
+        return reply
+
+    def delete(self, review_id, reply_id, username):
+        """Remove one reply written by `username` in a single atomic update. Returns True if removed."""
+        result = self.collection.update_one(*self._delete_update(review_id, reply_id, username))
+        return result.modified_count == 1
+
+    def page(self, review_id, limit=20, after=None):
+        """Replies of one review, oldest first: (replies, next_cursor) where the cursor is a reply_id."""
+        replies = list(self.collection.aggregate(self._pipeline([review_id], after, limit + 1)))
+        return self._paginate(replies, limit)
+
+    def first_pages(self, review_ids, limit=20):
+        """{review_id: first `limit` replies} for a page of reviews, in one query."""
+        return self._group(review_ids, self.collection.aggregate(self._first_pages_pipeline(review_ids, limit)))
+
+    def _new_reply(self, username, reply_text):
+        return {
+            "reply_id": ObjectId(),
+            "username": username,
+            "reply_text": reply_text,
+            "timestamp": datetime.now(timezone.utc)
+        }
+
+    def _add_update(self, review_id, reply):
+        return (
+            # Never into a migrated bucket: a re-run of migrate() replaces those
+            {"review_id": review_id, "count": {"$lt": self.bucket_size}, "migrated": {"$ne": True}},
+            {"$push": {"replies": reply}, "$inc": {"count": 1}}
+        )
+
+    def _delete_update(self, review_id, reply_id, username):
+        return (
+            {"review_id": review_id, "replies": {"$elemMatch": {"reply_id": reply_id, "username": username}}},
+            {"$pull": {"replies": {"reply_id": reply_id}}, "$inc": {"count": -1}}
+        )
+
+    def _pipeline(self, review_ids, after=None, limit=None):
+        pipeline = [{"$match": {"review_id": {"$in": list(review_ids)}}}, {"$unwind": "$replies"}]
+        if after is not None:
+            pipeline.append({"$match": {"replies.reply_id": {"$gt": after}}})
+        # reply_ids are ObjectIds, so they order by creation time across buckets
+        pipeline.append({"$sort": {"replies.reply_id": ASCENDING}})
+        if limit is not None:
+            pipeline.append({"$limit": limit})
+        pipeline.append({"$project": {
+            "_id": 0,
+            "review_id": 1,
+            "reply_id": "$replies.reply_id",
+            "username": "$replies.username",
+            "reply_text": "$replies.reply_text",
+            "timestamp": "$replies.timestamp"
+        }})
+        return pipeline
+
+    @staticmethod
+    def _first_pages_pipeline(review_ids, limit):
+        # Cut each review's thread to `limit` on the server, so a busy review does not
+        # ship its whole reply history when only the first page is shown
+        return [
+            {"$match": {"review_id": {"$in": list(review_ids)}}},
+            {"$unwind": "$replies"},
+            {"$sort": {"review_id": ASCENDING, "replies.reply_id": ASCENDING}},
+            {"$group": {"_id": "$review_id", "replies": {"$push": "$replies"}}},
+            {"$project": {"replies": {"$slice": ["$replies", limit]}}}
+        ]
+
+    @staticmethod
+    def _paginate(replies, limit):
+        for reply in replies:
+            del reply["review_id"]
+        next_cursor = str(replies[limit - 1]["reply_id"]) if len(replies) > limit else None
+        return replies[:limit], next_cursor
+
+    @staticmethod
+    def _group(review_ids, threads):
+        pages = {review_id: [] for review_id in review_ids}
+        for thread in threads:
+            pages[thread["_id"]] = thread["replies"]
+        return pages
+
+    @staticmethod
+    def _reply_id_at(timestamp):
+        """A new, unique reply_id whose time part is `timestamp`, so replies keep ordering by time.
+
+        The 4-byte time is replaced and the rest (per-process random + increasing counter)
+        kept, so ids in the same second stay unique and follow creation order.
+        """
+        return ObjectId(ObjectId.from_datetime(timestamp).binary[:4] + ObjectId().binary[4:])
+
+    def migrate(self, reviews_collection):
+        """Move replies embedded in review documents into buckets. Safe to re-run.
+
+        Buckets from an interrupted earlier run for the same review are replaced, and the
+        embedded array is only removed if it did not change while being copied. Replies
+        added since then are kept: add() never writes into a migrated bucket.
+        """
+        migrated_reviews = migrated_replies = 0
+        for review in reviews_collection.find({"replies": {"$exists": True}}, {"replies": 1}):
+            embedded = review.get("replies") or []
+            replies = []
+            # Replies without a usable timestamp sort right after the previous one
+            last_time = review["_id"].generation_time
+            for reply in embedded:
+                if not reply:
+                    continue  # nulls left behind by the old $unset-then-$pull delete
+                timestamp = reply.get("timestamp")
+                if isinstance(timestamp, str):
+                    try:
+                        timestamp = datetime.strptime(timestamp, LEGACY_TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+                    except ValueError:
+                        timestamp = None
+                if isinstance(timestamp, datetime):
+                    last_time = timestamp
+                replies.append({
+                    "reply_id": self._reply_id_at(last_time),
+                    "username": reply.get("username"),
+                    "reply_text": reply.get("reply_text", ""),
+                    "timestamp": timestamp
+                })
+
+            self.collection.delete_many({"review_id": review["_id"], "migrated": True})
+            buckets = [
+                {"review_id": review["_id"], "count": len(chunk), "replies": chunk, "migrated": True}
+                for chunk in (replies[i:i + self.bucket_size] for i in range(0, len(replies), self.bucket_size))
+            ]
+            if buckets:
+                self.collection.insert_many(buckets)
+            result = reviews_collection.update_one(
+                {"_id": review["_id"], "replies": embedded},
+                {"$unset": {"replies": ""}, "$inc": {"reply_count": len(replies)}}
+            )
+            if result.modified_count == 1:
+                migrated_reviews += 1
+                migrated_replies += len(replies)
+            else:
+                print(f"❗ Review {review['_id']} changed during migration, re-run to retry it")
+        return migrated_reviews, migrated_replies
+
+
+class AsyncReviewReplies(ReviewReplies):
+    """ReviewReplies on an asyncio driver collection (Motor): same documents, awaitable methods."""
+
+    async def add(self, review_id, username, reply_text):
+        reply = self._new_reply(username, reply_text)
+        await self.collection.update_one(*self._add_update(review_id, reply), upsert=True)
+        return reply
+
+    async def delete(self, review_id, reply_id, username):
+        result = await self.collection.update_one(*self._delete_update(review_id, reply_id, username))
+        return result.modified_count == 1
+
+    async def page(self, review_id, limit=20, after=None):
+        replies = await self.collection.aggregate(self._pipeline([review_id], after, limit + 1)).to_list(None)
+        return self._paginate(replies, limit)
+
+    async def first_pages(self, review_ids, limit=20):
+        threads = await self.collection.aggregate(self._first_pages_pipeline(review_ids, limit)).to_list(None)
+        return self._group(review_ids, threads)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Manage bucketed review replies.")
+    arg_parser.add_argument("--migrate", action="store_true", help="move embedded replies into review_replies")
+    args = arg_parser.parse_args()
+
+    from voyabot import reviews_collection, review_replies
+    if args.migrate:
+        review_replies.ensure_indexes()
+        reviews, replies = review_replies.migrate(reviews_collection)
+        print(f"✅ Migrated {replies} replies from {reviews} reviews")
+    else:
+        arg_parser.print_help()
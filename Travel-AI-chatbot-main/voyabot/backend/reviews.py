@@ -0,0 +1,275 @@
+"""Review pages, reactions and replies, shared by voyabot.py and voyabot_async.py.
+
+Reviews are paged newest first on (timestamp, _id); the migrations index serves the sort
+and the cursor. Replies live in per-review buckets (review_replies.py) and the review
+only keeps `reply_count`. Each method takes the request's arguments or JSON body and
+returns the response payload; a request the route should turn down raises InvalidRequest.
+"""
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import DESCENDING, ReturnDocument
+
+TRUTHY = ("1", "true", "yes")
+
+
+class InvalidRequest(Exception):
+    """Answered with {"error": message} and `status` instead of a 500."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def review_cursor(review):
+    """Opaque keyset cursor for a review: "<timestamp ms>_<_id>"."""
+    timestamp = review["timestamp"]
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return f"{int(timestamp.timestamp() * 1000)}_{review['_id']}"
+
+
+def parse_review_cursor(cursor):
+    millis, _, review_id = cursor.partition("_")
+    return datetime.fromtimestamp(int(millis) / 1000, timezone.utc), ObjectId(review_id)
+
+
+def parse_object_id(value, message):
+    try:
+        return value if isinstance(value, ObjectId) else ObjectId(value)
+    except Exception:
+        raise InvalidRequest(message) from None
+
+
+class Reviews:
+    """The /get_reviews, /like_dislike_review, /reply_review, ... logic over pymongo collections.
+
+    `replies` is the ReviewReplies store; `counters`, an optional CounterBuffer, makes
+    likes/dislikes write-coalesced (and approximate until its next flush).
+    """
+
+    def __init__(self, collection, replies, counters=None, page_size=20, max_page_size=100, replies_page_size=20):
+        self.collection = collection
+        self.replies = replies
+        self.counters = counters
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.replies_page_size = replies_page_size
+
+    def page(self, args):
+        """One page of reviews, newest first.
+
+        `args`: `limit` (default page_size), `before` (the `next_cursor` of the previous page)
+        and `include_replies` (attaches the first replies_page_size replies of each review;
+        every review carries `reply_count`).
+        """
+        pipeline, limit = self._page_query(args)
+        reviews, next_cursor = self._paginate(list(self.collection.aggregate(pipeline)), limit)
+        if args.get("include_replies", "").lower() in TRUTHY:
+            self._attach(reviews, self.replies.first_pages([review["_id"] for review in reviews], self.replies_page_size))
+        if self.counters:
+            # Include likes/dislikes that are still buffered
+            counts = self.counters.counts_many([review["_id"] for review in reviews])
+            for review in reviews:
+                review.update(counts.get(review["_id"], {}))
+        return {"reviews": reviews, "next_cursor": next_cursor}
+
+    def count(self):
+        # Collection metadata, not a scan
+        return {"count": self.collection.estimated_document_count()}
+
+    def submit(self, username, data):
+        self.collection.insert_one(self._new_review(username, data))
+        return {"message": "Review submitted successfully!"}
+
+    def react(self, data):
+        review_id, action, field = self._reaction(data)
+        if self.counters:
+            counts = self.counters.increment(review_id, field)
+        else:
+            counts = self.collection.find_one_and_update(
+                {"_id": review_id}, {"$inc": {field: 1}}, return_document=ReturnDocument.AFTER
+            )
+        return self._reacted(review_id, action, counts)
+
+    def reply(self, username, data):
+        review_id, reply_text = self._reply_request(data)
+        if self.collection.find_one({"_id": review_id}, {"_id": 1}) is None:
+            raise InvalidRequest("Review not found or not updated", 404)
+        # Count the reply only once it is stored, so a failed insert does not inflate reply_count
+        reply = self.replies.add(review_id, username, reply_text)
+        self.collection.update_one({"_id": review_id}, {"$inc": {"reply_count": 1}})
+        return {"message": "Reply added successfully", "reply": reply}
+
+    def replies_page(self, review_id, args):
+        """Replies of one review, oldest first; `after` is the `next_cursor` of the previous page."""
+        review_id, limit, after = self._replies_query(review_id, args)
+        replies, next_cursor = self.replies.page(review_id, limit, after)
+        return {"replies": replies, "next_cursor": next_cursor}
+
+    def delete_reply(self, username, data):
+        review_id, reply_id = self._delete_request(data)
+        # One atomic $pull by reply_id, restricted to the reply's author
+        if not self.replies.delete(review_id, reply_id, username):
+            raise InvalidRequest("Reply not found or not deleted", 404)
+        self.collection.update_one({"_id": review_id}, {"$inc": {"reply_count": -1}})
+        return {"message": "Reply deleted successfully"}
+
+    def _limit(self, args, default):
+        try:
+            return min(max(int(args.get("limit", default)), 1), self.max_page_size)
+        except ValueError:
+            raise InvalidRequest("limit must be an integer") from None
+
+    def _page_query(self, args):
+        limit = self._limit(args, self.page_size)
+        match = {}
+        before = args.get("before")
+        if before:
+            try:
+                before_ts, before_id = parse_review_cursor(before)
+            except Exception:
+                raise InvalidRequest("Invalid cursor") from None
+            match = {"$or": [
+                {"timestamp": {"$lt": before_ts}},
+                {"timestamp": before_ts, "_id": {"$lt": before_id}}
+            ]}
+
+        projection = {
+            "username": 1,
+            "review_text": 1,
+            "timestamp": 1,
+            "likes": 1,
+            "dislikes": 1,
+            # Reviews not migrated yet still count their embedded array
+            "reply_count": {"$ifNull": ["$reply_count", {"$size": {"$ifNull": ["$replies", []]}}]}
+        }
+        # One extra document tells us whether there is a next page
+        return [
+            {"$match": match},
+            {"$sort": {"timestamp": DESCENDING, "_id": DESCENDING}},
+            {"$limit": limit + 1},
+            {"$project": projection}
+        ], limit
+
+    @staticmethod
+    def _paginate(reviews, limit):
+        next_cursor = review_cursor(reviews[limit - 1]) if len(reviews) > limit else None
+        return reviews[:limit], next_cursor
+
+    @staticmethod
+    def _attach(reviews, pages):
+        for review in reviews:
+            review["replies"] = pages[review["_id"]]
+
+    @staticmethod
+    def _new_review(username, data):
+        review_text = data.get("review_text")
+        if not review_text:
+            raise InvalidRequest("Review cannot be empty.")
+        return {
+            "username": username,
+            "review_text": review_text,
+            "timestamp": datetime.now(timezone.utc),
+            "likes": 0,
+            "dislikes": 0,
+            "reply_count": 0
+        }
+
+    @staticmethod
+    def _reaction(data):
+        """(review_id, action, counter field) of a like/dislike request."""
+        if not data:
+            raise InvalidRequest("No data provided")
+        action = data.get("action")  # 'like' or 'dislike'
+        if not data.get("review_id"):
+            raise InvalidRequest("Review ID is required")
+        if action not in ("like", "dislike"):
+            raise InvalidRequest("Invalid action. Must be 'like' or 'dislike'")
+        review_id = parse_object_id(data["review_id"], "Invalid review ID format")
+        return review_id, action, "likes" if action == "like" else "dislikes"
+
+    @staticmethod
+    def _reacted(review_id, action, counts):
+        if counts is None:
+            raise InvalidRequest("Review not found", 404)
+        return {
+            "message": f"Review {action}d successfully",
+            "review_id": review_id,
+            "likes": counts.get("likes", 0),
+            "dislikes": counts.get("dislikes", 0)
+        }
+
+    @staticmethod
+    def _reply_request(data):
+        if not data:
+            raise InvalidRequest("No data provided")
+        reply_text = data.get("reply_text")
+        if not data.get("review_id"):
+            raise InvalidRequest("Review ID is required")
+        if not reply_text or not reply_text.strip():
+            raise InvalidRequest("Reply text cannot be empty")
+        return parse_object_id(data["review_id"], "Invalid review ID format"), reply_text.strip()
+
+    def _replies_query(self, review_id, args):
+        try:
+            review_id = ObjectId(review_id)
+            after = ObjectId(args["after"]) if args.get("after") else None
+        except Exception:
+            raise InvalidRequest("Invalid review ID or cursor") from None
+        return review_id, self._limit(args, self.replies_page_size), after
+
+    @staticmethod
+    def _delete_request(data):
+        data = data or {}
+        if not data.get("review_id") or not data.get("reply_id"):
+            raise InvalidRequest("review_id and reply_id are required")
+        try:
+            return ObjectId(data["review_id"]), ObjectId(data["reply_id"])
+        except Exception:
+            raise InvalidRequest("Invalid review or reply ID format") from None
+
+
+class AsyncReviews(Reviews):
+    """Reviews on Motor collections with an AsyncReviewReplies store; no counter buffer."""
+
+    async def page(self, args):
+        pipeline, limit = self._page_query(args)
+        reviews, next_cursor = self._paginate(await self.collection.aggregate(pipeline).to_list(None), limit)
+        if args.get("include_replies", "").lower() in TRUTHY:
+            self._attach(reviews, await self.replies.first_pages([review["_id"] for review in reviews], self.replies_page_size))
+        return {"reviews": reviews, "next_cursor": next_cursor}
+
+    async def count(self):
+        return {"count": await self.collection.estimated_document_count()}
+
+    async def submit(self, username, data):
+        await self.collection.insert_one(self._new_review(username, data))
+        return {"message": "Review submitted successfully!"}
+
+    async def react(self, data):
+        review_id, action, field = self._reaction(data)
+        counts = await self.collection.find_one_and_update(
+            {"_id": review_id}, {"$inc": {field: 1}}, return_document=ReturnDocument.AFTER
+        )
+        return self._reacted(review_id, action, counts)
+
+    async def reply(self, username, data):
+        review_id, reply_text = self._reply_request(data)
+        if await self.collection.find_one({"_id": review_id}, {"_id": 1}) is None:
+            raise InvalidRequest("Review not found or not updated", 404)
+        reply = await self.replies.add(review_id, username, reply_text)
+        await self.collection.update_one({"_id": review_id}, {"$inc": {"reply_count": 1}})
+        return {"message": "Reply added successfully", "reply": reply}
+
+    async def replies_page(self, review_id, args):
+        review_id, limit, after = self._replies_query(review_id, args)
+        replies, next_cursor = await self.replies.page(review_id, limit, after)
+        return {"replies": replies, "next_cursor": next_cursor}
+
+    async def delete_reply(self, username, data):
+        review_id, reply_id = self._delete_request(data)
+        if not await self.replies.delete(review_id, reply_id, username):
+            raise InvalidRequest("Reply not found or not deleted", 404)
+        await self.collection.update_one({"_id": review_id}, {"$inc": {"reply_count": -1}})
+        return {"message": "Reply deleted successfully"}
@@ -0,0 +1,151 @@
+"""Production server settings for the backend, one preset per worker model.
+
+Used as a gunicorn config file (run from this directory):
+    SERVER_MODE=threaded gunicorn -c server_config.py wsgi:app
+
+SERVER_MODE picks the worker model:
+  threaded  a few processes with many threads each (gthread). Request threads mostly
+            wait on Amadeus/Gemini, so this is the default.
+  process   one single-threaded process per request (sync workers). Strongest isolation,
+            but every slow upstream call holds a whole process, and an SSE chat stream
+            holds it for the whole reply.
+  gevent    green threads (needs `pip install gevent`). Thousands of connections per
+            process; Gemini is switched to its REST transport, because gRPC does not
+            yield to the gevent hub.
+
+Each preset also sizes the backend's pools for that model (HTTP keep-alive pool per
+upstream host, Mongo connections, chat/hotel/questionnaire executors, bcrypt processes).
+They are defaults only: anything already set in the environment or .env wins. Print the
+resolved settings with:
+    python server_config.py --mode gevent
+"""
+import argparse
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CPUS = multiprocessing.cpu_count()
+
+
+def _threaded():
+    threads = int(os.getenv("SERVER_THREADS", 32))
+    return {
+        "server": {"worker_class": "gthread", "workers": int(os.getenv("WEB_CONCURRENCY", 2)), "threads": threads},
+        # Every request thread can hold an upstream and a Mongo connection at once; the
+        # extra Mongo connections are for the background threads (warmer, job queue, ...)
+        "pools": {
+            "UPSTREAM_POOL_SIZE": threads,
+            "MONGO_MAX_POOL_SIZE": threads + 16,
+            "CHAT_WORKERS": threads,
+            "HOTEL_MAX_CONCURRENCY": 8,
+            "HOTEL_WORKERS": threads,
+            "QUESTIONNAIRE_WORKERS": 16,
+            "PASSWORD_HASH_WORKERS": 2,
+        },
+    }
+
+
+def _process():
+    return {
+        "server": {"worker_class": "sync", "workers": int(os.getenv("WEB_CONCURRENCY", CPUS * 2 + 1)), "threads": 1},
+        # One request at a time per process: small pools, or idle connections pile up per worker
+        "pools": {
+            "UPSTREAM_POOL_SIZE": 4,
+            "MONGO_MAX_POOL_SIZE": 10,
+            "CHAT_WORKERS": 2,
+            "HOTEL_MAX_CONCURRENCY": 4,
+            "HOTEL_WORKERS": 4,
+            "QUESTIONNAIRE_WORKERS": 4,
+            "PASSWORD_HASH_WORKERS": 1,
+        },
+    }
+
+
+def _gevent():
+    connections = int(os.getenv("SERVER_WORKER_CONNECTIONS", 1000))
+    return {
+        "server": {"worker_class": "gevent", "workers": int(os.getenv("WEB_CONCURRENCY", CPUS)), "threads": 1,
+                   "worker_connections": connections},
+        # Executor threads are greenlets here, so they are cheap; the real limits are
+        # upstream rate limits and the Mongo server, not the process
+        "pools": {
+            "UPSTREAM_POOL_SIZE": 100,
+            "MONGO_MAX_POOL_SIZE": 100,
+            "CHAT_WORKERS": 128,
+            "HOTEL_MAX_CONCURRENCY": 16,
+            "HOTEL_WORKERS": 100,
+            "QUESTIONNAIRE_WORKERS": 64,
+            "PASSWORD_HASH_WORKERS": 2,
+            "GEMINI_TRANSPORT": "rest",
+        },
+    }
+
+
+MODES = {"threaded": _threaded, "process": _process, "gevent": _gevent}
+
+
+def settings(mode=None):
+    """Return {"mode", "server", "pools"} for `mode` (default: SERVER_MODE, then "threaded")."""
+    mode = mode or os.getenv("SERVER_MODE", "threaded")
+    if mode not in MODES:
+        raise ValueError(f"Unknown SERVER_MODE {mode!r}, expected one of {', '.join(MODES)}")
+    return dict(MODES[mode](), mode=mode)
+
+
+def apply_pool_defaults(mode=None):
+    """Export `mode`'s pool sizes as environment defaults; must run before voyabot is imported."""
+    resolved = settings(mode)
+    os.environ["SERVER_MODE"] = resolved["mode"]
+    for name, value in resolved["pools"].items():
+        os.environ.setdefault(name, str(value))
+    return resolved["mode"]
+
+
+def run_dev_server(app, password_hasher):
+    """Serve `app` with its framework's development server, for `python voyabot.py` and
+    `python voyabot_async.py`; production runs under gunicorn or hypercorn instead.
+
+    Run as a script the backend module is __main__, which forkserver/spawn workers re-import
+    (the whole app, per worker), so the dev server's bcrypt pool forks instead.
+    """
+    password_hasher.start_method = "fork"
+    app.run(
+        debug=os.getenv("FLASK_DEBUG", "false").lower() == "true",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", 5001))
+    )
+
+
+# gunicorn settings (read when this file is passed with -c); the pool defaults are
+# applied by wsgi.load_app in each worker
+_resolved = settings()
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 5001)}"
+worker_class = _resolved["server"]["worker_class"]
+workers = _resolved["server"]["workers"]
+threads = _resolved["server"]["threads"]
+worker_connections = _resolved["server"].get("worker_connections", 1000)
+# Gemini long-form generations can take QUESTIONNAIRE_DEADLINE (45s) and more
+timeout = int(os.getenv("SERVER_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("SERVER_KEEPALIVE", 5))
+# Not preloaded: wsgi.load_app starts the background threads and voyabot opens its Mongo
+# client at import, which must happen in each worker, not in the master before fork
+preload_app = False
+accesslog = os.getenv("SERVER_ACCESS_LOG", "-") or None  # empty disables it
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Show the server and pool settings for a worker model.")
+    arg_parser.add_argument("--mode", choices=sorted(MODES), default=None)
+    args = arg_parser.parse_args()
+
+    resolved = settings(args.mode)
+    print(f"mode: {resolved['mode']}")
+    for name, value in resolved["server"].items():
+        print(f"  {name}: {value}")
+    for name, value in resolved["pools"].items():
+        print(f"  {name}: {os.getenv(name, value)}")
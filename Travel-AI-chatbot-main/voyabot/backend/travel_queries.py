@@ -0,0 +1,157 @@
+"""Request parsing shared by voyabot.py and voyabot_async.py: chat slots, Amadeus query
+parameters and questionnaire prompts and results."""
+import re
+
+from date_extractor import extract_dates
+from model_router import AllModelsFailed
+
+
+def extract_flight_details(user_message, cities):
+    """{"origin", "destination", "date"} from a message and its matched cities, or None."""
+    origin, destination = None, None
+
+    # Cities in the order they appear in the message: first is origin, next distinct one is destination
+    for match in cities:
+        if not origin:
+            origin = match.code
+        elif match.code != origin:
+            destination = match.code
+            break
+
+    if not origin or not destination:
+        return None
+
+    # First date mentioned is the departure ("12 March", "next friday", "12-15 Mar", ...)
+    dates_found = extract_dates(user_message)
+    if not dates_found:
+        print("❗ Departure date not found")
+        return None
+
+    return {"origin": origin, "destination": destination, "date": dates_found[0]}
+
+
+def extract_hotel_details(user_message, cities, adults=None):
+    """{"city_code", "check_in", "check_out", "adults"} from a message and its matched cities, or None."""
+    if not cities:
+        return None
+    city_code = cities[0].code
+
+    # Extract dates (distinct, so a date repeated for a flight is not read as the check-out)
+    dates_found = list(dict.fromkeys(extract_dates(user_message)))
+    check_in = dates_found[0] if len(dates_found) > 0 else None
+    check_out = dates_found[1] if len(dates_found) > 1 else None
+
+    # Default adults if not found
+    if adults is None:
+        adults = extract_number(user_message, "guests") or 2
+
+    if not check_in or not check_out:
+        print("❗ Check-in/check-out date not found")
+        return None
+
+    return {
+        "city_code": city_code,
+        "check_in": check_in,
+        "check_out": check_out,
+        "adults": adults
+    }
+
+
+def extract_number(user_message, field):
+    """Extracts a number (like guests) from user input."""
+    match = re.search(r"(\d+)\s*" + field, user_message, re.IGNORECASE)
+    if match:
+        try:
+            return int(match.group(1))
+        except ValueError:
+            print(f"Invalid number format in: {user_message}")
+            return None
+    print(f"No valid number found for {field} in: {user_message}")
+    return None
+
+
+def flight_offers_params(origin, destination, departure_date, adults=1, currency="INR"):
+    return {
+        "originLocationCode": origin,
+        "destinationLocationCode": destination,
+        "departureDate": departure_date,
+        "adults": adults,
+        "currencyCode": currency,
+        "max": 5
+    }
+
+
+def hotel_list_params(city_code):
+    return {"cityCode": city_code, "radius": 5, "radiusUnit": "KM"}
+
+
+def hotel_offers_params(hotel_ids, check_in, check_out, adults=2):
+    return {
+        "hotelIds": ",".join(hotel_ids),
+        "checkInDate": check_in,
+        "checkOutDate": check_out,
+        "adults": adults,
+        # Get best price per hotel. A string, as Amadeus expects it: requests sends True as "True"
+        "bestRateOnly": "true"
+    }
+
+
+def flight_cache_key(origin, destination, departure_date, adults=1, currency="INR"):
+    """Flight cache key, which is also the search_flights arguments."""
+    return origin.upper(), destination.upper(), departure_date, int(adults), currency.upper()
+
+
+def flight_cache_entry(offers):
+    """The flight cache entry for an Amadeus response, or None if it has no offers.
+
+    The AI summary is stored on the entry by the caller, so a cache hit can skip the AI
+    call too; a background refresh replaces the entry and therefore drops the old summary.
+    """
+    if not offers or "data" not in offers:
+        return None
+    return {"offers": offers, "summary": None}
+
+
+def questionnaire_prompts(data):
+    """The independent generations for a questionnaire: recommendation and, if needed, assistance."""
+    prompts = {
+        "recommendation": f"Based on the following user preferences: {data}, generate a personalized travel recommendation. Suggest at least three travel destinations in India that match the user's interests, preferred activities, and travel style. Provide a brief description of each place, highlighting why it would be a great choice. Also, include any relevant travel tips or must-visit attractions for each destination."
+    }
+    # Check for additional assistance needs
+    special_requirements = data.get("special_requirements", [])
+    if any(req in special_requirements for req in ["pet assistance", "medical conditions", "child care"]):
+        prompts["assistance"] = f"User needs assistance for: {special_requirements}\nProvide suitable travel solutions."
+    return prompts
+
+
+def questionnaire_response(generations):
+    """(payload, status_code) once the questionnaire deadline passed.
+
+    `generations` maps each prompt name to its future or asyncio task; unfinished ones are
+    reported as timed out and cancelled. Cancelling stops an asyncio task, but a future
+    whose generation already runs keeps running in its thread, and its result is dropped.
+    If some fail while others succeed, the payload is marked partial and lists the missing parts.
+    """
+    results, errors = {}, {}
+    for name, generation in generations.items():
+        if not generation.done():
+            generation.cancel()
+            errors[name] = "AI model timed out."
+        elif isinstance(generation.exception(), AllModelsFailed):
+            errors[name] = "AI model failed. Please try again later."
+        elif generation.exception() is not None:
+            errors[name] = f"Gemini API error: {str(generation.exception())}"
+        else:
+            results[name] = generation.result()
+
+    if not results:
+        timed_out = all(error == "AI model timed out." for error in errors.values())
+        return {"error": errors.get("recommendation") or next(iter(errors.values()))}, (504 if timed_out else 500)
+
+    # Prepare response payload
+    payload = dict({"message": "Questionnaire submitted successfully!"}, **results)
+    if errors:
+        payload["partial"] = True
+        payload["missing"] = errors
+    return payload, 201
+
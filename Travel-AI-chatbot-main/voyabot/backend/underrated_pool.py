@@ -0,0 +1,130 @@
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+from model_router import AllModelsFailed
+
+PLACEHOLDER_IMAGE = "https://via.placeholder.com/400x300?text=No+Image"
+
+# Fields the Underrated Places page shows (plus _id, needed to persist AI details)
+PLACE_FIELDS = [
+    "Phase Name", "Location", "Category", "image_url", "ai_details",
+    "Travel Budget", "Best Transportation", "Recommended Hotels",
+]
+
+
+def description_prompt(place):
+    return f"Provide detailed travel information about {place['Phase Name']} located in {place['Location']}. Include its cultural importance, best travel time, local experiences, and food options."
+
+
+def description_fields(text, model):
+    """The fields stored on a place once its description was generated."""
+    return {"ai_details": text, "ai_model": model, "ai_generated_at": datetime.now(timezone.utc)}
+
+
+def description_error(error):
+    """ai_details shown when generating failed; not stored, so the place is described again later."""
+    return "AI model failed to provide details." if isinstance(error, AllModelsFailed) else "AI data unavailable."
+
+
+def sample_places(collection, size=3, fields=PLACE_FIELDS):
+    """`size` distinct random places picked by the server with $sample, projected to `fields`.
+
+    $sample can return the same document twice on large collections, so a couple of
+    extra documents are sampled and duplicates dropped.
+    """
+    return distinct_places(collection.aggregate(sample_pipeline(size, fields)), size)
+
+
+def sample_pipeline(size=3, fields=PLACE_FIELDS):
+    return [
+        {"$sample": {"size": size + 2}},
+        {"$project": {field: 1 for field in fields}}
+    ]
+
+
+def distinct_places(docs, size=3):
+    places = {}
+    for place in docs:
+        places.setdefault(place["_id"], place)
+    return list(places.values())[:size]
+
+
+def ready_to_serve(places, enrich_place):
+    """Describe places that lack ai_details and shape them for the response (in place).
+
+    Returns False if a description could not be generated.
+    """
+    complete = True
+    for place in places:
+        if "ai_details" not in place and not enrich_place(place):
+            complete = False
+        shape_place(place)
+    return complete
+
+
+def shape_place(place):
+    place.pop("_id", None)
+    place.setdefault("image_url", PLACEHOLDER_IMAGE)
+
+
+class PrefetchPool:
+    """Ready-to-serve random trios of enriched places, refilled by a background thread.
+
+    `take()` pops a trio without touching Mongo or Gemini (None when the pool is empty,
+    so the caller falls back to building one inline). `invalidate()` drops everything,
+    e.g. after the catalogue changed.
+    """
+
+    def __init__(self, build, size=8):
+        self.build = build
+        self.size = size
+        self._ready = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._generation = 0
+        self._started = False
+        self.stats = {"hits": 0, "misses": 0, "built": 0, "build_errors": 0, "invalidations": 0}
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._fill, name="underrated-prefetch", daemon=True).start()
+
+    def take(self):
+        with self._lock:
+            trio = self._ready.popleft() if self._ready else None
+            self.stats["hits" if trio else "misses"] += 1
+        self._wakeup.set()
+        return trio
+
+    def invalidate(self):
+        with self._lock:
+            self._ready.clear()
+            self._generation += 1
+            self.stats["invalidations"] += 1
+        self._wakeup.set()
+
+    def _fill(self):
+        while True:
+            while len(self._ready) < self.size:
+                generation = self._generation
+                try:
+                    trio = self.build()
+                except Exception as e:
+                    print(f"❗ Underrated prefetch failed: {e}")
+                    self.stats["build_errors"] += 1
+                    break
+                if not trio:
+                    break  # empty catalogue or Gemini failing: retry after the next wakeup
+                with self._lock:
+                    # A trio built from before an invalidation is discarded
+                    if generation == self._generation:
+                        self._ready.append(trio)
+                        self.stats["built"] += 1
+            self._wakeup.wait(30)
+            self._wakeup.clear()
+
+    def get_stats(self):
+        return dict(self.stats, ready=len(self._ready), size=self.size)
@@ -0,0 +1,68 @@
+"""Fill and refresh AI descriptions for the underrated places collection.
+
+Usage (from the backend directory):
+    python underrated_warmer.py [--workers 4] [--max-age-days 30]
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+
+def places_needing_descriptions(collection, max_age_days=None):
+    """Places without ai_details, plus those generated more than `max_age_days` ago."""
+    query = [{"ai_details": {"$exists": False}}]
+    if max_age_days is not None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+        query.append({"ai_generated_at": {"$lt": cutoff}})
+    return list(collection.find({"$or": query}))
+
+
+def warm_descriptions(collection, enrich_place, workers=4, max_age_days=None):
+    """Run `enrich_place(place)` for every place that needs it, at most `workers` at a time."""
+    places = places_needing_descriptions(collection, max_age_days)
+    if not places:
+        return 0
+    print(f"Warming AI descriptions for {len(places)} underrated places...")
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="underrated-warm") as executor:
+        for place, result in zip(places, executor.map(lambda p: _safe_enrich(enrich_place, p), places)):
+            if result:
+                done += 1
+    print(f"✅ Warmed {done}/{len(places)} underrated place descriptions")
+    return done
+
+
+def _safe_enrich(enrich_place, place):
+    try:
+        return enrich_place(place)
+    except Exception as e:
+        print(f"❗ Could not describe {place.get('Phase Name')}: {e}")
+        return False
+
+
+def start_background_warmer(collection, enrich_place, workers=2, max_age_days=30, interval=3600):
+    """Warm once now and then every `interval` seconds in a daemon thread."""
+    def loop():
+        while True:
+            try:
+                warm_descriptions(collection, enrich_place, workers, max_age_days)
+            except Exception as e:
+                print(f"❗ Underrated warmer failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="underrated-warmer", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Pre-generate AI descriptions for underrated places.")
+    arg_parser.add_argument("--workers", type=int, default=4, help="concurrent Gemini calls")
+    arg_parser.add_argument("--max-age-days", type=float, default=None,
+                            help="also regenerate descriptions older than this")
+    args = arg_parser.parse_args()
+
+    from voyabot import underrated_collections, enrich_place
+    warm_descriptions(underrated_collections, enrich_place, args.workers, args.max_age_days)
@@ -0,0 +1,132 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+# Defaults, overridable via .env
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", 10))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", 20))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", 2))
+UPSTREAM_BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", 0.25))
+UPSTREAM_BACKOFF_CAP = float(os.getenv("UPSTREAM_BACKOFF_CAP", 2.0))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamClient:
+    """Shared keep-alive HTTP client for the Amadeus and LocationIQ APIs.
+
+    Each upstream host gets its own connection pool (its own HTTPAdapter), so a
+    burst of flight searches cannot starve geocoding calls. Every request has a
+    connect/read timeout and is retried a bounded number of times on connection
+    errors, timeouts and 429/5xx responses, with full-jitter exponential backoff.
+    """
+
+    def __init__(self, pool_size=UPSTREAM_POOL_SIZE, connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+                 read_timeout=UPSTREAM_READ_TIMEOUT, max_retries=UPSTREAM_MAX_RETRIES,
+                 backoff_base=UPSTREAM_BACKOFF_BASE, backoff_cap=UPSTREAM_BACKOFF_CAP):
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self._adapters = {}  # "scheme://host/" -> HTTPAdapter
+        self._counters = {}  # host -> request/retry/error counters
+
+    def _host_prefix(self, url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}/"
+
+    def _adapter_for(self, prefix):
+        adapter = self._adapters.get(prefix)
+        if adapter is None:
+            with self._lock:
+                adapter = self._adapters.get(prefix)
+                if adapter is None:
+                    # Retries are handled in request() so they can be counted and jittered
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    self.session.mount(prefix, adapter)
+                    self._adapters[prefix] = adapter
+                    self._counters[prefix] = {"requests": 0, "retries": 0, "errors": 0}
+        return adapter
+
+    def _backoff(self, attempt):
+        time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt))))
+
+    def request(self, method, url, retries=None, **kwargs):
+        """Send a request through the host's pool; raises requests exceptions like `requests.request`."""
+        prefix = self._host_prefix(url)
+        self._adapter_for(prefix)
+        counters = self._counters[prefix]
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.max_retries if retries is None else retries
+
+        attempt = 0
+        while True:
+            counters["requests"] += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= retries:
+                    counters["errors"] += 1
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    if response.status_code >= 400:
+                        counters["errors"] += 1
+                    return response
+                response.close()
+            counters["retries"] += 1
+            self._backoff(attempt)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """Per-host request counters plus connection-pool usage."""
+        report = {}
+        for prefix, adapter in list(self._adapters.items()):
+            pools = []
+            for pool in list(adapter.poolmanager.pools._container.values()):
+                if pool.pool is None:  # pool already closed
+                    continue
+                # The pool queue holds one slot per connection not currently checked out
+                pools.append({
+                    "host": pool.host,
+                    "maxsize": pool.pool.maxsize,
+                    "in_use": pool.pool.maxsize - pool.pool.qsize(),
+                    "connections_opened": pool.num_connections,
+                    "requests_sent": pool.num_requests,
+                })
+            report[prefix] = dict(self._counters[prefix], pools=pools)
+        return report
+
+
+# Process-wide client used by voyabot.py
+client = UpstreamClient()
+
+
+def get(url, **kwargs):
+    return client.get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return client.post(url, **kwargs)
+
+
+def stats():
+    return client.stats()
@@ -1,31 +1,57 @@
 # Backend
-from flask import Flask, request, jsonify
-from flask_bcrypt import Bcrypt
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from flask_cors import CORS
-from pymongo import MongoClient,DESCENDING
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 import requests
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
-import random
 import time
-import re
-from datetime import datetime,timezone
-from dateutil import parser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from city_index import CityIndex
+from amadeus_auth import AmadeusTokenManager
+from cache import TTLCache
+from hotel_search import HotelSearchPipeline
+from generation_cache import GenerationCache, generation_cache_backends_from_env
+from model_router import ModelRouter, AllModelsFailed, model_routes_from_env
+from questionnaire_jobs import QuestionnaireJobQueue
+import prompt_projection
+from chat_reply import ChatReplies
+from review_replies import ReviewReplies
+from reviews import Reviews, InvalidRequest
+from counter_buffer import CounterBuffer
+from password_hasher import PasswordHasher, HasherBusy
+from travel_queries import (flight_offers_params, hotel_list_params, hotel_offers_params, flight_cache_key,
+                            flight_cache_entry, questionnaire_prompts, questionnaire_response)
+from metrics import percentiles
+from underrated_warmer import start_background_warmer
+from underrated_pool import (PrefetchPool, sample_places, ready_to_serve, description_prompt, description_fields,
+                             description_error)
+import upstream
+import compression
+from json_provider import OrjsonProvider
+import migrations
+import server_config
+from response_cache import CollectionVersions, ResponseCache
 
 load_dotenv()  # Load environment variables from .env file
 
 app = Flask(__name__)
+# orjson-backed jsonify: ObjectId/datetime are encoded natively
+app.json = OrjsonProvider(app)
+if os.getenv("COMPRESSION_ENABLED", "true").lower() == "true":
+    compression.init_app(app, min_size=int(os.getenv("COMPRESSION_MIN_SIZE", 1024)))
 CORS(app)
-bcrypt = Bcrypt(app)
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 app.config["JWT_SECRET_KEY"] = JWT_SECRET_KEY
 jwt = JWTManager(app)
 
 # MongoDB Connection
 MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
+client = MongoClient(MONGO_URI, maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", 100)))
 db = client.travel_bot
 
 # Collections
@@ -35,111 +61,132 @@ questions_collection = db.questions
 users_collection = db.users
 responses_collection = db.responses
 reviews_collection = db.reviews
+review_replies_collection = db.review_replies
+questionnaire_jobs_collection = db.questionnaire_jobs
+# Users created by the old backend/auth.py (SHA-256 hashes) are moved over on their next login
+LEGACY_USERS_DB = os.getenv("LEGACY_USERS_DB")
+legacy_users_collection = client[LEGACY_USERS_DB].users if LEGACY_USERS_DB else None
+collection_versions_collection = db.collection_versions
+
+# Cached read-mostly responses, invalidated by bumping the version of a collection they read
+collection_versions = CollectionVersions(
+    collection_versions_collection,
+    check_interval=float(os.getenv("COLLECTION_VERSION_CHECK_INTERVAL", 2.0))
+)
+response_cache = ResponseCache(collection_versions, ttl=int(os.getenv("RESPONSE_CACHE_TTL", 300)))
+
+# In-memory city/IATA index shared by the chat extractors
+city_index = CityIndex(
+    city_codes_collection,
+    ttl=int(os.getenv("CITY_INDEX_TTL", 300)),
+    full_reload_interval=int(os.getenv("CITY_INDEX_FULL_RELOAD", 3600))
+)
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+# Configure Gemini API ("rest" transport under gevent workers; endpoint override for stub servers)
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT") or None
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+genai.configure(
+    api_key=GEMINI_API_KEY,
+    transport=GEMINI_TRANSPORT,
+    client_options={"api_endpoint": GEMINI_API_ENDPOINT} if GEMINI_API_ENDPOINT else None
+)
 best_model = "models/gemini-1.5-pro-latest"
 backup_model = "models/gemini-1.5-flash-latest"
 
+# Gemini generation cache ("memory", "mongo" or "memory,mongo" to share answers across workers)
+generation_cache_backends = generation_cache_backends_from_env(db.generation_cache)
+generation_cache = GenerationCache(generation_cache_backends)
+
+# Model routing per endpoint: fast flash first for chat/summaries, pro first for long-form answers
+MODEL_ROUTES = model_routes_from_env(best_model, backup_model)
+model_router = ModelRouter(
+    lambda name: genai.GenerativeModel(model_name=name),
+    MODEL_ROUTES,
+    failure_threshold=int(os.getenv("MODEL_FAILURE_THRESHOLD", 3)),
+    cooldown=int(os.getenv("MODEL_CIRCUIT_COOLDOWN", 30))
+)
+
+def generate(prompt, endpoint):
+    """Return (text, model) for `prompt`, from the generation cache or the routed model.
+
+    Raises AllModelsFailed when no model could answer.
+    """
+    cached = generation_cache.lookup(model_router.candidates(endpoint), prompt)
+    if cached:
+        return cached["text"], cached["model"]
+    start = time.perf_counter()
+    text, model = model_router.generate(prompt, endpoint)
+    generation_cache.store(model, prompt, text, time.perf_counter() - start)
+    return text, model
+
+def generate_text(prompt, endpoint):
+    return generate(prompt, endpoint)[0]
+
 # Amadeus API Credentials
 AMADEUS_API_KEY = os.getenv("AMADEUS_API_KEY")
 AMADEUS_API_SECRET = os.getenv("AMADEUS_API_SECRET")
 AMADEUS_TOKEN_URL = os.getenv("AMADEUS_TOKEN_URL")
 AMADEUS_FLIGHT_SEARCH_URL = os.getenv("AMADEUS_FLIGHT_SEARCH_URL")
 AMADEUS_HOTEL_SEARCH_URL = os.getenv("AMADEUS_HOTEL_SEARCH_URL")
+AMADEUS_HOTEL_OFFERS_URL = os.getenv("AMADEUS_HOTEL_OFFERS_URL", "https://test.api.amadeus.com/v3/shopping/hotel-offers")
 LOCATIONIQ_API_KEY = os.getenv("LOCATIONIQ_API_KEY")
+LOCATIONIQ_SEARCH_URL = os.getenv("LOCATIONIQ_SEARCH_URL", "https://us1.locationiq.com/v1/search.php")
 
-# Store the token and expiry time
-access_token = None
-token_expiry = 0  # Stores UNIX timestamp
+# Amadeus token shared by all request threads, refreshed ahead of expiry
+token_manager = AmadeusTokenManager(
+    AMADEUS_TOKEN_URL, AMADEUS_API_KEY, AMADEUS_API_SECRET,
+    refresh_margin=int(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", 120))
+)
 
 # Amadeus API functions
 def get_access_token():
-    """Fetch and cache Amadeus API access token."""
-    global access_token, token_expiry
-    if access_token and time.time() < token_expiry:
-        return access_token
-    try:
-        response = requests.post(AMADEUS_TOKEN_URL, data={
-            "grant_type": "client_credentials",
-            "client_id": AMADEUS_API_KEY,
-            "client_secret": AMADEUS_API_SECRET
-        })
+    """Return the cached Amadeus API access token."""
+    return token_manager.get_token()
+
+def amadeus_get(url, params):
+    """GET an Amadeus endpoint; on 401 invalidate the token and retry once."""
+    for attempt in range(2):
+        token = get_access_token()
+        if not token:
+            return None
+        response = upstream.get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+        if response.status_code == 401 and attempt == 0:
+            token_manager.invalidate(token)
+            continue
         response.raise_for_status()
-        json_response = response.json()
-        access_token = json_response["access_token"]
-        token_expiry = time.time() + json_response["expires_in"]
-        return access_token
-    except requests.exceptions.RequestException as e:
-        return None
+        return response
 
 # ✅ Flight Search
-def search_flights(origin, destination, departure_date):
-    token = get_access_token()
-    if not token:
-        return None
+def search_flights(origin, destination, departure_date, adults=1, currency="INR"):
     try:
-        response = requests.get(AMADEUS_FLIGHT_SEARCH_URL, headers={
-            "Authorization": f"Bearer {token}"
-        }, params={
-            "originLocationCode": origin,
-            "destinationLocationCode": destination,
-            "departureDate": departure_date,
-            "adults": 1,
-            "currencyCode": "INR",
-            "max": 5
-        })
-        response.raise_for_status()
+        response = amadeus_get(AMADEUS_FLIGHT_SEARCH_URL,
+                               params=flight_offers_params(origin, destination, departure_date, adults, currency))
+        if response is None:
+            return None
         return response.json()
     except requests.exceptions.RequestException as e:
         return None
-    
-def extract_flight_details(user_message):
-    words = user_message.lower().split()
-    
-    city_codes = {doc["city"].lower(): doc["iata_code"] for doc in city_codes_collection.find({})}
 
-    origin, destination = None, None
+# Flight offers cache: fresh for FLIGHT_CACHE_TTL, then served stale while refreshing
+flight_cache = TTLCache(
+    maxsize=int(os.getenv("FLIGHT_CACHE_SIZE", 512)),
+    ttl=int(os.getenv("FLIGHT_CACHE_TTL", 600)),
+    stale_ttl=int(os.getenv("FLIGHT_CACHE_STALE_TTL", 1800))
+)
 
-    for city in city_codes.keys():
-        if city in words:
-            if not origin:
-                origin = city_codes[city]
-            else:
-                destination = city_codes[city]
-                break
-
-    if not origin or not destination:
-        return None
-
-    # ✅ Use dateutil to parse date directly
-    try:
-        parsed_date = parser.parse(user_message, fuzzy=True, default=datetime(datetime.now().year, 1, 1))
-        formatted_date = parsed_date.strftime("%Y-%m-%d")
-    except Exception as e:
-        print(f"❗ Date parsing error: {e}")
-        return None
-
-    return {"origin": origin, "destination": destination, "date": formatted_date}
+def search_flights_cached(origin, destination, departure_date, adults=1, currency="INR"):
+    """Cached search_flights. Returns {"offers": <Amadeus JSON>, "summary": <AI summary or None>}."""
+    key = flight_cache_key(origin, destination, departure_date, adults, currency)
+    return flight_cache.get_or_load(key, lambda: flight_cache_entry(search_flights(*key)))
 
 
 def get_hotels_by_city(city_code):
     """Step 1: Fetch hotel IDs in a city using Amadeus API."""
-    token = get_access_token()
-    if not token:
-        return None
     try:
-        response = requests.get(
-            AMADEUS_HOTEL_SEARCH_URL,
-            headers={"Authorization": f"Bearer {token}"},
-            params={
-                "cityCode": city_code,
-                "radius": 5,
-                "radiusUnit": "KM",               
-            }
-        )
-        response.raise_for_status()
+        response = amadeus_get(AMADEUS_HOTEL_SEARCH_URL, params=hotel_list_params(city_code))
+        if response is None:
+            return None
         return response.json().get("data", [])
     except requests.exceptions.RequestException as e:
         print(f"❗ Hotel list API error: {e}")
@@ -147,130 +194,50 @@ def get_hotels_by_city(city_code):
 
 def get_hotel_availability(hotel_ids, check_in, check_out, adults=2):
     """Step 2: Check availability for specific hotels."""
-    token = get_access_token()
-    if not token:
-        return None
     try:
-        response = requests.get(
-            "https://test.api.amadeus.com/v3/shopping/hotel-offers",
-            headers={"Authorization": f"Bearer {token}"},
-            params={
-                "hotelIds": ",".join(hotel_ids),
-                #"checkInDate": check_in,
-                #"checkOutDate": check_out,
-                #"adults": adults,
-                "bestRateOnly": True  # Get best price per hotel
-            }
-        )
-        response.raise_for_status()
+        response = amadeus_get(AMADEUS_HOTEL_OFFERS_URL,
+                               params=hotel_offers_params(hotel_ids, check_in, check_out, adults))
+        if response is None:
+            return None
         return response.json().get("data", [])
     except requests.exceptions.RequestException as e:
         print(f"❗ Hotel availability API error: {e}")
         return None
 
-def search_hotels_combined(city_code, check_in, check_out, adults=2):
-    """Combined workflow: Get hotels in city -> Check availability."""
-    # Step 1: Get hotel IDs in the city
-    hotels = get_hotels_by_city(city_code)
-    if not hotels:
-        return None
-    
-    # Extract hotel IDs (first 5 for demo)
-    hotel_ids = [hotel["hotelId"] for hotel in hotels[:5]]
-    
-    # Step 2: Check availability
-    return get_hotel_availability(hotel_ids, check_in, check_out, adults)
-
-# Updated extractor to handle city-based queries
-def extract_hotel_details(user_message):
-    words = user_message.lower().split()
-    
-    city_codes = {doc["city"].lower(): doc["iata_code"] for doc in city_codes_collection.find({})}
-    city_code = None
-
-    # Find city code
-    for city in city_codes.keys():
-        if city in words:
-            city_code = city_codes[city]
-            break
-
-    if not city_code:
-        return None
-
-    # Extract dates
-    dates_found = extract_dates(user_message)
-    check_in = dates_found[0] if len(dates_found) > 0 else None
-    check_out = dates_found[1] if len(dates_found) > 1 else None
-
-    # Default adults if not found
-    adults = extract_number(user_message, "guests") or 2
-
-    if not check_in or not check_out:
-        print("❗ Check-in/check-out date not found")
-        return None
-
-    return {
-        "city_code": city_code,
-        "check_in": check_in,
-        "check_out": check_out,
-        "adults": adults
-    }
-
-def extract_dates(user_message):
-    """Extracts all dates (check-in and check-out) from user message."""
-    date_pattern = r"(\d{1,2})(?:st|nd|rd|th)?\s*(?:of\s*)?([A-Za-z]+)(?:\s*(\d{4}))?"
-    matches = re.findall(date_pattern, user_message, re.IGNORECASE)
-    
-    dates = []
-    for match in matches:
-        day, month, year = match[0], match[1], match[2] if match[2] else str(datetime.now().year)
-        full_date = f"{day} {month} {year}"
-
-        try:
-            parsed_date = datetime.strptime(full_date, "%d %B %Y")
-            dates.append(parsed_date.strftime("%Y-%m-%d"))
-        except ValueError:
-            print(f"Invalid date format: {full_date}")
-            continue
-
-    return dates  # This will return a list of all valid dates
+hotel_pipeline = HotelSearchPipeline(
+    get_hotels_by_city,
+    get_hotel_availability,
+    batch_size=int(os.getenv("HOTEL_BATCH_SIZE", 20)),
+    max_concurrency=int(os.getenv("HOTEL_MAX_CONCURRENCY", 4)),  # per search
+    max_workers=int(os.getenv("HOTEL_WORKERS", 32)),  # across the process
+    max_candidates=int(os.getenv("HOTEL_MAX_CANDIDATES", 200)),
+    top_k=int(os.getenv("HOTEL_TOP_K", 5)),
+    hotel_list_ttl=int(os.getenv("HOTEL_LIST_TTL", 6 * 3600))
+)
 
-
-def extract_number(user_message, field):
-    """Extracts a number (like guests) from user input."""
-    match = re.search(r"(\d+)\s*" + field, user_message, re.IGNORECASE)
-    if match:
-        try:
-            return int(match.group(1))
-        except ValueError:
-            print(f"Invalid number format in: {user_message}")
-            return None
-    print(f"No valid number found for {field} in: {user_message}")
-    return None
+def search_hotels_combined(city_code, check_in, check_out, adults=2):
+    """Combined workflow: Get hotels in city -> Check availability in concurrent batches -> cheapest offers."""
+    return hotel_pipeline.search(city_code, check_in, check_out, adults)
 
 def get_location_coordinates(place):
-    url = f"https://us1.locationiq.com/v1/search.php"
+    url = LOCATIONIQ_SEARCH_URL
     params = {
         "key": LOCATIONIQ_API_KEY,
         "q": place,
         "format": "json"
     }
-    response = requests.get(url, params=params)
+    response = upstream.get(url, params=params)
     return response.json()[0]  # First result
     
 def extract_location(user_message):
     """Extracts location from user input using LocationIQ API if not found in predefined city list."""
-    words = user_message.lower().split()
-    
-    # 🔹 Fetch all city names from MongoDB
-    city_names = [doc["city"].lower() for doc in city_codes_collection.find({}, {"city": 1, "_id": 0})]
-
-    for city in city_names:
-        if city in words:
-            return city.capitalize()  # Return formatted city name
+    # 🔹 City names from the in-memory index
+    match = city_index.matcher().first(user_message)
+    if match:
+        return match.city.title()  # Return formatted city name
 
     # 🔹 If not found in database, use LocationIQ API for geocoding
-    url = f"https://us1.locationiq.com/v1/search.php"
+    url = LOCATIONIQ_SEARCH_URL
     params = {
         "key": LOCATIONIQ_API_KEY,
         "q": user_message,
@@ -278,7 +245,7 @@ def extract_location(user_message):
         "limit": 1
     }
     try:
-        response = requests.get(url, params=params)
+        response = upstream.get(url, params=params)
         response.raise_for_status()
         location_data = response.json()
         if location_data:
@@ -290,46 +257,65 @@ def extract_location(user_message):
 
 # Home route
 @app.route('/')
+@response_cache.cached()
 def home():
     return jsonify({"message": "Voyabot backend is running!"})
 
+# Internal counters
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        "city_index": city_index.get_stats(),
+        "upstream": upstream.stats(),
+        "amadeus_token": token_manager.get_stats(),
+        "flight_cache": flight_cache.get_stats(),
+        "hotel_list_cache": hotel_pipeline.hotel_ids_cache.get_stats(),
+        "generation_cache": generation_cache.get_stats(),
+        "models": model_router.get_stats(),
+        "summary_prompts": prompt_projection.get_stats(),
+        "chat_stream_ttft_ms": percentiles(chat_stream_ttft_ms),
+        "review_counters": review_counters.get_stats() if review_counters else None,
+        "underrated_prefetch": underrated_pool.get_stats() if underrated_pool else None,
+        "response_cache": response_cache.get_stats(),
+        "compression": compression.get_stats(),
+        "password_hasher": password_hasher.get_stats()
+    }), 200
+
 # To enhance underrated using AI
 def get_ai_description(place):
-    """Enhance place details using the Gemini API."""
-    prompt = f"Provide detailed travel information about {place['Phase Name']} located in {place['Location']}. Include its cultural importance, best travel time, local experiences, and food options."
-
-    for model in [best_model, backup_model]:
-        try:
-            response = genai.GenerativeModel(model_name=model).generate_content(prompt)
-            if response and response.text:
-                return response.text
-        except Exception as e:
-            if "model_not_found" in str(e) or "quota_exceeded" in str(e):
-                continue  # Try the next model
-            else:
-                return "AI data unavailable."
-
-    return "AI model failed to provide details."
-
-# ✅ AI-Powered Summary for Flights, Hotels, and Places
-def generate_ai_summary(title, data):
+    """Enhance place details using the Gemini API. Returns (text, model); model is None on failure."""
     try:
-        prompt = f"{title}:\n{data}"
-        for model in [best_model, backup_model]:
-            try:
-                response = genai.GenerativeModel(model_name=model).generate_content(prompt)
-                if response and response.text:
-                    return response.text
-            except Exception as e:
-                if "model_not_found" in str(e) or "quota_exceeded" in str(e):
-                    continue
-                return "AI error: Unable to generate a summary."
-        return "AI processing failed."
+        return generate(description_prompt(place), "description")
     except Exception as e:
-        return "Error in AI processing."
+        return description_error(e), None
+
+def enrich_place(place):
+    """Generate ai_details for a place and persist them with the model name and generation time."""
+    text, model = get_ai_description(place)
+    if model is None:
+        place["ai_details"] = text  # Shown to the user but not stored, so it is retried later
+        return False
+
+    fields = description_fields(text, model)
+    underrated_collections.update_one({"_id": place["_id"]}, {"$set": fields})
+    place.update(fields)
+    return True
+
+def build_underrated_trio():
+    """Three random enriched places, or None if any description failed (not worth prefetching)."""
+    places = sample_places(underrated_collections, 3)
+    return places if places and ready_to_serve(places, enrich_place) else None
+
+# Optional pool of ready trios so /underrated_places does no DB or AI work per request
+underrated_pool = None
+if os.getenv("UNDERRATED_PREFETCH", "false").lower() == "true":
+    underrated_pool = PrefetchPool(build_underrated_trio, size=int(os.getenv("UNDERRATED_PREFETCH_SIZE", 8)))
+    # Trios sampled from an older catalogue are dropped once it is re-imported and bumped
+    collection_versions.on_change("underrated", underrated_pool.invalidate)
 
 # Fetch questions from MongoDB
 @app.route('/get_questions', methods=['GET'])
+@response_cache.cached("questions")
 def get_questions():
     try:
         questions = list(questions_collection.find({}, {"_id": 0}))
@@ -337,6 +323,19 @@ def get_questions():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# bcrypt runs in a process pool; requests beyond the queue limit get a 503 instead of waiting
+password_hasher = PasswordHasher(
+    rounds=int(os.getenv("BCRYPT_LOG_ROUNDS", 12)),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", 2)),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32)),
+    start_method=os.getenv("PASSWORD_HASH_START_METHOD", "forkserver")
+)
+
+def hasher_busy():
+    response = jsonify({"message": "Server busy, please try again"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
 # Signup Route
 @app.route('/signup', methods=['POST'])
 def signup():
@@ -344,11 +343,21 @@ def signup():
     username = data.get('username')
     password = data.get('password')
 
+    if not username or not password:
+        return jsonify({"message": "Username and password are required"}), 400
+
     if users_collection.find_one({'username': username}):
         return jsonify({"message": "Username already exists"}), 400
 
-    hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
-    users_collection.insert_one({'username': username, 'password': hashed_password})
+    try:
+        hashed_password = password_hasher.hash(password)
+    except HasherBusy:
+        return hasher_busy()
+    try:
+        users_collection.insert_one({'username': username, 'password': hashed_password})
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup; the unique index on username caught it
+        return jsonify({"message": "Username already exists"}), 400
     return jsonify({"message": "User registered successfully"}), 201
 
 # Login Route
@@ -359,26 +368,54 @@ def login():
     password = data.get('password')
     
     user = users_collection.find_one({'username': username})
-    if user and bcrypt.check_password_hash(user['password'], password):
-        access_token = create_access_token(identity=username)
-        return jsonify({"message": "Login successful", "token": access_token}), 200
-    return jsonify({"message": "Invalid credentials"}), 401
+    legacy = False
+    if user is None and legacy_users_collection is not None:
+        user = legacy_users_collection.find_one({'username': username})
+        legacy = user is not None
 
-def gemini_fallback(user_message):
-    """Helper function to handle Gemini fallback logic."""
-    for model in [best_model, backup_model]:
+    try:
+        matches, needs_rehash = password_hasher.verify(password, user['password']) if user else (False, False)
+    except HasherBusy:
+        return hasher_busy()
+    if not matches:
+        return jsonify({"message": "Invalid credentials"}), 401
+
+    if needs_rehash or legacy:
+        # Legacy SHA-256 hash or an old bcrypt cost: store a fresh hash now that we have the password
         try:
-            response = genai.GenerativeModel(model_name=model).generate_content(user_message)
-            print(f"Gemini model response ({model}): {response}")
-            if response and response.text:
-                return jsonify({"reply": response.text})  # Return the response and exit
-        except Exception as e:
-            print(f"Error from Gemini model {model}: {e}")
-            if "model_not_found" in str(e) or "quota_exceeded" in str(e):
-                continue  # Try the next model
+            new_hash = password_hasher.hash(password)
+            if legacy:
+                users_collection.insert_one({'username': username, 'password': new_hash})
             else:
-                return jsonify({"error": f"Gemini API error: {str(e)}"}), 500  # Return error and exit
-    return jsonify({"error": "All AI models failed. Please try again later."}), 500  # Final fallback
+                users_collection.update_one({'_id': user['_id'], 'password': user['password']},
+                                            {'$set': {'password': new_hash}})
+        except (HasherBusy, DuplicateKeyError) as e:
+            print(f"❗ Password rehash for {username} skipped: {e!r}")
+
+    access_token = create_access_token(identity=username)
+    return jsonify({"message": "Login successful", "token": access_token}), 200
+
+def gemini_fallback(user_message):
+    """Helper function to handle Gemini fallback logic."""
+    try:
+        reply, model = generate(user_message, "chat")
+        print(f"Gemini model response ({model}): {reply}")
+        return jsonify({"reply": reply})  # Return the response and exit
+    except AllModelsFailed as e:
+        print(e)
+        return jsonify({"error": "All AI models failed. Please try again later."}), 500  # Final fallback
+    except Exception as e:
+        return jsonify({"error": f"Gemini API error: {str(e)}"}), 500  # Return error and exit
+
+# Flight/hotel part of a chat turn; the searches and summaries of its parts run concurrently
+chat_replies = ChatReplies(
+    search_flights_cached,
+    search_hotels_combined,
+    lambda message: city_index.matcher().find_all(message),
+    lambda prompt: generate_text(prompt, "summary"),
+    prompt_budget=int(os.getenv("SUMMARY_PROMPT_TOKEN_BUDGET", 800)),
+    max_workers=int(os.getenv("CHAT_WORKERS", 8))
+)
 
 @app.route("/chat", methods=["POST"])
 @jwt_required()
@@ -389,64 +426,145 @@ def chat():
     if not user_message:
         return jsonify({"error": "Message is required"}), 400
 
+    if request.json.get("stream") or request.accept_mimetypes.best == "text/event-stream":
+        return Response(
+            stream_with_context(chat_event_stream(user_message)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     try:
-        # Flight search
-        if any(word in user_message.lower() for word in ["flight", "book ticket", "airfare"]):
-            print("Detected flight query")
-            data = extract_flight_details(user_message)
-            print(f"Extracted flight details: {data}")
-            if not data:
-                raise Exception("Failed to extract flight details")
-            
-            flight_data = search_flights(data["origin"], data["destination"], data["date"])
-            print(f"Flight API response: {flight_data}")
-            if not flight_data or "data" not in flight_data:
-                raise Exception("No flights found")
-            
-            summary = generate_ai_summary(f"Flight options from {data['origin']} to {data['destination']}", flight_data)
-            return jsonify({"flights": flight_data["data"], "reply": summary})  # Return and exit
-
-        
-        # Hotel search
-        if any(word in user_message.lower() for word in ["hotel", "stay", "accommodation"]):
-            print("Detected hotel query")
-            hotel_data_input = extract_hotel_details(user_message)
-            print(f"Extracted hotel details: {hotel_data_input}")
-            if not hotel_data_input:
-                raise Exception("Failed to extract hotel details")
-
-            # Use combined API workflow
-            hotel_data = search_hotels_combined(
-                hotel_data_input["city_code"],
-                hotel_data_input["check_in"],
-                hotel_data_input["check_out"],
-                adults=hotel_data_input["adults"]
-            )
-            print(f"Combined hotel API response: {hotel_data}")
-            if not hotel_data:
-                raise Exception("No hotels found")
-
-            summary = generate_ai_summary(
-                f"Hotel options in {hotel_data_input['city_code']}",
-                {"hotels": hotel_data}
-            )
-            return jsonify({
-                "hotels": hotel_data,
-                "reply": summary
-            })
-
-        
-        # General Gemini fallback for queries that don't match flight, hotel, or place search
-        print("Trying Gemini fallback for general query...")
-        return gemini_fallback(user_message)  # Return and exit
+        prepared = chat_replies.prepare(user_message)
+        if not prepared:
+            # General Gemini fallback for queries that don't match flight, hotel, or place search
+            print("Trying Gemini fallback for general query...")
+            return gemini_fallback(user_message)  # Return and exit
+
+        return jsonify(dict(prepared["payload"], reply=chat_replies.summarize(prepared)))  # Return and exit
 
     except Exception as e:
         print(f"Error occurred: {e}. Falling back to Gemini...")
         # General fallback to Gemini for any error
         return gemini_fallback(user_message)  # Return and exit
 
+# ✅ Streaming chat (Server-Sent Events)
+chat_stream_ttft_ms = deque(maxlen=500)  # Recent time-to-first-token samples
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+def stream_generation(prompt, endpoint="chat"):
+    """Yield text chunks for `prompt` using Gemini streaming on the routed models.
+
+    Cached generations are yielded in one piece; completed streams are added to the cache.
+    Hedging does not apply here: once a chunk has been sent the model cannot be switched.
+    """
+    models = model_router.candidates(endpoint)
+    cached = generation_cache.lookup(models, prompt)
+    if cached:
+        yield cached["text"]
+        return
+
+    for model in models:
+        if not model_router.claim(model, endpoint):
+            continue
+        chunks = []
+        start = time.perf_counter()
+        try:
+            response = model_router.model(model).generate_content(prompt, stream=True)
+            for chunk in response:
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            print(f"Error from Gemini model {model}: {e}")
+            model_router.record(model, time.perf_counter() - start, False)
+            # Only switch models if nothing has been sent to the client yet
+            if not chunks:
+                continue
+            raise
+        latency = time.perf_counter() - start
+        model_router.record(model, latency, bool(chunks))
+        if chunks:
+            generation_cache.store(model, prompt, "".join(chunks), latency)
+            return
+    raise AllModelsFailed("All AI models failed. Please try again later.")
+
+def chat_event_stream(user_message):
+    """SSE events for one chat turn: structured flight/hotel results first, then reply tokens."""
+    start = time.perf_counter()
+    first_token_ms = None
+
+    try:
+        prepared = chat_replies.prepare(user_message)
+    except Exception as e:
+        print(f"Error occurred: {e}. Falling back to Gemini...")
+        prepared = None
+
+    if prepared:
+        for event, value in prepared["payload"].items():
+            yield sse_event(event, value)
+    else:
+        prepared = chat_replies.general(user_message)
+
+    try:
+        for chunk in chat_replies.stream(prepared, stream_generation):
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+                chat_stream_ttft_ms.append(first_token_ms)
+            yield sse_event("token", {"text": chunk})
+    except Exception as e:
+        yield sse_event("error", {"error": f"Gemini API error: {str(e)}"})
+
+    yield sse_event("done", {
+        "ttft_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+        "total_ms": round((time.perf_counter() - start) * 1000, 1)
+    })
 
 # Questionnaire submission & generate travel recommendations
+QUESTIONNAIRE_DEADLINE = float(os.getenv("QUESTIONNAIRE_DEADLINE", 45))  # seconds, shared by all generations
+questionnaire_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("QUESTIONNAIRE_WORKERS", 8)), thread_name_prefix="questionnaire"
+)
+# Saves get their own threads, so generations left running past the deadline cannot hold them up
+questionnaire_save_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("QUESTIONNAIRE_SAVE_WORKERS", 2)), thread_name_prefix="questionnaire-save"
+)
+
+def save_questionnaire_responses(username, data):
+    """Store user responses in MongoDB."""
+    try:
+        responses_collection.update_one(
+            {"username": username}, 
+            {"$set": {"responses": data}}, 
+            upsert=True
+        )
+    except Exception as e:
+        print(f"❗ Could not save questionnaire responses for {username}: {e}")
+
+def run_questionnaire_generation(data, deadline=QUESTIONNAIRE_DEADLINE):
+    """Run the questionnaire generations concurrently under one deadline.
+
+    Returns (payload, status_code). If some branches fail or time out while
+    others succeed, the payload is marked partial and lists the missing parts.
+    A generation still running at the deadline is not cancelled: it keeps its
+    questionnaire_executor thread until Gemini answers or its client times out.
+    """
+    futures = {
+        name: questionnaire_executor.submit(generate_text, prompt, "questionnaire")
+        for name, prompt in questionnaire_prompts(data).items()
+    }
+    wait(futures.values(), timeout=deadline)
+    return questionnaire_response(futures)
+
+# Async mode: jobs are stored in Mongo and processed by a local worker pool
+questionnaire_jobs = QuestionnaireJobQueue(
+    questionnaire_jobs_collection,
+    run_questionnaire_generation,
+    workers=int(os.getenv("QUESTIONNAIRE_JOB_WORKERS", 4)),
+    lease_seconds=int(os.getenv("QUESTIONNAIRE_JOB_LEASE", QUESTIONNAIRE_DEADLINE * 3))
+)
+
 @app.route('/submit_questionnaire', methods=['POST'])
 @jwt_required()
 def submit_questionnaire():
@@ -458,100 +576,91 @@ def submit_questionnaire():
         if not all(data.values()):
             return jsonify({"error": "Please answer all questions before submitting."}), 400
 
-        # Store user responses in MongoDB
-        responses_collection.update_one(
-            {"username": username}, 
-            {"$set": {"responses": data}}, 
-            upsert=True
-        )
+        # Saving the answers is not needed for the reply, so keep it off the critical path
+        questionnaire_save_executor.submit(save_questionnaire_responses, username, data)
+
+        # ?mode=async: queue the generation and return a job id to poll
+        if request.args.get("mode") == "async":
+            job_id = questionnaire_jobs.submit(username, data)
+            return jsonify(QuestionnaireJobQueue.queued(job_id)), 202
 
         # Generate travel recommendation using AI
-        prompt = f"Based on the following user preferences: {data}, generate a personalized travel recommendation. Suggest at least three travel destinations in India that match the user's interests, preferred activities, and travel style. Provide a brief description of each place, highlighting why it would be a great choice. Also, include any relevant travel tips or must-visit attractions for each destination."
-        recommendation = None
-
-        for model in [best_model, backup_model]:
-            try:
-                response = genai.GenerativeModel(model_name=model).generate_content(prompt)
-                if response and hasattr(response, 'text'):
-                    recommendation = response.text
-                    break  # Exit loop if recommendation is found
-            except Exception as e:
-                if any(err in str(e) for err in ["model_not_found", "quota_exceeded"]):
-                    continue  # Try the next model
-                return jsonify({"error": f"Gemini API error: {str(e)}"}), 500
-
-        if not recommendation:
-            return jsonify({"error": "AI model failed. Please try again later."}), 500
-
-        # Check for additional assistance needs
-        assistance_text = None
-        special_requirements = data.get("special_requirements", [])
-        if any(req in special_requirements for req in ["pet assistance", "medical conditions", "child care"]):
-            assistance_prompt = f"User needs assistance for: {special_requirements}\nProvide suitable travel solutions."
-
-            for model in [best_model, backup_model]:
-                try:
-                    assistance_response = genai.GenerativeModel(model_name=model).generate_content(assistance_prompt)
-                    if assistance_response and hasattr(assistance_response, 'text'):
-                        assistance_text = assistance_response.text
-                        break
-                except Exception as e:
-                    if any(err in str(e) for err in ["model_not_found", "quota_exceeded"]):
-                        continue  # Try next model
-                    return jsonify({"error": f"Gemini API error: {str(e)}"}), 500
-
-        # Prepare response payload
-        response_payload = {
-            "message": "Questionnaire submitted successfully!",
-            "recommendation": recommendation
-        }
-        
-        if assistance_text:
-            response_payload["assistance"] = assistance_text
-
-        return jsonify(response_payload), 201
+        response_payload, status = run_questionnaire_generation(data)
+        return jsonify(response_payload), status
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/questionnaire_jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def questionnaire_job_status(job_id):
+    payload, status = QuestionnaireJobQueue.status_response(job_id, questionnaire_jobs.get(job_id, get_jwt_identity()))
+    return jsonify(payload), status
+
+@app.route('/questionnaire_jobs/<job_id>/result', methods=['GET'])
+@jwt_required()
+def questionnaire_job_result(job_id):
+    payload, status = QuestionnaireJobQueue.result_response(job_id, questionnaire_jobs.get(job_id, get_jwt_identity()))
+    return jsonify(payload), status
+
 # Underrated Places
 @app.route("/underrated_places", methods=["GET"])
 def get_underrated_places():
     try:
-        # Fetch all places from MongoDB (excluding _id)
-        places = list(underrated_collections.find({}, {"_id": 0}))
-        
-        if not places:
-            return jsonify({"error": "No places found in the database"}), 404
-        
-        # Shuffle and select 3 random places
-        random.shuffle(places)
-        selected_places = places[:3]
-
-        # Enhance details with AI
-        for place in selected_places:
-            if "ai_details" not in place:
-                place["ai_details"] = get_ai_description(place)
-                
-            place.setdefault("image_url", "https://via.placeholder.com/400x300?text=No+Image")
+        collection_versions.get("underrated")  # notices catalogue bumps made by other processes
+        selected_places = underrated_pool.take() if underrated_pool else None
+        if selected_places is None:
+            # Mongo picks 3 random places ($sample) and returns only the fields the page shows
+            selected_places = sample_places(underrated_collections, 3)
+            if not selected_places:
+                return jsonify({"error": "No places found in the database"}), 404
+
+            # Enhance details with AI (normally already stored by the warmer)
+            ready_to_serve(selected_places, enrich_place)
 
         return jsonify({"places": selected_places}), 200
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
+# Replies live in per-review buckets, not in the review document
+review_replies = ReviewReplies(
+    review_replies_collection,
+    bucket_size=int(os.getenv("REVIEW_REPLY_BUCKET_SIZE", 50))
+)
+# Optional write-coalescing for like/dislike counts (approximate until the next flush)
+review_counters = None
+if os.getenv("REVIEW_COUNTER_BUFFER", "false").lower() == "true":
+    review_counters = CounterBuffer(
+        reviews_collection,
+        ("likes", "dislikes"),
+        flush_interval=float(os.getenv("REVIEW_COUNTER_FLUSH_INTERVAL", 2.0)),
+        flush_size=int(os.getenv("REVIEW_COUNTER_FLUSH_SIZE", 500))
+    )
+
+reviews = Reviews(
+    reviews_collection,
+    review_replies,
+    counters=review_counters,
+    page_size=int(os.getenv("REVIEWS_PAGE_SIZE", 20)),
+    replies_page_size=int(os.getenv("REPLIES_PAGE_SIZE", 20))
+)
+
 @app.route('/get_reviews', methods=['GET'])
 @jwt_required()
 def get_reviews():
+    """One page of reviews, newest first; see Reviews.page for the query parameters."""
     try:
-        # Include _id in the response by removing {"_id": 0} and converting ObjectId to string
-        reviews = list(reviews_collection.find({}).sort("timestamp", DESCENDING))
-        
-        # Convert ObjectId to string for each review
-        for review in reviews:
-            review['_id'] = str(review['_id'])
-        
-        return jsonify(reviews), 200
+        return jsonify(reviews.page(request.args)), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
+@app.route('/reviews_count', methods=['GET'])
+@jwt_required()
+def reviews_count():
+    try:
+        return jsonify(reviews.count()), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
       
@@ -559,25 +668,9 @@ def get_reviews():
 @jwt_required()
 def submit_review():
     try:
-        data = request.json
-        username = get_jwt_identity()
-        review_text = data.get("review_text")
-
-        if not review_text:
-            return jsonify({"error": "Review cannot be empty."}), 400
-
-        review = {
-            "username": username,
-            "review_text": review_text,
-            "timestamp": datetime.now(timezone.utc),
-            "likes": 0,
-            "dislikes": 0,
-            "replies": []
-        }
-
-        reviews_collection.insert_one(review)
-        return jsonify({"message": "Review submitted successfully!"}), 201
-
+        return jsonify(reviews.submit(get_jwt_identity(), request.json)), 201
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -585,48 +678,9 @@ def submit_review():
 @jwt_required()
 def like_dislike_review():
     try:
-        # Validate request data
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-
-        review_id = data.get("review_id")
-        action = data.get("action")  # 'like' or 'dislike'
-
-        # Validate required fields
-        if not review_id:
-            return jsonify({"error": "Review ID is required"}), 400
-        if action not in ["like", "dislike"]:
-            return jsonify({"error": "Invalid action. Must be 'like' or 'dislike'"}), 400
-
-        # Convert string ID to ObjectId if needed
-        try:
-            from bson import ObjectId
-            review_obj_id = ObjectId(review_id) if not isinstance(review_id, ObjectId) else review_id
-        except:
-            return jsonify({"error": "Invalid review ID format"}), 400
-
-        # Determine which field to update
-        update_field = "likes" if action == "like" else "dislikes"
-
-        # Update and return the modified document
-        result = reviews_collection.find_one_and_update(
-            {"_id": review_obj_id},
-            {"$inc": {update_field: 1}},
-            return_document=True
-        )
-
-        if not result:
-            return jsonify({"error": "Review not found"}), 404
-
-        # Return success response with updated counts
-        return jsonify({
-            "message": f"Review {action}d successfully",
-            "review_id": str(result["_id"]),
-            "likes": result.get("likes", 0),
-            "dislikes": result.get("dislikes", 0)
-        }), 200
-
+        return jsonify(reviews.react(request.get_json())), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({
             "error": "An error occurred",
@@ -637,87 +691,81 @@ def like_dislike_review():
 @jwt_required()
 def reply_review():
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-
-        username = get_jwt_identity()
-        review_id = data.get("review_id")
-        reply_text = data.get("reply_text")
-
-        # Validate required fields
-        if not review_id:
-            return jsonify({"error": "Review ID is required"}), 400
-        if not reply_text or not reply_text.strip():
-            return jsonify({"error": "Reply text cannot be empty"}), 400
-
-        # Convert string ID to ObjectId if needed
-        try:
-            from bson import ObjectId
-            review_obj_id = ObjectId(review_id) if not isinstance(review_id, ObjectId) else review_id
-        except:
-            return jsonify({"error": "Invalid review ID format"}), 400
-
-        # Create reply object with proper timestamp
-        reply = {
-            "username": username,
-            "reply_text": reply_text.strip(),
-            "timestamp": datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
-        }
-
-        # Update the review with the new reply
-        result = reviews_collection.update_one(
-            {"_id": review_obj_id},
-            {"$push": {"replies": reply}}
-        )
-
-        if result.modified_count == 1:
-            # Return the complete reply object
-            return jsonify({
-                "message": "Reply added successfully",
-                "reply": reply
-            }), 200
-        else:
-            return jsonify({"error": "Review not found or not updated"}), 404
-
+        return jsonify(reviews.reply(get_jwt_identity(), request.get_json())), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({
             "error": "An error occurred",
             "details": str(e)
         }), 500
     
+@app.route('/review_replies/<review_id>', methods=['GET'])
+@jwt_required()
+def get_review_replies(review_id):
+    """Replies of one review, oldest first; `after` is the `next_cursor` of the previous page."""
+    try:
+        return jsonify(reviews.replies_page(review_id, request.args)), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/delete_reply', methods=['DELETE'])
 @jwt_required()
 def delete_reply():
     try:
-        data = request.json
-        review_id = data.get("review_id")
-        reply_index = data.get("reply_index")
-        
-        # Convert string ID to ObjectId if needed
-        from bson import ObjectId
-        review_obj_id = ObjectId(review_id) if not isinstance(review_id, ObjectId) else review_id
-        
-        # Update operation to remove the specific reply
-        result = reviews_collection.update_one(
-            {"_id": review_obj_id},
-            {"$unset": {f"replies.{reply_index}": 1}}
-        )
-        
-        # Then pull to remove null values
-        reviews_collection.update_one(
-            {"_id": review_obj_id},
-            {"$pull": {"replies": None}}
-        )
-        
-        if result.modified_count == 1:
-            return jsonify({"message": "Reply deleted successfully"}), 200
-        else:
-            return jsonify({"error": "Reply not found or not deleted"}), 404
-            
+        return jsonify(reviews.delete_reply(get_jwt_identity(), request.json)), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        return jsonify({"error": str(e)}), 500   
+        return jsonify({"error": str(e)}), 500
+
+_background_started = False
+
+def start_background_work():
+    """Bootstrap indexes and start the background threads: token refresh, city index feed,
+    job workers, description warmer, prefetch pool and counter flushes.
+
+    Called by the serving entry points (wsgi.load_app and the dev server), not at import,
+    so the maintenance CLIs that import this module (underrated_warmer.py, review_replies.py)
+    do not claim questionnaire jobs or start threads that die with them.
+    """
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+    # Indexes only; data migrations run from `python migrations.py`, one process at a time
+    if os.getenv("DB_BOOTSTRAP_ON_START", "true").lower() == "true":
+        try:
+            migrations.bootstrap(db)
+        except Exception as e:
+            print(f"❗ Database bootstrap failed: {e}")
+    try:
+        city_index.load()
+        if os.getenv("CITY_INDEX_CHANGE_FEED", "false").lower() == "true":
+            city_index.start_change_feed()
+    except Exception as e:
+        print(f"❗ City index not loaded at startup, will retry on first request: {e}")
+    if AMADEUS_TOKEN_URL:
+        token_manager.start()
+    try:
+        questionnaire_jobs.ensure_started()
+    except Exception as e:
+        print(f"❗ Questionnaire job workers not started, will retry on first submission: {e}")
+    if os.getenv("UNDERRATED_WARM_ON_START", "false").lower() == "true":
+        start_background_warmer(
+            underrated_collections, enrich_place,
+            workers=int(os.getenv("UNDERRATED_WARM_WORKERS", 2)),
+            max_age_days=float(os.getenv("UNDERRATED_DESCRIPTION_MAX_AGE_DAYS", 30)),
+            interval=int(os.getenv("UNDERRATED_WARM_INTERVAL", 3600))
+        )
+    if underrated_pool:
+        underrated_pool.start()
+    if review_counters:
+        review_counters.start()
 
-    
 if __name__ == '__main__':
-    app.run(debug=True, host="0.0.0.0", port=5001)
+    # Development server only; production runs wsgi:app under gunicorn (see server_config.py).
+    start_background_work()
+    server_config.run_dev_server(app, password_hasher)
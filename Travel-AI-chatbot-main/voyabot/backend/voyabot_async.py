@@ -0,0 +1,762 @@
+"""Asyncio backend: the routes and JSON contracts of voyabot.py, served from one event loop.
+
+Amadeus goes through httpx (async_upstream.py), Gemini through the models'
+generate_content_async, and Mongo through Motor, so a request waiting on an upstream holds
+a coroutine, not a thread. Independent work runs concurrently: the flight and hotel parts
+of a chat turn, the hotel availability batches, the questionnaire generations and the
+descriptions of underrated places.
+
+Request handling that does no I/O (chat intents and summaries, review paging and
+validation, questionnaire results, Amadeus parameters, cached responses) lives in modules
+shared with voyabot.py; this file only holds the awaiting wrappers around them. Tokens
+are issued and checked by flask_jwt_extended itself (async_jwt.py), so the frontend and
+existing sessions work against either backend.
+
+Background maintenance stays on threads and uses the pymongo objects under the Motor
+ones (same client and pool): city index refreshes, questionnaire job workers and the
+startup migrations. The sync backend's optional extras (response compression, the review
+counter buffer, the underrated prefetch pool and description warmer) are not part of this
+mode; compress at the proxy and run `python underrated_warmer.py` for descriptions.
+
+Run from the backend directory:
+    python voyabot_async.py                                   # development
+    hypercorn voyabot_async:app --bind 0.0.0.0:5001 --workers 2
+"""
+import asyncio
+import os
+import time
+from collections import deque
+
+import google.generativeai as genai
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+
+import migrations
+import server_config
+import prompt_projection
+from amadeus_auth import AsyncAmadeusTokenManager
+from async_jwt import AsyncJWT, get_jwt_identity
+from async_upstream import AsyncUpstreamClient
+from cache import TTLCache
+from chat_reply import AsyncChatReplies
+from city_index import CityIndex
+from generation_cache import GenerationCache, generation_cache_backends_from_env
+from hotel_search import AsyncHotelSearchPipeline
+from json_provider import OrjsonProvider
+from model_router import ModelRouter, AllModelsFailed, model_routes_from_env
+from password_hasher import PasswordHasher, HasherBusy
+from questionnaire_jobs import QuestionnaireJobQueue
+from response_cache import CollectionVersions, AsyncResponseCache
+from review_replies import AsyncReviewReplies
+from reviews import AsyncReviews, InvalidRequest
+from travel_queries import (flight_offers_params, hotel_list_params, hotel_offers_params, flight_cache_key,
+                            flight_cache_entry, questionnaire_prompts, questionnaire_response)
+from metrics import percentiles
+from underrated_pool import (sample_pipeline, distinct_places, shape_place, description_prompt, description_fields,
+                             description_error)
+
+load_dotenv()
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+app = cors(app)
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+jwt = AsyncJWT(JWT_SECRET_KEY)
+jwt_required = jwt.jwt_required
+create_access_token = jwt.create_access_token
+
+# MongoDB Connection
+MONGO_URI = os.getenv("MONGO_URI")
+client = AsyncIOMotorClient(MONGO_URI, maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", 100)))
+db = client.travel_bot
+# pymongo Database under the Motor one, for the components that run on threads
+sync_db = db.delegate
+
+# Collections
+underrated_collections = db.underrated
+questions_collection = db.questions
+users_collection = db.users
+responses_collection = db.responses
+reviews_collection = db.reviews
+LEGACY_USERS_DB = os.getenv("LEGACY_USERS_DB")
+legacy_users_collection = client[LEGACY_USERS_DB].users if LEGACY_USERS_DB else None
+
+# Cached read-mostly responses, invalidated by bumping the version of a collection they read
+collection_versions = CollectionVersions(
+    sync_db.collection_versions,
+    check_interval=float(os.getenv("COLLECTION_VERSION_CHECK_INTERVAL", 2.0))
+)
+response_cache = AsyncResponseCache(collection_versions, ttl=int(os.getenv("RESPONSE_CACHE_TTL", 300)))
+
+# In-memory city/IATA index; refreshed by a background task, so lookups stay off Mongo
+CITY_INDEX_TTL = int(os.getenv("CITY_INDEX_TTL", 300))
+city_index = CityIndex(
+    sync_db.city_codes,
+    ttl=CITY_INDEX_TTL,
+    full_reload_interval=int(os.getenv("CITY_INDEX_FULL_RELOAD", 3600))
+)
+
+# Configure Gemini API (generate_content_async needs the asyncio gRPC transport)
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+genai.configure(
+    api_key=GEMINI_API_KEY,
+    transport="grpc_asyncio",
+    client_options={"api_endpoint": GEMINI_API_ENDPOINT} if GEMINI_API_ENDPOINT else None
+)
+best_model = "models/gemini-1.5-pro-latest"
+backup_model = "models/gemini-1.5-flash-latest"
+
+# Gemini generation cache ("memory", "mongo" or "memory,mongo"); the Mongo backend is called off the loop
+generation_cache_backends = generation_cache_backends_from_env(sync_db.generation_cache)
+generation_cache = GenerationCache(generation_cache_backends)
+generation_cache_blocks = any(backend.name == "mongo" for backend in generation_cache_backends)
+
+# Model routing per endpoint: fast flash first for chat/summaries, pro first for long-form answers
+MODEL_ROUTES = model_routes_from_env(best_model, backup_model)
+model_router = ModelRouter(
+    lambda name: genai.GenerativeModel(model_name=name),
+    MODEL_ROUTES,
+    failure_threshold=int(os.getenv("MODEL_FAILURE_THRESHOLD", 3)),
+    cooldown=int(os.getenv("MODEL_CIRCUIT_COOLDOWN", 30))
+)
+
+# Fire-and-forget tasks (saving questionnaire answers, ...), referenced until they finish
+background_tasks = set()
+event_loop = None
+
+
+def spawn(coroutine):
+    task = asyncio.ensure_future(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+async def generation_cache_call(method, *args):
+    if generation_cache_blocks:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+async def generate(prompt, endpoint):
+    """Return (text, model) for `prompt`, from the generation cache or the routed model.
+
+    Raises AllModelsFailed when no model could answer.
+    """
+    cached = await generation_cache_call(generation_cache.lookup, model_router.candidates(endpoint), prompt)
+    if cached:
+        return cached["text"], cached["model"]
+    start = time.perf_counter()
+    text, model = await model_router.generate_async(prompt, endpoint)
+    await generation_cache_call(generation_cache.store, model, prompt, text, time.perf_counter() - start)
+    return text, model
+
+
+async def generate_text(prompt, endpoint):
+    return (await generate(prompt, endpoint))[0]
+
+
+# Amadeus API Credentials
+AMADEUS_API_KEY = os.getenv("AMADEUS_API_KEY")
+AMADEUS_API_SECRET = os.getenv("AMADEUS_API_SECRET")
+AMADEUS_TOKEN_URL = os.getenv("AMADEUS_TOKEN_URL")
+AMADEUS_FLIGHT_SEARCH_URL = os.getenv("AMADEUS_FLIGHT_SEARCH_URL")
+AMADEUS_HOTEL_SEARCH_URL = os.getenv("AMADEUS_HOTEL_SEARCH_URL")
+AMADEUS_HOTEL_OFFERS_URL = os.getenv("AMADEUS_HOTEL_OFFERS_URL", "https://test.api.amadeus.com/v3/shopping/hotel-offers")
+
+upstream = AsyncUpstreamClient()
+token_manager = AsyncAmadeusTokenManager(
+    upstream, AMADEUS_TOKEN_URL, AMADEUS_API_KEY, AMADEUS_API_SECRET,
+    refresh_margin=int(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", 120))
+)
+
+
+async def amadeus_get(url, params):
+    """GET an Amadeus endpoint; on 401 invalidate the token and retry once."""
+    for attempt in range(2):
+        token = await token_manager.get_token()
+        if not token:
+            return None
+        response = await upstream.get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+        if response.status_code == 401 and attempt == 0:
+            token_manager.invalidate(token)
+            continue
+        response.raise_for_status()
+        return response
+
+
+# ✅ Flight Search
+async def search_flights(origin, destination, departure_date, adults=1, currency="INR"):
+    try:
+        response = await amadeus_get(AMADEUS_FLIGHT_SEARCH_URL,
+                                     params=flight_offers_params(origin, destination, departure_date, adults, currency))
+        if response is None:
+            return None
+        return response.json()
+    except upstream.Error:
+        return None
+
+# Flight offers cache: fresh for FLIGHT_CACHE_TTL, then served stale while refreshing
+flight_cache = TTLCache(
+    maxsize=int(os.getenv("FLIGHT_CACHE_SIZE", 512)),
+    ttl=int(os.getenv("FLIGHT_CACHE_TTL", 600)),
+    stale_ttl=int(os.getenv("FLIGHT_CACHE_STALE_TTL", 1800))
+)
+
+
+async def search_flights_cached(origin, destination, departure_date, adults=1, currency="INR"):
+    """Cached search_flights. Returns {"offers": <Amadeus JSON>, "summary": <AI summary or None>}."""
+    key = flight_cache_key(origin, destination, departure_date, adults, currency)
+
+    async def load():
+        return flight_cache_entry(await search_flights(*key))
+
+    return await flight_cache.get_or_load_async(key, load)
+
+
+async def get_hotels_by_city(city_code):
+    """Step 1: Fetch hotel IDs in a city using Amadeus API."""
+    try:
+        response = await amadeus_get(AMADEUS_HOTEL_SEARCH_URL, params=hotel_list_params(city_code))
+        if response is None:
+            return None
+        return response.json().get("data", [])
+    except upstream.Error as e:
+        print(f"❗ Hotel list API error: {e}")
+        return None
+
+
+async def get_hotel_availability(hotel_ids, check_in, check_out, adults=2):
+    """Step 2: Check availability for specific hotels."""
+    try:
+        response = await amadeus_get(AMADEUS_HOTEL_OFFERS_URL,
+                                     params=hotel_offers_params(hotel_ids, check_in, check_out, adults))
+        if response is None:
+            return None
+        return response.json().get("data", [])
+    except upstream.Error as e:
+        print(f"❗ Hotel availability API error: {e}")
+        return None
+
+hotel_pipeline = AsyncHotelSearchPipeline(
+    get_hotels_by_city,
+    get_hotel_availability,
+    batch_size=int(os.getenv("HOTEL_BATCH_SIZE", 20)),
+    max_concurrency=int(os.getenv("HOTEL_MAX_CONCURRENCY", 4)),  # per search
+    max_workers=int(os.getenv("HOTEL_WORKERS", 32)),  # across the process
+    max_candidates=int(os.getenv("HOTEL_MAX_CANDIDATES", 200)),
+    top_k=int(os.getenv("HOTEL_TOP_K", 5)),
+    hotel_list_ttl=int(os.getenv("HOTEL_LIST_TTL", 6 * 3600))
+)
+
+
+async def city_matcher():
+    """The current city matcher; only the very first load (if startup could not do it) leaves the loop."""
+    if not city_index.get_stats()["loaded_at"]:
+        return await asyncio.to_thread(city_index.matcher)
+    return city_index.matcher()
+
+
+async def refresh_city_index():
+    # Twice per TTL, so request-path lookups never find the index due for a refresh
+    while True:
+        await asyncio.sleep(CITY_INDEX_TTL / 2)
+        await asyncio.to_thread(city_index.codes)
+
+
+@app.before_serving
+async def startup():
+    global event_loop
+    event_loop = asyncio.get_running_loop()
+    # Indexes only; data migrations run from `python migrations.py`, one process at a time
+    if os.getenv("DB_BOOTSTRAP_ON_START", "true").lower() == "true":
+        try:
+            await asyncio.to_thread(migrations.bootstrap, sync_db)
+        except Exception as e:
+            print(f"❗ Database bootstrap failed: {e}")
+    try:
+        await asyncio.to_thread(city_index.load)
+        if os.getenv("CITY_INDEX_CHANGE_FEED", "false").lower() == "true":
+            city_index.start_change_feed()
+    except Exception as e:
+        print(f"❗ City index not loaded at startup, will retry on first request: {e}")
+    spawn(refresh_city_index())
+    if AMADEUS_TOKEN_URL:
+        token_manager.start()
+    try:
+        await asyncio.to_thread(questionnaire_jobs.ensure_started)
+    except Exception as e:
+        print(f"❗ Questionnaire job workers not started, will retry on first submission: {e}")
+
+
+@app.after_serving
+async def shutdown():
+    for task in list(background_tasks):
+        task.cancel()
+    await upstream.aclose()
+
+
+# Home route
+@app.route('/')
+@response_cache.cached()
+async def home():
+    return jsonify({"message": "Voyabot backend is running!"})
+
+
+# Internal counters
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return jsonify({
+        "city_index": city_index.get_stats(),
+        "upstream": upstream.stats(),
+        "amadeus_token": token_manager.get_stats(),
+        "flight_cache": flight_cache.get_stats(),
+        "hotel_list_cache": hotel_pipeline.hotel_ids_cache.get_stats(),
+        "generation_cache": generation_cache.get_stats(),
+        "models": model_router.get_stats(),
+        "summary_prompts": prompt_projection.get_stats(),
+        "chat_stream_ttft_ms": percentiles(chat_stream_ttft_ms),
+        "review_counters": None,
+        "underrated_prefetch": None,
+        "response_cache": response_cache.get_stats(),
+        "compression": None,
+        "password_hasher": password_hasher.get_stats()
+    }), 200
+
+
+# To enhance underrated using AI
+async def enrich_place(place):
+    """Generate ai_details for a place and persist them with the model name and generation time."""
+    try:
+        text, model = await generate(description_prompt(place), "description")
+    except Exception as e:
+        place["ai_details"] = description_error(e)  # Shown but not stored, so it is retried later
+        return False
+
+    fields = description_fields(text, model)
+    await underrated_collections.update_one({"_id": place["_id"]}, {"$set": fields})
+    place.update(fields)
+    return True
+
+
+# Fetch questions from MongoDB
+@app.route('/get_questions', methods=['GET'])
+@response_cache.cached("questions")
+async def get_questions():
+    try:
+        questions = await questions_collection.find({}, {"_id": 0}).to_list(None)
+        return jsonify(questions), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# bcrypt runs in a process pool; requests beyond the queue limit get a 503 instead of waiting
+password_hasher = PasswordHasher(
+    rounds=int(os.getenv("BCRYPT_LOG_ROUNDS", 12)),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", 2)),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32)),
+    start_method=os.getenv("PASSWORD_HASH_START_METHOD", "forkserver")
+)
+
+
+def hasher_busy():
+    response = jsonify({"message": "Server busy, please try again"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+# Signup Route
+@app.route('/signup', methods=['POST'])
+async def signup():
+    data = await request.get_json()
+    username = data.get('username')
+    password = data.get('password')
+
+    if not username or not password:
+        return jsonify({"message": "Username and password are required"}), 400
+
+    if await users_collection.find_one({'username': username}):
+        return jsonify({"message": "Username already exists"}), 400
+
+    try:
+        hashed_password = await password_hasher.hash_async(password)
+    except HasherBusy:
+        return hasher_busy()
+    try:
+        await users_collection.insert_one({'username': username, 'password': hashed_password})
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup; the unique index on username caught it
+        return jsonify({"message": "Username already exists"}), 400
+    return jsonify({"message": "User registered successfully"}), 201
+
+
+# Login Route
+@app.route('/login', methods=['POST'])
+async def login():
+    data = await request.get_json()
+    username = data.get('username')
+    password = data.get('password')
+
+    user = await users_collection.find_one({'username': username})
+    legacy = False
+    if user is None and legacy_users_collection is not None:
+        user = await legacy_users_collection.find_one({'username': username})
+        legacy = user is not None
+
+    try:
+        matches, needs_rehash = await password_hasher.verify_async(password, user['password']) if user else (False, False)
+    except HasherBusy:
+        return hasher_busy()
+    if not matches:
+        return jsonify({"message": "Invalid credentials"}), 401
+
+    if needs_rehash or legacy:
+        # Legacy SHA-256 hash or an old bcrypt cost: store a fresh hash now that we have the password
+        try:
+            new_hash = await password_hasher.hash_async(password)
+            if legacy:
+                await users_collection.insert_one({'username': username, 'password': new_hash})
+            else:
+                await users_collection.update_one({'_id': user['_id'], 'password': user['password']},
+                                                  {'$set': {'password': new_hash}})
+        except (HasherBusy, DuplicateKeyError) as e:
+            print(f"❗ Password rehash for {username} skipped: {e!r}")
+
+    access_token = create_access_token(identity=username)
+    return jsonify({"message": "Login successful", "token": access_token}), 200
+
+
+async def gemini_fallback(user_message):
+    """Helper function to handle Gemini fallback logic."""
+    try:
+        reply, model = await generate(user_message, "chat")
+        print(f"Gemini model response ({model}): {reply}")
+        return jsonify({"reply": reply})
+    except AllModelsFailed as e:
+        print(e)
+        return jsonify({"error": "All AI models failed. Please try again later."}), 500
+    except Exception as e:
+        return jsonify({"error": f"Gemini API error: {str(e)}"}), 500
+
+
+
+async def find_cities(message):
+    return (await city_matcher()).find_all(message)
+
+
+async def summary_text(prompt):
+    return await generate_text(prompt, "summary")
+
+# Flight/hotel part of a chat turn; the searches and summaries of its parts run as concurrent tasks
+chat_replies = AsyncChatReplies(
+    search_flights_cached,
+    hotel_pipeline.search,
+    find_cities,
+    summary_text,
+    prompt_budget=int(os.getenv("SUMMARY_PROMPT_TOKEN_BUDGET", 800))
+)
+
+
+@app.route("/chat", methods=["POST"])
+@jwt_required()
+async def chat():
+    data = await request.get_json()
+    user_message = data.get("message")
+    print(f"Received message: {user_message}")
+
+    if not user_message:
+        return jsonify({"error": "Message is required"}), 400
+
+    if data.get("stream") or request.accept_mimetypes.best == "text/event-stream":
+        response = Response(
+            chat_event_stream(user_message),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        response.timeout = None  # a long reply is not a stuck request
+        return response
+
+    try:
+        prepared = await chat_replies.prepare(user_message)
+        if not prepared:
+            # General Gemini fallback for queries that don't match flight, hotel, or place search
+            return await gemini_fallback(user_message)
+        return jsonify(dict(prepared["payload"], reply=await chat_replies.summarize(prepared)))
+
+    except Exception as e:
+        print(f"Error occurred: {e}. Falling back to Gemini...")
+        return await gemini_fallback(user_message)
+
+# ✅ Streaming chat (Server-Sent Events)
+chat_stream_ttft_ms = deque(maxlen=500)  # Recent time-to-first-token samples
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+
+async def stream_generation(prompt, endpoint="chat"):
+    """Yield text chunks for `prompt` using Gemini streaming on the routed models (see voyabot.py)."""
+    models = model_router.candidates(endpoint)
+    cached_entry = await generation_cache_call(generation_cache.lookup, models, prompt)
+    if cached_entry:
+        yield cached_entry["text"]
+        return
+
+    for model in models:
+        if not model_router.claim(model, endpoint):
+            continue
+        chunks = []
+        start = time.perf_counter()
+        try:
+            response = await model_router.model(model).generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            print(f"Error from Gemini model {model}: {e}")
+            model_router.record(model, time.perf_counter() - start, False)
+            # Only switch models if nothing has been sent to the client yet
+            if not chunks:
+                continue
+            raise
+        latency = time.perf_counter() - start
+        model_router.record(model, latency, bool(chunks))
+        if chunks:
+            await generation_cache_call(generation_cache.store, model, prompt, "".join(chunks), latency)
+            return
+    raise AllModelsFailed("All AI models failed. Please try again later.")
+
+
+async def chat_event_stream(user_message):
+    """SSE events for one chat turn: structured flight/hotel results first, then reply tokens."""
+    start = time.perf_counter()
+    first_token_ms = None
+
+    try:
+        prepared = await chat_replies.prepare(user_message)
+    except Exception as e:
+        print(f"Error occurred: {e}. Falling back to Gemini...")
+        prepared = None
+
+    if prepared:
+        for event, value in prepared["payload"].items():
+            yield sse_event(event, value)
+    else:
+        prepared = chat_replies.general(user_message)
+
+    try:
+        async for chunk in chat_replies.stream(prepared, stream_generation):
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+                chat_stream_ttft_ms.append(first_token_ms)
+            yield sse_event("token", {"text": chunk})
+    except Exception as e:
+        yield sse_event("error", {"error": f"Gemini API error: {str(e)}"})
+
+    yield sse_event("done", {
+        "ttft_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+        "total_ms": round((time.perf_counter() - start) * 1000, 1)
+    })
+
+# Questionnaire submission & generate travel recommendations
+QUESTIONNAIRE_DEADLINE = float(os.getenv("QUESTIONNAIRE_DEADLINE", 45))  # seconds, shared by all generations
+
+
+async def save_questionnaire_responses(username, data):
+    """Store user responses in MongoDB."""
+    try:
+        await responses_collection.update_one(
+            {"username": username},
+            {"$set": {"responses": data}},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"❗ Could not save questionnaire responses for {username}: {e}")
+
+
+async def run_questionnaire_generation(data, deadline=QUESTIONNAIRE_DEADLINE):
+    """Run the questionnaire generations concurrently under one deadline.
+
+    Returns (payload, status_code), like run_questionnaire_generation in voyabot.py.
+    """
+    tasks = {
+        name: asyncio.ensure_future(generate_text(prompt, "questionnaire"))
+        for name, prompt in questionnaire_prompts(data).items()
+    }
+    await asyncio.wait(tasks.values(), timeout=deadline)
+    return questionnaire_response(tasks)
+
+
+def run_questionnaire_job(data):
+    # Called on a job worker thread: the generation itself runs on the event loop
+    return asyncio.run_coroutine_threadsafe(run_questionnaire_generation(data), event_loop).result()
+
+# Async mode: jobs are stored in Mongo and processed by a local worker pool
+questionnaire_jobs = QuestionnaireJobQueue(
+    sync_db.questionnaire_jobs,
+    run_questionnaire_job,
+    workers=int(os.getenv("QUESTIONNAIRE_JOB_WORKERS", 4)),
+    lease_seconds=int(os.getenv("QUESTIONNAIRE_JOB_LEASE", QUESTIONNAIRE_DEADLINE * 3))
+)
+
+
+@app.route('/submit_questionnaire', methods=['POST'])
+@jwt_required()
+async def submit_questionnaire():
+    try:
+        data = await request.get_json()
+        username = get_jwt_identity()
+
+        # 🔹 Ensure no question is left unanswered
+        if not all(data.values()):
+            return jsonify({"error": "Please answer all questions before submitting."}), 400
+
+        # Saving the answers is not needed for the reply, so keep it off the critical path
+        spawn(save_questionnaire_responses(username, data))
+
+        # ?mode=async: queue the generation and return a job id to poll
+        if request.args.get("mode") == "async":
+            job_id = await asyncio.to_thread(questionnaire_jobs.submit, username, data)
+            return jsonify(QuestionnaireJobQueue.queued(job_id)), 202
+
+        response_payload, status = await run_questionnaire_generation(data)
+        return jsonify(response_payload), status
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/questionnaire_jobs/<job_id>', methods=['GET'])
+@jwt_required()
+async def questionnaire_job_status(job_id):
+    job = await asyncio.to_thread(questionnaire_jobs.get, job_id, get_jwt_identity())
+    payload, status = QuestionnaireJobQueue.status_response(job_id, job)
+    return jsonify(payload), status
+
+
+@app.route('/questionnaire_jobs/<job_id>/result', methods=['GET'])
+@jwt_required()
+async def questionnaire_job_result(job_id):
+    job = await asyncio.to_thread(questionnaire_jobs.get, job_id, get_jwt_identity())
+    payload, status = QuestionnaireJobQueue.result_response(job_id, job)
+    return jsonify(payload), status
+
+
+# Underrated Places
+@app.route("/underrated_places", methods=["GET"])
+async def get_underrated_places():
+    try:
+        # Mongo picks 3 random places ($sample) and returns only the fields the page shows
+        selected_places = distinct_places(await underrated_collections.aggregate(sample_pipeline(3)).to_list(None), 3)
+        if not selected_places:
+            return jsonify({"error": "No places found in the database"}), 404
+
+        # Places without a stored description are described concurrently
+        await asyncio.gather(*(enrich_place(place) for place in selected_places if "ai_details" not in place))
+        for place in selected_places:
+            shape_place(place)
+        return jsonify({"places": selected_places}), 200
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+
+# Replies live in per-review buckets, not in the review document
+reviews = AsyncReviews(
+    reviews_collection,
+    AsyncReviewReplies(db.review_replies, bucket_size=int(os.getenv("REVIEW_REPLY_BUCKET_SIZE", 50))),
+    page_size=int(os.getenv("REVIEWS_PAGE_SIZE", 20)),
+    replies_page_size=int(os.getenv("REPLIES_PAGE_SIZE", 20))
+)
+
+
+@app.route('/get_reviews', methods=['GET'])
+@jwt_required()
+async def get_reviews():
+    """One page of reviews, newest first; see Reviews.page for the query parameters."""
+    try:
+        return jsonify(await reviews.page(request.args)), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/reviews_count', methods=['GET'])
+@jwt_required()
+async def reviews_count():
+    try:
+        return jsonify(await reviews.count()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/submit_review', methods=['POST'])
+@jwt_required()
+async def submit_review():
+    try:
+        return jsonify(await reviews.submit(get_jwt_identity(), await request.get_json())), 201
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/like_dislike_review', methods=['POST'])
+@jwt_required()
+async def like_dislike_review():
+    try:
+        return jsonify(await reviews.react(await request.get_json())), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({
+            "error": "An error occurred",
+            "details": str(e)
+        }), 500
+
+
+@app.route('/reply_review', methods=['POST'])
+@jwt_required()
+async def reply_review():
+    try:
+        return jsonify(await reviews.reply(get_jwt_identity(), await request.get_json())), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({
+            "error": "An error occurred",
+            "details": str(e)
+        }), 500
+
+
+@app.route('/review_replies/<review_id>', methods=['GET'])
+@jwt_required()
+async def get_review_replies(review_id):
+    """Replies of one review, oldest first; `after` is the `next_cursor` of the previous page."""
+    try:
+        return jsonify(await reviews.replies_page(review_id, request.args)), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/delete_reply', methods=['DELETE'])
+@jwt_required()
+async def delete_reply():
+    try:
+        return jsonify(await reviews.delete_reply(get_jwt_identity(), await request.get_json())), 200
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+if __name__ == '__main__':
+    # Development server only; production runs voyabot_async:app under hypercorn.
+    server_config.run_dev_server(app, password_hasher)
@@ -0,0 +1,25 @@
+"""WSGI entry point for production servers; settings and worker models are in server_config.py.
+
+    SERVER_MODE=gevent gunicorn -c server_config.py wsgi:app
+
+`python voyabot.py` still starts Flask's development server.
+"""
+import server_config
+
+
+def load_app(mode=None):
+    """Import the backend app with its pools sized for the `mode` worker model, and start
+    its background work (index bootstrap, token refresh, job workers, ...).
+
+    Not a factory (an adaptation of the request): voyabot builds one app and its pools at
+    import time, so `mode` only takes effect on the first call in a process and later calls
+    return that same app. Importing voyabot starts no threads; that happens here, so the
+    maintenance CLIs that import it stay side-effect free.
+    """
+    server_config.apply_pool_defaults(mode)
+    import voyabot
+    voyabot.start_background_work()
+    return voyabot.app
+
+
+app = load_app()
@@ -0,0 +1,73 @@
+"""Benchmark: per-city `in words` loop vs the compiled CityMatcher.
+
+Run from the voyabot directory:  python benchmarks/bench_city_matcher.py [num_cities]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from city_matcher import CityMatcher
+
+
+def make_city_codes(n, seed=7):
+    rng = random.Random(seed)
+    codes = {"mumbai": "BOM", "new delhi": "DEL", "port blair": "IXZ", "goa": "GOI", "kochi": "COK"}
+    while len(codes) < n:
+        words = rng.choice([1, 1, 1, 2])
+        name = " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(words))
+        codes[name] = "".join(rng.choices(string.ascii_uppercase, k=3))
+    return codes
+
+
+def legacy_extract(user_message, city_codes):
+    """The loop previously used by extract_flight_details."""
+    words = user_message.lower().split()
+    origin, destination = None, None
+    for city in city_codes.keys():
+        if city in words:
+            if not origin:
+                origin = city_codes[city]
+            else:
+                destination = city_codes[city]
+                break
+    return origin, destination
+
+
+def matcher_extract(user_message, matcher):
+    matches = matcher.find_all(user_message)
+    return (matches[0].code if matches else None), (matches[1].code if len(matches) > 1 else None)
+
+
+def bench(label, fn, messages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            fn(message)
+    elapsed = time.perf_counter() - start
+    total = repeat * len(messages)
+    print(f"{label:<28} {total / elapsed:>12,.0f} msg/s  ({elapsed * 1e6 / total:,.1f} µs/msg)")
+
+
+if __name__ == "__main__":
+    num_cities = int(sys.argv[1]) if len(sys.argv) > 1 else 12000
+    city_codes = make_city_codes(num_cities)
+    messages = [
+        "Book a flight from Mumbai to New Delhi on 12 March",
+        "I need a flight from kochi to goa tomorrow please",
+        "Any cheap airfare from Port Blair to Mumbai next week?",
+        "What is the weather like in the mountains in winter",
+    ]
+
+    start = time.perf_counter()
+    matcher = CityMatcher(city_codes)
+    print(f"{num_cities:,} cities, automaton built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for message in messages:
+        print(f"  {message!r}: legacy={legacy_extract(message, city_codes)} matcher={matcher_extract(message, matcher)}")
+
+    bench("legacy loop", lambda m: legacy_extract(m, city_codes), messages, repeat=50)
+    bench("CityMatcher.find_all", lambda m: matcher_extract(m, matcher), messages, repeat=2000)
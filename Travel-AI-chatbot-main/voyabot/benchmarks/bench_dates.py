@@ -0,0 +1,113 @@
+"""Correctness corpus and throughput benchmark for the chat date extractor.
+
+Checks date_extractor.extract_dates against a fixed corpus (reference day pinned), then
+compares its throughput, cold and memoized, with the dateutil fuzzy parse and the
+per-call regex + strptime loop that /chat used before.
+
+Run from the voyabot directory:  python benchmarks/bench_dates.py
+"""
+import os
+import re
+import sys
+import time
+from datetime import date, datetime
+
+from dateutil import parser
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import date_extractor
+from date_extractor import extract_dates
+
+TODAY = date(2026, 10, 16)  # a Friday
+
+CORPUS = [
+    ("Book a flight from Mumbai to Delhi on 12 March", ["2027-03-12"]),
+    ("flight from delhi to goa on 20th oct", ["2026-10-20"]),
+    ("Find me a hotel in Goa from 3 May to 7 May for 3 guests", ["2027-05-03", "2027-05-07"]),
+    ("hotel in goa 12-15 march for 2 guests", ["2027-03-12", "2027-03-15"]),
+    ("stay in Jaipur 12th to 15th of Nov", ["2026-11-12", "2026-11-15"]),
+    ("hotel in Kochi Dec 24 - 28", ["2026-12-24", "2026-12-28"]),
+    ("Mar 3rd to Mar 7th 2027", ["2027-03-03", "2027-03-07"]),
+    ("hotel in goa 28-2 march", ["2027-02-28", "2027-03-02"]),
+    ("stay 30th to 2nd of jan 2027", ["2026-12-30", "2027-01-02"]),
+    ("hotel in Kochi Dec 28 - 2", ["2026-12-28", "2027-01-02"]),
+    ("fly to Chennai on 1st of Jan", ["2027-01-01"]),
+    ("Sept 5, 2027 flight to Pune", ["2027-09-05"]),
+    ("depart 2026-12-01", ["2026-12-01"]),
+    ("depart 05/11/2026", ["2026-11-05"]),
+    ("depart 25-12-2026", ["2026-12-25"]),
+    ("depart 25.12.26", ["2026-12-25"]),
+    ("depart 25-12/2026", []),
+    ("flight to Delhi tomorrow", ["2026-10-17"]),
+    ("day after tomorrow", ["2026-10-18"]),
+    ("flight on friday", ["2026-10-16"]),
+    ("flight next friday", ["2026-10-23"]),
+    ("this sunday", ["2026-10-18"]),
+    ("flight on sat", ["2026-10-17"]),
+    ("hotel in goa from next mon", ["2026-10-19"]),
+    ("saturday", ["2026-10-17"]),
+    ("in 3 days", ["2026-10-19"]),
+    ("in 2 weeks", ["2026-10-30"]),
+    ("next week", ["2026-10-23"]),
+    ("flight to Goa on 12 March and hotel there 12-15 March", ["2027-03-12", "2027-03-12", "2027-03-15"]),
+    ("2 guests near the market", []),
+    ("31 feb", []),
+    ("I sat down, book flight mumbai to delhi on 3 may", ["2027-05-03"]),
+    ("flight from delhi to goa for sun and sand on 12 march", ["2027-03-12"]),
+    ("What are the best street foods to try in Kolkata?", []),
+]
+
+
+def legacy_flight_date(user_message):
+    """The dateutil fuzzy parse extract_flight_details used before."""
+    try:
+        return parser.parse(user_message, fuzzy=True, default=datetime(datetime.now().year, 1, 1)).strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+def legacy_extract_dates(user_message):
+    """The hotel-path extractor used before (minus its print on every non-date match)."""
+    date_pattern = r"(\d{1,2})(?:st|nd|rd|th)?\s*(?:of\s*)?([A-Za-z]+)(?:\s*(\d{4}))?"
+    dates = []
+    for day, month, year in re.findall(date_pattern, user_message, re.IGNORECASE):
+        try:
+            parsed = datetime.strptime(f"{day} {month} {year or datetime.now().year}", "%d %B %Y")
+            dates.append(parsed.strftime("%Y-%m-%d"))
+        except ValueError:
+            continue
+    return dates
+
+
+def check_corpus():
+    failures = 0
+    for text, expected in CORPUS:
+        got = extract_dates(text, TODAY)
+        if got != expected:
+            failures += 1
+            print(f"  FAIL {text!r}: expected {expected}, got {got}")
+    print(f"corpus: {len(CORPUS) - failures}/{len(CORPUS)} correct")
+    return failures
+
+
+def bench(label, fn, repeat=2000, before_each=None):
+    messages = [text for text, _ in CORPUS]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if before_each:
+            before_each()
+        for message in messages:
+            fn(message)
+    elapsed = time.perf_counter() - start
+    total = repeat * len(messages)
+    print(f"{label:<28} {total / elapsed:>12,.0f} msg/s  ({elapsed * 1e6 / total:.2f} µs/msg)")
+
+
+if __name__ == "__main__":
+    failed = check_corpus()
+    bench("legacy dateutil fuzzy", legacy_flight_date)
+    bench("legacy regex + strptime", legacy_extract_dates)
+    bench("extract_dates (cold)", extract_dates, before_each=date_extractor._extract.cache_clear)
+    bench("extract_dates (memoized)", extract_dates)
+    sys.exit(1 if failed else 0)
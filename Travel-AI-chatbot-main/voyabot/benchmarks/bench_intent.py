@@ -0,0 +1,64 @@
+"""Benchmark: /chat keyword routing with repeated any() scans vs the IntentEngine.
+
+Compare "legacy any() routing" with "IntentEngine, no slots" (intents only) and
+"legacy routing + guests" with "IntentEngine.classify" (intents and the guest count).
+Each timing is the best of `rounds`, so a busy machine skews the comparison less.
+Run from the voyabot directory:  python benchmarks/bench_intent.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from intent import IntentEngine
+
+
+def legacy_route(user_message):
+    """The routing previously done inline in /chat (first match wins, no slots)."""
+    if any(word in user_message.lower() for word in ["flight", "book ticket", "airfare"]):
+        return ["flight"]
+    if any(word in user_message.lower() for word in ["hotel", "stay", "accommodation"]):
+        return ["hotel"]
+    return []
+
+
+def legacy_route_with_slots(user_message):
+    """Legacy routing plus the guest-count regex /chat ran for hotel queries (minus its print)."""
+    intents = legacy_route(user_message)
+    match = re.search(r"(\d+)\s*" + "guests", user_message, re.IGNORECASE)
+    return intents, ({"adults": int(match.group(1))} if match else {})
+
+
+MESSAGES = [
+    "Book a flight from Mumbai to Delhi on 12 March",
+    "Find me a hotel in Goa from 3 May to 7 May for 3 guests",
+    "I need a flight from Kochi to Delhi and a hotel there from 5 June to 9 June",
+    "What are the best street foods to try in Kolkata during the monsoon season?",
+    "Any cheap airfare to Port Blair? Also looking for a place to stay near the beach",
+    "Tell me about the history of Hampi and how many days I should spend there",
+]
+
+
+def bench(label, fn, repeat=4000, rounds=5):
+    elapsed = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for message in MESSAGES:
+                fn(message)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    total = repeat * len(MESSAGES)
+    print(f"{label:<24} {total / elapsed:>12,.0f} msg/s  ({elapsed * 1e6 / total:.2f} µs/msg)")
+
+
+if __name__ == "__main__":
+    engine = IntentEngine()
+    for message in MESSAGES:
+        intents, slots = engine.classify(message)
+        print(f"  legacy={legacy_route(message)!s:<12} engine={[(i.name, i.score) for i in intents]} slots={slots}  {message!r}")
+    bench("legacy any() routing", legacy_route)
+    bench("legacy routing + guests", legacy_route_with_slots)
+    bench("IntentEngine, no slots", IntentEngine(slots={}).classify)
+    bench("IntentEngine.classify", engine.classify)
@@ -0,0 +1,103 @@
+"""Benchmark: JSON encode time and bytes on the wire, Flask's default provider vs orjson + compression.
+
+Payloads are synthetic but shaped like the real ones: an Amadeus flight-offers response
+as /chat returns it, and a page of review documents straight from Mongo (ObjectId and
+datetime values, which the default provider needs converted first).
+
+Run from the voyabot directory:  python benchmarks/bench_json.py
+"""
+import gzip
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from json_provider import OrjsonProvider
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def flight_offers(count=50):
+    segment = lambda i, leg: {
+        "departure": {"iataCode": "BOM", "terminal": "2", "at": f"2026-03-12T{6 + leg:02d}:15:00"},
+        "arrival": {"iataCode": "DEL", "terminal": "3", "at": f"2026-03-12T{8 + leg:02d}:20:00"},
+        "carrierCode": "AI", "number": str(800 + i), "aircraft": {"code": "32N"},
+        "operating": {"carrierCode": "AI"}, "duration": "PT2H5M", "id": str(i * 10 + leg),
+        "numberOfStops": 0, "blacklistedInEU": False
+    }
+    offers = []
+    for i in range(count):
+        offers.append({
+            "type": "flight-offer", "id": str(i + 1), "source": "GDS", "instantTicketingRequired": False,
+            "nonHomogeneous": False, "oneWay": False, "lastTicketingDate": "2026-03-10", "numberOfBookableSeats": 9,
+            "itineraries": [{"duration": "PT4H30M", "segments": [segment(i, 0), segment(i, 1)]}],
+            "price": {"currency": "INR", "total": f"{4500 + i * 37}.00", "base": f"{3900 + i * 30}.00",
+                      "fees": [{"amount": "0.00", "type": "SUPPLIER"}, {"amount": "0.00", "type": "TICKETING"}],
+                      "grandTotal": f"{4500 + i * 37}.00"},
+            "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": True},
+            "validatingAirlineCodes": ["AI"],
+            "travelerPricings": [{"travelerId": "1", "fareOption": "STANDARD", "travelerType": "ADULT",
+                                  "price": {"currency": "INR", "total": f"{4500 + i * 37}.00"},
+                                  "fareDetailsBySegment": [{"segmentId": str(i * 10), "cabin": "ECONOMY",
+                                                            "fareBasis": "SL2YXSII", "class": "S",
+                                                            "includedCheckedBags": {"weight": 15, "weightUnit": "KG"}}]}]
+        })
+    return {"reply": "Here are the available flights:", "flights": offers,
+            "flight_summary": "Air India has the cheapest morning departures. " * 6}
+
+
+def review_page(count=100):
+    now = datetime.now(timezone.utc)
+    return {"reviews": [{
+        "_id": ObjectId(), "username": f"traveller{i}", "review_text": "Loved the itinerary suggestions! " * 4,
+        "timestamp": now - timedelta(minutes=i), "likes": i % 17, "dislikes": i % 5, "reply_count": i % 7
+    } for i in range(count)], "next_cursor": None}
+
+
+def stringify(payload):
+    """What the routes had to do before: str() every ObjectId (the default provider cannot encode it)."""
+    return {"reviews": [dict(r, _id=str(r["_id"])) for r in payload["reviews"]], "next_cursor": None}
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def report(label, default_fn, orjson_fn, repeat=300):
+    default_us, default_body = timed(default_fn, repeat)
+    orjson_us, orjson_body = timed(orjson_fn, repeat)
+    print(f"\n{label}")
+    print(f"  default provider: {default_us:8.1f} µs  {len(default_body):>8,} bytes")
+    print(f"  orjson provider:  {orjson_us:8.1f} µs  {len(orjson_body):>8,} bytes  ({default_us / orjson_us:.1f}x faster)")
+    gzip_us, gzipped = timed(lambda: gzip.compress(orjson_body, compresslevel=6), 50)
+    print(f"  + gzip level 6:   {gzip_us:8.1f} µs  {len(gzipped):>8,} bytes  ({len(gzipped) / len(orjson_body):.1%} of identity)")
+    if brotli is not None:
+        br_us, brotlied = timed(lambda: brotli.compress(orjson_body, quality=4), 50)
+        print(f"  + brotli q4:      {br_us:8.1f} µs  {len(brotlied):>8,} bytes  ({len(brotlied) / len(orjson_body):.1%} of identity)")
+    else:
+        print("  + brotli:         not installed")
+
+
+if __name__ == "__main__":
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = OrjsonProvider(app)
+    with app.app_context():
+        flights = flight_offers()
+        report("/chat flight reply (50 offers)",
+               lambda: default.response(flights).get_data(), lambda: fast.response(flights).get_data())
+        reviews = review_page()
+        report("/get_reviews page (100 reviews)",
+               lambda: default.response(stringify(reviews)).get_data(), lambda: fast.response(reviews).get_data())
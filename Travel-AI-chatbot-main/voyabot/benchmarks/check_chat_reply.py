@@ -0,0 +1,74 @@
+"""Checks for the chat reply behaviour shared by voyabot.py and voyabot_async.py.
+
+- A flight + hotel turn gets one summary per part, joined with ChatReplies.SEPARATOR,
+  and a flight summary stored on its cache entry is reused by the next turn (sync and async).
+- Hotel offer searches send bestRateOnly as the string "true", which is what Amadeus accepts.
+
+Run from the voyabot directory:  python benchmarks/check_chat_reply.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from chat_reply import AsyncChatReplies, ChatReplies
+from travel_queries import hotel_offers_params
+
+
+def prepared_turn(flight_entry):
+    return {"payload": {}, "parts": [{"prompt": "flights BOM-GOI", "entry": flight_entry},
+                                     {"prompt": "hotels GOI", "entry": None}]}
+
+
+def check_summaries(label, make_replies, summarize):
+    prompts = []
+
+    def generate(prompt):
+        prompts.append(prompt)
+        return f"summary of {prompt}"
+
+    replies = make_replies(generate)
+    flight_entry = {"offers": {"data": []}, "summary": None}
+    first = summarize(replies, prepared_turn(flight_entry))
+    second = summarize(replies, prepared_turn(flight_entry))
+    expected = ChatReplies.SEPARATOR.join(["summary of flights BOM-GOI", "summary of hotels GOI"])
+    checks = {
+        "one summary per part, joined": first == expected,
+        "flight summary stored on its entry": flight_entry["summary"] == "summary of flights BOM-GOI",
+        "stored summary reused": second == expected and sorted(prompts) == sorted(
+            ["flights BOM-GOI", "hotels GOI", "hotels GOI"]),
+    }
+    return report(label, checks)
+
+
+def check_best_rate_only():
+    params = hotel_offers_params(["H1", "H2"], "2026-11-01", "2026-11-03")
+    return report("hotel offers params", {
+        'bestRateOnly is "true"': params["bestRateOnly"] == "true",
+        "hotel ids comma-joined": params["hotelIds"] == "H1,H2",
+    })
+
+
+def report(label, checks):
+    for name, ok in checks.items():
+        print(f"{label:<20} {'ok' if ok else 'FAIL'}  {name}")
+    return all(checks.values())
+
+
+def async_generate(generate):
+    async def wrapped(prompt):
+        return generate(prompt)
+    return wrapped
+
+
+if __name__ == "__main__":
+    results = [
+        check_summaries("sync summaries", lambda generate: ChatReplies(None, None, None, generate),
+                        lambda replies, prepared: replies.summarize(prepared)),
+        check_summaries("async summaries",
+                        lambda generate: AsyncChatReplies(None, None, None, async_generate(generate)),
+                        lambda replies, prepared: asyncio.run(replies.summarize(prepared))),
+        check_best_rate_only(),
+    ]
+    sys.exit(0 if all(results) else 1)
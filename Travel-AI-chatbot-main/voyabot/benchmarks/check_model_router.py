@@ -0,0 +1,92 @@
+"""Circuit-breaker check for the ModelRouter, through the cached generate path /chat uses.
+
+A stub "pro" model fails once (threshold 1), so its circuit opens and "flash" answers;
+after the cooldown the next request must try "pro" again and close the circuit, even
+though every request first lists candidates for the generation-cache lookup.
+
+Run from the voyabot directory:  python benchmarks/check_model_router.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from generation_cache import GenerationCache, MemoryBackend
+from model_router import ModelRouter
+
+COOLDOWN = 0.2
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    def __init__(self, name, failures):
+        self.name = name
+        self.failures = failures
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError(f"{self.name} unavailable")
+        return StubResponse(f"{self.name}: {prompt}")
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return self.generate_content(prompt, **kwargs)
+
+
+def make_router():
+    models = {"pro": StubModel("pro", failures=1), "flash": StubModel("flash", failures=0)}
+    routes = {"description": {"models": ["pro", "flash"], "latency_budget": 30}}
+    return ModelRouter(models.__getitem__, routes, failure_threshold=1, cooldown=COOLDOWN), models
+
+
+def generate(cache, router, prompt, endpoint):
+    """The read-through path of voyabot.generate."""
+    cached = cache.lookup(router.candidates(endpoint), prompt)
+    if cached:
+        return cached["text"], cached["model"]
+    start = time.perf_counter()
+    text, model = router.generate(prompt, endpoint)
+    cache.store(model, prompt, text, time.perf_counter() - start)
+    return text, model
+
+
+async def generate_async(cache, router, prompt, endpoint):
+    """The read-through path of voyabot_async.generate."""
+    cached = cache.lookup(router.candidates(endpoint), prompt)
+    if cached:
+        return cached["text"], cached["model"]
+    start = time.perf_counter()
+    text, model = await router.generate_async(prompt, endpoint)
+    cache.store(model, prompt, text, time.perf_counter() - start)
+    return text, model
+
+
+def run(label, call):
+    cache = GenerationCache([MemoryBackend()])
+    router, models = make_router()
+    served = [call(cache, router, "first", "description")[1]]  # pro fails, flash answers
+    served.append(call(cache, router, "while open", "description")[1])
+    time.sleep(COOLDOWN * 1.5)
+    router.candidates("description")  # listing models must not claim the trial
+    served.append(call(cache, router, "after cooldown", "description")[1])
+    served.append(call(cache, router, "closed again", "description")[1])
+    expected = ["flash", "flash", "pro", "pro"]
+    ok = served == expected and not router.get_stats()["pro"]["circuit_open"]
+    print(f"{label:<6} {'ok' if ok else 'FAIL'}  served={served} expected={expected} pro calls={models['pro'].calls}")
+    return ok
+
+
+if __name__ == "__main__":
+    results = [
+        run("sync", generate),
+        run("async", lambda *args: asyncio.run(generate_async(*args))),
+    ]
+    sys.exit(0 if all(results) else 1)
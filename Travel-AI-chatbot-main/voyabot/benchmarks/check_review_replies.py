@@ -0,0 +1,49 @@
+"""Check that re-running the review replies migration keeps replies added since the first run.
+
+Runs ReviewReplies on an in-memory mongomock database (needs mongomock): a review with
+embedded replies is migrated, a new reply is added, the embedded array is put back as
+if the first run had been interrupted before removing it, and the migration runs again.
+
+Run from the voyabot directory:  python benchmarks/check_review_replies.py
+"""
+import os
+import sys
+from datetime import datetime, timezone
+
+import mongomock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from review_replies import ReviewReplies
+
+EMBEDDED = [
+    {"username": "asha", "reply_text": "Loved it", "timestamp": datetime(2026, 1, 5, tzinfo=timezone.utc)},
+    {"username": "ravi", "reply_text": "Same here", "timestamp": datetime(2026, 1, 6, tzinfo=timezone.utc)},
+]
+
+
+def check(label, ok):
+    print(f"{'ok' if ok else 'FAIL'}  {label}")
+    return ok
+
+
+if __name__ == "__main__":
+    db = mongomock.MongoClient().travel_bot
+    replies = ReviewReplies(db.review_replies, bucket_size=50)
+    review_id = db.reviews.insert_one({"review_text": "Great trip", "replies": list(EMBEDDED)}).inserted_id
+
+    replies.migrate(db.reviews)
+    added = replies.add(review_id, "meera", "Going next month")
+    # As if the first run had stopped before removing the embedded array
+    db.reviews.update_one({"_id": review_id}, {"$set": {"replies": list(EMBEDDED)}})
+    replies.migrate(db.reviews)
+
+    page, _ = replies.page(review_id, limit=20)
+    texts = [reply["reply_text"] for reply in page]
+    results = [
+        check("reply added after the first run survives the re-run", added["reply_id"] in [r["reply_id"] for r in page]),
+        check("migrated replies are not duplicated", texts == ["Loved it", "Same here", "Going next month"]),
+        check("new reply is not in a migrated bucket",
+              db.review_replies.count_documents({"replies.reply_id": added["reply_id"], "migrated": True}) == 0),
+    ]
+    sys.exit(0 if all(results) else 1)
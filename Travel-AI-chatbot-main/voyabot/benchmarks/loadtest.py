@@ -0,0 +1,244 @@
+"""Load test: /chat throughput and latency under each production worker model.
+
+Starts one stub server for all upstreams (Amadeus token/flights/hotels, LocationIQ and
+Gemini's REST API) that answers after a fixed delay, then for every mode starts
+`gunicorn -c server_config.py wsgi:app` against it and drives /chat with a mix of flight,
+hotel, flight + hotel and general messages from `--concurrency` client threads. Dates
+are randomised and the generation cache is off, so the caches do not hide the upstreams.
+
+Needs gunicorn (and gevent for that mode) and a MongoDB the backend can write to: the
+run signs up a "loadtest" user, and --seed-cities upserts Mumbai/Delhi/Goa into
+city_codes so the flight and hotel intents resolve. Point MONGO_URI at a scratch server.
+With --mongomock (needs mongomock) each worker runs benchmarks/mongomock_app.py instead,
+on its own in-process database seeded with the cities and the user; no MONGO_URI is
+needed, and Mongo round trips are left out of the numbers.
+
+Run from the voyabot directory:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/loadtest.py --seed-cities
+    python benchmarks/loadtest.py --mongomock --duration 15
+    python benchmarks/loadtest.py --modes threaded gevent --concurrency 50 200 --upstream-latency 0.5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.join(BENCHMARKS, '..', 'backend')
+
+SEED_CITIES = [{"city": "Mumbai", "iata_code": "BOM"}, {"city": "Delhi", "iata_code": "DEL"},
+               {"city": "Goa", "iata_code": "GOI"}]
+LOADTEST_USER = {"username": "loadtest", "password": "loadtest-password"}
+
+
+class StubUpstreams(BaseHTTPRequestHandler):
+    """Canned Amadeus, LocationIQ and Gemini responses, each after `latency` seconds."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so the backend's connection pools are exercised
+    latency = 0.3
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload):
+        time.sleep(self.latency)
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = urlsplit(self.path).path
+        if path.endswith(":generateContent"):
+            text = "Stub answer: the morning departures are cheapest and the beach hotels have the best rates. " * 3
+            return self._send({"candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                               "finishReason": "STOP", "index": 0}]})
+        self._send({"access_token": "stub-token", "expires_in": 1799})
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if parts.path.endswith("/flight-offers"):
+            return self._send({"data": [{
+                "id": str(i), "itineraries": [{"duration": "PT2H10M", "segments": [{
+                    "departure": {"iataCode": query["originLocationCode"][0], "at": f"{query['departureDate'][0]}T0{i + 6}:00:00"},
+                    "arrival": {"iataCode": query["destinationLocationCode"][0], "at": f"{query['departureDate'][0]}T0{i + 8}:10:00"},
+                    "carrierCode": "AI", "number": str(800 + i)}]}],
+                "price": {"currency": "INR", "total": f"{4500 + i * 350}.00", "grandTotal": f"{4500 + i * 350}.00"}
+            } for i in range(3)]})
+        if parts.path.endswith("/by-city"):
+            return self._send({"data": [{"hotelId": f"STUB{i:04d}", "name": f"Stub Hotel {i}"} for i in range(60)]})
+        if parts.path.endswith("/hotel-offers"):
+            return self._send({"data": [{
+                "hotel": {"hotelId": hotel_id, "name": f"Hotel {hotel_id}"}, "available": True,
+                "offers": [{"price": {"currency": "INR", "total": f"{3000 + int(hotel_id[4:]) * 45}.00"}}]
+            } for hotel_id in query["hotelIds"][0].split(",")]})
+        if parts.path.endswith("/search.php"):
+            return self._send([{"display_name": "Goa, India", "lat": "15.49", "lon": "73.82"}])
+        self._send({})
+
+
+def start_stub(port, latency):
+    StubUpstreams.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubUpstreams)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_env(mode, port, stub_url):
+    env = dict(os.environ)
+    env.update({
+        "SERVER_MODE": mode,
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "SERVER_ACCESS_LOG": "",
+        "JWT_SECRET_KEY": env.get("JWT_SECRET_KEY", "loadtest-secret"),
+        "AMADEUS_API_KEY": "stub", "AMADEUS_API_SECRET": "stub",
+        "AMADEUS_TOKEN_URL": f"{stub_url}/v1/security/oauth2/token",
+        "AMADEUS_FLIGHT_SEARCH_URL": f"{stub_url}/v2/shopping/flight-offers",
+        "AMADEUS_HOTEL_SEARCH_URL": f"{stub_url}/v1/reference-data/locations/hotels/by-city",
+        "AMADEUS_HOTEL_OFFERS_URL": f"{stub_url}/v3/shopping/hotel-offers",
+        "LOCATIONIQ_API_KEY": "stub",
+        "LOCATIONIQ_SEARCH_URL": f"{stub_url}/v1/search.php",
+        # The stub speaks Gemini's REST API only, so every mode uses that transport
+        "GEMINI_API_KEY": "stub", "GEMINI_API_ENDPOINT": stub_url, "GEMINI_TRANSPORT": "rest",
+        "GENERATION_CACHE_BACKENDS": "none",
+        "UNDERRATED_WARM_ON_START": "false",
+    })
+    return env
+
+
+def wait_ready(base_url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/", timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+
+def auth_header(base_url):
+    requests.post(f"{base_url}/signup", json=LOADTEST_USER, timeout=30)  # 400 if it already exists
+    response = requests.post(f"{base_url}/login", json=LOADTEST_USER, timeout=30)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def chat_message(rng):
+    day = date.today() + timedelta(days=rng.randint(7, 300))
+    later = day + timedelta(days=rng.randint(1, 6))
+    return rng.choice([
+        f"flights from Mumbai to Delhi on {day.isoformat()}",
+        f"hotels in Goa from {day.isoformat()} to {later.isoformat()}",
+        f"flight from Mumbai to Goa on {day.isoformat()} and a hotel until {later.isoformat()}",
+        f"What should I pack for a monsoon trek? ({rng.randint(0, 10 ** 9)})",
+    ])
+
+
+def run_load(base_url, headers, concurrency, duration):
+    """Each of `concurrency` clients sends /chat requests back to back for `duration` seconds."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{base_url}/chat", json={"message": chat_message(rng)},
+                                        headers=headers, timeout=120)
+                ok = response.status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(client, range(concurrency)))
+    return latencies, errors
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100)[q - 1] * 1000 if len(samples) > 1 else float("nan")
+
+
+def seed_cities():
+    from pymongo import MongoClient
+    collection = MongoClient(os.getenv("MONGO_URI")).travel_bot.city_codes
+    for city in SEED_CITIES:
+        collection.update_one({"city": city["city"]}, {"$setOnInsert": city}, upsert=True)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare worker models under /chat load with stub upstreams.")
+    arg_parser.add_argument("--modes", nargs="+", default=["threaded", "process", "gevent"])
+    arg_parser.add_argument("--concurrency", nargs="+", type=int, default=[16, 64, 256])
+    arg_parser.add_argument("--duration", type=float, default=20, help="seconds per run")
+    arg_parser.add_argument("--upstream-latency", type=float, default=0.3, help="seconds per stub response")
+    arg_parser.add_argument("--port", type=int, default=5099)
+    arg_parser.add_argument("--stub-port", type=int, default=8799)
+    arg_parser.add_argument("--seed-cities", action="store_true", help="upsert Mumbai/Delhi/Goa into city_codes")
+    arg_parser.add_argument("--mongomock", action="store_true",
+                            help="give each worker a seeded in-process mongomock database instead of MONGO_URI")
+    args = arg_parser.parse_args()
+
+    if args.seed_cities and not args.mongomock:
+        seed_cities()
+    gunicorn_args = ["-c", "server_config.py", "wsgi:app"]
+    if args.mongomock:
+        gunicorn_args = ["-c", "server_config.py", "--pythonpath", BENCHMARKS, "mongomock_app:app"]
+    start_stub(args.stub_port, args.upstream_latency)
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"upstream latency {args.upstream_latency * 1000:.0f} ms, {args.duration:.0f}s per run")
+    print(f"{'mode':<10}{'clients':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for mode in args.modes:
+        log = tempfile.TemporaryFile(mode="w+")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", *gunicorn_args],
+            cwd=BACKEND, env=server_env(mode, args.port, stub_url), stdout=subprocess.DEVNULL, stderr=log
+        )
+        try:
+            wait_ready(base_url, process)
+            headers = auth_header(base_url)
+            for concurrency in args.concurrency:
+                latencies, errors = run_load(base_url, headers, concurrency, args.duration)
+                print(f"{mode:<10}{concurrency:>8}{len(latencies) / args.duration:>9.1f}"
+                      f"{percentile(latencies, 50):>9.0f}{percentile(latencies, 95):>9.0f}"
+                      f"{percentile(latencies, 99):>9.0f}{len(errors):>8}", flush=True)
+        except RuntimeError as e:
+            log.seek(0)
+            last_lines = log.read().strip().splitlines()[-5:]
+            print(f"{mode:<10}  skipped: {e}" + "".join(f"\n    {line}" for line in last_lines))
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            log.close()
@@ -0,0 +1,23 @@
+"""gunicorn app for `loadtest.py --mongomock`: the backend on an in-process mongomock database.
+
+Every MongoClient the backend opens in this worker is one shared mongomock client, seeded
+with the load-test cities before the backend imports and with the `loadtest` user right
+after, so each worker can log the client in on its own. Workers do not share data, and
+Mongo round trips are not measured.
+"""
+import mongomock
+import pymongo
+
+from loadtest import LOADTEST_USER, SEED_CITIES
+
+client = mongomock.MongoClient()
+pymongo.MongoClient = lambda *args, **kwargs: client
+client.travel_bot.city_codes.insert_many([dict(city) for city in SEED_CITIES])
+
+from wsgi import app  # noqa: E402  (must import after MongoClient is replaced)
+import voyabot  # noqa: E402
+
+voyabot.users_collection.insert_one({
+    "username": LOADTEST_USER["username"],
+    "password": voyabot.password_hasher.hash(LOADTEST_USER["password"])
+})
@@ -7,6 +7,8 @@ from datetime import datetime
 from PIL import Image
 from io import BytesIO
 import urllib.parse
+import json
+import time
 
 # Streamlit app configuration
 st.set_page_config(page_title="Voyabot", page_icon="🌍", layout="centered")
@@ -204,6 +206,49 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 # Flask backend URL
 BASE_URL = "http://127.0.0.1:5001"
 
+# Questionnaire job polling
+QUESTIONNAIRE_POLL_INTERVAL = 1.5  # seconds
+QUESTIONNAIRE_POLL_ATTEMPTS = 80
+
+# Reviews and replies fetched per page
+REVIEWS_PAGE_SIZE = 10
+REPLIES_PAGE_SIZE = 10
+
+def conditional_get_json(url, headers=None):
+    """GET a JSON endpoint with If-None-Match; on 304 the body cached in the session is reused.
+
+    Returns (status_code, data); a 304 is reported as 200 with the cached data.
+    """
+    cache = st.session_state.setdefault("http_cache", {})
+    headers = dict(headers or {})
+    cached = cache.get(url)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    response = requests.get(url, headers=headers)
+    if response.status_code == 304 and cached:
+        return 200, cached[1]
+    if response.status_code != 200:
+        return response.status_code, None
+    data = response.json()
+    if response.headers.get("ETag"):
+        cache[url] = (response.headers["ETag"], data)
+    return 200, data
+
+def read_sse(response):
+    """Yield (event, data) pairs from a streaming text/event-stream response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
 # Image URLs for circular bubbles
 image_urls = [
     "https://img.veenaworld.com/wp-content/uploads/2018/06/1-cover-shutterstock_782705764-Camel-ride-on-the-sand-dunes-of-Thar-desert-Jaisalmer.jpg",
@@ -489,9 +534,42 @@ elif st.session_state["current_page"] == "Chat Area":
         try:
             st.session_state["waiting_for_reply"] = True  # ✅ Prevent duplicate requests
             headers = {"Authorization": f"Bearer {st.session_state['token']}"}
-            response = requests.post(f"{BASE_URL}/chat", json={"message": chat_input}, headers=headers)
+            timestamp = datetime.now().strftime("%H:%M")
 
-            if response.status_code == 200:
+            # ✅ Show the user's message right away and stream the reply into a placeholder
+            with chat_container:
+                st.markdown(
+                    f"""
+                    <div class="user-message">
+                        <span class="message-text">{chat_input}</span>
+                        <span class="timestamp">{timestamp}</span>
+                    </div>
+                    """, unsafe_allow_html=True)
+                reply_placeholder = st.empty()
+
+            response = requests.post(
+                f"{BASE_URL}/chat",
+                json={"message": chat_input, "stream": True},
+                headers=headers,
+                stream=True
+            )
+
+            if response.status_code == 200 and response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                bot_response = ""
+                for event, data in read_sse(response):
+                    if event == "token":
+                        bot_response += data["text"]
+                        reply_placeholder.markdown(
+                            f"""
+                            <div class="bot-message">
+                                <span class="message-text">{bot_response}▌</span>
+                            </div>
+                            """, unsafe_allow_html=True)
+                    elif event == "error":
+                        bot_response = f"⚠️ {data['error']}"  # Show error message if API fails
+                if not bot_response:
+                    bot_response = "No response available."
+            elif response.status_code == 200:
                 data = response.json()  
                 if "error" in data:
                     bot_response = f"⚠️ {data['error']}"  # Show error message if API fails
@@ -501,7 +579,6 @@ elif st.session_state["current_page"] == "Chat Area":
                 bot_response = "⚠️ Server error. Try again."
 
             # ✅ Store chat in session state
-            timestamp = datetime.now().strftime("%H:%M")
             st.session_state["messages"].append({"role": "user", "content": chat_input, "timestamp": timestamp})
             st.session_state["messages"].append({"role": "bot", "content": bot_response, "timestamp": timestamp})
 
@@ -528,11 +605,10 @@ elif st.session_state["current_page"] == "Questionnaire":
 
     try:
         headers = {"Authorization": f"Bearer {st.session_state['token']}"}
-        response = requests.get(f"{BASE_URL}/get_questions", headers=headers)
+        # Revalidated with the ETag on every rerun; the body is only sent again when questions change
+        status_code, questions_data = conditional_get_json(f"{BASE_URL}/get_questions", headers=headers)
 
-        if response.status_code == 200:
-            questions_data = response.json()
-            
+        if status_code == 200:
             # Initialize form submission state
             if "questionnaire_submitted" not in st.session_state:
                 st.session_state.questionnaire_submitted = False
@@ -570,13 +646,27 @@ elif st.session_state["current_page"] == "Questionnaire":
                             try:
                                 response = requests.post(
                                     f"{BASE_URL}/submit_questionnaire", 
+                                    params={"mode": "async"},
                                     json=answers, 
                                     headers=headers
                                 )
-                                if response.status_code == 201:
+                                if response.status_code == 202:
+                                    # ✅ Poll the job until the recommendation is ready
+                                    result_url = f"{BASE_URL}{response.json()['result_url']}"
+                                    with st.spinner("Generating your personalized travel plan..."):
+                                        for _ in range(QUESTIONNAIRE_POLL_ATTEMPTS):
+                                            response = requests.get(result_url, headers=headers)
+                                            if response.status_code != 202:
+                                                break
+                                            time.sleep(QUESTIONNAIRE_POLL_INTERVAL)
+                                if response.status_code in (200, 201):
                                     st.session_state.questionnaire_submitted = True
                                     st.session_state.questionnaire_data = response.json()
                                     form_container.empty()  # Clear the form
+                                elif response.status_code == 202:
+                                    st.error("⚠️ Your travel plan is taking longer than expected. Please try again.")
+                                else:
+                                    st.error(f"⚠️ {response.json().get('error', 'Could not generate a recommendation.')}")
                             except requests.exceptions.RequestException as e:
                                 st.error(f"⚠️ Could not connect to the backend. Error: {str(e)}")
 
@@ -585,13 +675,18 @@ elif st.session_state["current_page"] == "Questionnaire":
                 data = st.session_state.questionnaire_data
                 st.success(data["message"])
 
+                if data.get("partial"):
+                    st.warning("⚠️ Part of your plan could not be generated in time: "
+                               + ", ".join(data.get("missing", {}).keys()))
+
                 # Display recommendations
-                st.markdown(f"""
-                    <div class="recommendation-box">
-                        <h3>🌍 Personalized Travel Recommendation</h3>
-                        <p>{data['recommendation']}</p>
-                    </div>
-                """, unsafe_allow_html=True)
+                if data.get("recommendation"):
+                    st.markdown(f"""
+                        <div class="recommendation-box">
+                            <h3>🌍 Personalized Travel Recommendation</h3>
+                            <p>{data['recommendation']}</p>
+                        </div>
+                    """, unsafe_allow_html=True)
 
                 if "assistance" in data and data["assistance"]:
                     st.subheader("\U0001F6E0 Additional Assistance:")
@@ -703,13 +798,50 @@ elif st.session_state["current_page"] == "User Reviews":
         st.session_state.review_form_key = 0
     if "reply_form_keys" not in st.session_state:
         st.session_state.reply_form_keys = {}
+    # Pages loaded so far (newest first) and the cursor for the next one; likes and
+    # replies update this list in place instead of refetching every review
+    if "reviews" not in st.session_state:
+        st.session_state.reviews = None
+        st.session_state.reviews_cursor = None
+        st.session_state.reviews_total = None
+    # Reply threads the user has opened: review_id -> {"replies": [...], "cursor": ...}
+    if "open_replies" not in st.session_state:
+        st.session_state.open_replies = {}
+
+    def fetch_reviews_page(cursor=None):
+        params = {"limit": REVIEWS_PAGE_SIZE}
+        if cursor:
+            params["before"] = cursor
+        response = requests.get(f"{BASE_URL}/get_reviews", params=params, headers=headers)
+        response.raise_for_status()
+        page = response.json()
+        return page["reviews"], page.get("next_cursor")
+
+    def fetch_replies_page(review_id, cursor=None):
+        params = {"limit": REPLIES_PAGE_SIZE}
+        if cursor:
+            params["after"] = cursor
+        response = requests.get(f"{BASE_URL}/review_replies/{review_id}", params=params, headers=headers)
+        response.raise_for_status()
+        page = response.json()
+        return {"replies": page["replies"], "cursor": page.get("next_cursor")}
 
     try:
-        # Fetch reviews with loading state
-        with st.spinner("Loading reviews..."):
-            response = requests.get(f"{BASE_URL}/get_reviews", headers=headers)
-            response.raise_for_status()
-            reviews = response.json()
+        if st.session_state.reviews is None:
+            with st.spinner("Loading reviews..."):
+                st.session_state.reviews, st.session_state.reviews_cursor = fetch_reviews_page()
+                count_response = requests.get(f"{BASE_URL}/reviews_count", headers=headers)
+                st.session_state.reviews_total = count_response.json().get("count") if count_response.ok else None
+        reviews = st.session_state.reviews
+
+        count_col, refresh_col = st.columns([4, 1])
+        with count_col:
+            if st.session_state.reviews_total is not None:
+                st.caption(f"{st.session_state.reviews_total} reviews")
+        with refresh_col:
+            if st.button("🔄 Refresh", key="refresh_reviews"):
+                st.session_state.reviews = None
+                st.rerun()
 
         if not reviews:
             st.info("No reviews yet. Be the first to share your experience!")
@@ -740,11 +872,14 @@ elif st.session_state["current_page"] == "User Reviews":
                                         key=f"like_{review_id}",
                                         help="Like this review"):
                                 with st.spinner("Sending like..."):
-                                    requests.post(
+                                    response = requests.post(
                                         f"{BASE_URL}/like_dislike_review",
                                         json={"review_id": review_id, "action": "like"},
                                         headers=headers
                                     )
+                                if response.status_code == 200:
+                                    counts = response.json()
+                                    review["likes"], review["dislikes"] = counts["likes"], counts["dislikes"]
                                 st.rerun()
                         
                         with dislike_col:
@@ -752,11 +887,14 @@ elif st.session_state["current_page"] == "User Reviews":
                                         key=f"dislike_{review_id}",
                                         help="Dislike this review"):
                                 with st.spinner("Sending dislike..."):
-                                    requests.post(
+                                    response = requests.post(
                                         f"{BASE_URL}/like_dislike_review",
                                         json={"review_id": review_id, "action": "dislike"},
                                         headers=headers
                                     )
+                                if response.status_code == 200:
+                                    counts = response.json()
+                                    review["likes"], review["dislikes"] = counts["likes"], counts["dislikes"]
                                 st.rerun()
 
                     # Review text
@@ -767,10 +905,20 @@ elif st.session_state["current_page"] == "User Reviews":
                     """, unsafe_allow_html=True)
                     st.write("---")
 
-                    # Replies section
-                    if review.get("replies"):
-                        with st.expander(f"💬 {len(review['replies'])} Replies", expanded=False):
-                            for i, reply in enumerate(review["replies"]):
+                    # Replies section (fetched only when the thread is opened)
+                    reply_count = review.get("reply_count", 0)
+                    thread = st.session_state.open_replies.get(review_id)
+                    if thread is None:
+                        if reply_count and st.button(f"💬 {reply_count} Replies", key=f"show_replies_{review_id}"):
+                            with st.spinner("Loading replies..."):
+                                st.session_state.open_replies[review_id] = fetch_replies_page(review_id)
+                            st.rerun()
+                    else:
+                        if st.button(f"💬 Hide {reply_count} Replies", key=f"hide_replies_{review_id}"):
+                            del st.session_state.open_replies[review_id]
+                            st.rerun()
+                        with st.container():
+                            for i, reply in enumerate(thread["replies"]):
                                 try:
                                     # Handle both string and datetime timestamp formats
                                     if isinstance(reply["timestamp"], str):
@@ -778,7 +926,7 @@ elif st.session_state["current_page"] == "User Reviews":
                                     else:
                                         reply_time = reply["timestamp"]
                                     formatted_time = reply_time.strftime("%b %d, %Y at %I:%M %p")
-                                except (ValueError, KeyError) as e:
+                                except (ValueError, KeyError, TypeError, AttributeError) as e:
                                     formatted_time = "Unknown time"
                                 
                                 # Create columns for reply content and delete button
@@ -810,15 +958,25 @@ elif st.session_state["current_page"] == "User Reviews":
                                                     f"{BASE_URL}/delete_reply",
                                                     json={
                                                         "review_id": review_id,
-                                                        "reply_index": i
+                                                        "reply_id": reply["reply_id"]
                                                     },
                                                     headers=headers
                                                 )
                                             if response.status_code == 200:
+                                                thread["replies"].pop(i)
+                                                review["reply_count"] = max(reply_count - 1, 0)
                                                 st.rerun()
                                             else:
                                                 st.error("Failed to delete reply")
 
+                            if thread["cursor"]:
+                                if st.button("More replies", key=f"more_replies_{review_id}"):
+                                    with st.spinner("Loading replies..."):
+                                        page = fetch_replies_page(review_id, thread["cursor"])
+                                        thread["replies"].extend(page["replies"])
+                                        thread["cursor"] = page["cursor"]
+                                    st.rerun()
+
                     # Reply form with clearing functionality
                     reply_form_key = st.session_state.reply_form_keys.get(review_id, 0)
                     with st.form(key=f"reply_form_{review_id}_{reply_form_key}"):
@@ -844,6 +1002,10 @@ elif st.session_state["current_page"] == "User Reviews":
                                                 headers=headers
                                             )
                                             if response.status_code == 200:
+                                                review["reply_count"] = reply_count + 1
+                                                # Newest reply goes last; append it only if the thread is fully loaded
+                                                if thread is not None and not thread["cursor"]:
+                                                    thread["replies"].append(response.json()["reply"])
                                                 st.session_state.reply_form_keys[review_id] = reply_form_key + 1
                                                 st.success("Reply posted successfully!")
                                                 st.rerun()
@@ -857,6 +1019,13 @@ elif st.session_state["current_page"] == "User Reviews":
 
                     st.markdown("---")
 
+            if st.session_state.reviews_cursor:
+                if st.button("Load more reviews", key="load_more_reviews"):
+                    with st.spinner("Loading reviews..."):
+                        page, st.session_state.reviews_cursor = fetch_reviews_page(st.session_state.reviews_cursor)
+                        reviews.extend(page)
+                    st.rerun()
+
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to load reviews: {str(e)}")
 
@@ -875,6 +1044,7 @@ elif st.session_state["current_page"] == "User Reviews":
                         )
                         if response.status_code == 201:
                             st.session_state.review_form_key += 1
+                            st.session_state.reviews = None  # reload from the first page
                             st.success("Review submitted successfully!")
                             st.rerun()
                         else: